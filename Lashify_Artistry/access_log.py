@@ -0,0 +1,167 @@
+"""
+Structured access log: one JSON object per request in ``ACCESS_LOG_PATH``.
+
+``AccessLogMiddleware`` only builds the record and puts it on an in-memory
+queue (``QueueHandler``); a ``QueueListener`` thread does the file writes,
+so requests never wait on the disk. The file rotates by size
+(``ACCESS_LOG_MAX_BYTES``) or, when ``ACCESS_LOG_ROTATE_WHEN`` is set (e.g.
+``'midnight'``), by time, and rolled files are gzipped. Rotation is per
+process, so each worker needs its own file: ``{worker}`` in the path (as
+in the default) is the worker's gunicorn slot (``GUNICORN_WORKER_SLOT``,
+set in gunicorn.conf.py; 0 outside gunicorn). A worker recycled after
+``max_requests`` gets its predecessor's slot and appends to the same file,
+so the number of files stays at the number of workers.
+
+``python manage.py access_log_stats`` summarizes the files per route.
+"""
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+from pathlib import Path
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger('lashify.access')
+logger.propagate = False
+
+_started_pid = None
+_start_lock = threading.Lock()
+_listener = None
+
+
+# ------------------------------
+# Writer
+# ------------------------------
+
+def _gzip_namer(name):
+    return f"{name}.gz"
+
+
+def _gzip_rotator(source, dest):
+    with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+def _file_handler(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    backups = getattr(settings, 'ACCESS_LOG_BACKUP_COUNT', 14)
+    when = getattr(settings, 'ACCESS_LOG_ROTATE_WHEN', '')
+    if when:
+        handler = TimedRotatingFileHandler(path, when=when, backupCount=backups, encoding='utf-8', utc=True)
+    else:
+        handler = RotatingFileHandler(
+            path, maxBytes=getattr(settings, 'ACCESS_LOG_MAX_BYTES', 20 * 1024 * 1024),
+            backupCount=backups, encoding='utf-8',
+        )
+    handler.namer = _gzip_namer
+    handler.rotator = _gzip_rotator
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    return handler
+
+
+def _stop():
+    global _listener
+    if _listener is not None:
+        _listener.stop()  # flushes whatever is still queued
+        _listener = None
+
+
+def start():
+    """
+    Start the writer thread for this process. Called lazily so each gunicorn
+    worker starts its own after the fork. Returns False when logging is off.
+    """
+    global _started_pid, _listener
+    path = getattr(settings, 'ACCESS_LOG_PATH', None)
+    if not path:
+        return False
+    if _started_pid == os.getpid():
+        return True
+    with _start_lock:
+        if _started_pid != os.getpid():
+            records = queue.SimpleQueue()
+            for handler in list(logger.handlers):
+                logger.removeHandler(handler)
+            logger.addHandler(QueueHandler(records))
+            logger.setLevel(logging.INFO)
+            path = str(path).format(worker=os.environ.get('GUNICORN_WORKER_SLOT', '0'))
+            _listener = QueueListener(records, _file_handler(Path(path)))
+            _listener.start()
+            atexit.register(_stop)
+            _started_pid = os.getpid()
+    return True
+
+
+# ------------------------------
+# Middleware
+# ------------------------------
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unmatched>'
+    return match.view_name or '<unnamed>'
+
+
+def _bytes_sent(response):
+    if response.streaming:
+        length = response.get('Content-Length')
+        return int(length) if length else None
+    return len(response.content)
+
+
+class AccessLogMiddleware:
+    """
+    Logs each request. Views can set ``request.booking_reference`` to have
+    it recorded; the query count comes from ``MetricsMiddleware``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self.log(request, response, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.log(request, response, started)
+        return response
+
+    def log(self, request, response, started):
+        if not start():
+            return
+
+        timer = getattr(request, 'query_timer', None)
+        record = {
+            'ts': timezone.now().isoformat(timespec='milliseconds'),
+            'method': request.method,
+            'route': _route(request),
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+            'queries': timer.count if timer else None,
+            'bytes': _bytes_sent(response),
+            'reference': getattr(request, 'booking_reference', None),
+        }
+        logger.info(json.dumps(record, separators=(',', ':')))
+
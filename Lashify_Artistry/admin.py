@@ -1,24 +1,51 @@
+import uuid
+
+from django.conf import settings
 from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.db.models import Count
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
 from django.utils.html import format_html
-from django.core.mail import EmailMessage
-from django.template.loader import render_to_string
 from django.shortcuts import redirect
-from .models import Booking
+from django.utils import timezone
+from .models import Booking, DailyCapacity, OutboundEmail, Service
+from .notifications import dispatch, dispatch_many, PAYMENT_VERIFIED
+from .forms import BookingAdminForm
+from .uploads import attach_image
+from .thumbnails import rendition_url
+from .media import signed_media_url
+from .catalogue import service_choices
+
+
+class ServiceFilter(admin.SimpleListFilter):
+    """Filter by service, labelled from the catalogue cache."""
+    title = 'service'
+    parameter_name = 'service'
+
+    def lookups(self, request, model_admin):
+        return service_choices(active_only=False)
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(service=self.value())
+        return queryset
 
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
     """Admin configuration for Booking model."""
+    form = BookingAdminForm
 
     # ---- Display settings ----
     list_display = (
-        'name', 'email', 'service', 'date',
+        'name', 'email', 'service_display', 'date',
         'paid', 'payment_verified', 'is_confirmed',
         'payment_proof_thumb', 'verification_slip_thumb'
     )
-    list_filter = ('service', 'paid', 'payment_verified', 'date')
+    list_filter = (ServiceFilter, 'paid', 'payment_verified', 'date')
     search_fields = ('name', 'email', 'reference')
-    actions = ['mark_as_verified', 'resend_confirmation_email']
+    actions = ['mark_as_verified', 'mark_as_verified_and_email', 'resend_confirmation_email']
     readonly_fields = (
         'reference', 'created_at',
         'payment_proof_preview', 'verification_slip_preview',
@@ -57,6 +84,15 @@ class BookingAdmin(admin.ModelAdmin):
 
         return super().change_view(request, object_id, form_url, extra_context)
 
+    def save_model(self, request, obj, form, change):
+        """Store the uploaded slip as original + normalized copy. Staff may overbook."""
+        if 'verification_slip' in form.changed_data and obj.verification_slip:
+            attach_image(
+                obj, 'verification_slip', form.cleaned_data['verification_slip'],
+                normalized=form.normalized_slip,
+            )
+        obj.save(overbook=True)
+
     # =========================================================
     # Helpers
     # =========================================================
@@ -64,27 +100,16 @@ class BookingAdmin(admin.ModelAdmin):
         """Reusable method to send confirmation email with slip attached."""
         if booking.paid and booking.payment_verified and booking.verification_slip:
             try:
-                message = render_to_string("emails/confirmation_email.html", {
-                    'booking': booking,
-                    'site_name': "Lashify Artistry",
-                })
-                email = EmailMessage(
-                    subject="✅ Payment Verified - Lashify Artistry",
-                    body=message,
-                    from_email=None,
-                    to=[booking.email],
-                )
-                email.content_subtype = "html"
-                email.attach_file(booking.verification_slip.path)
-                email.send(fail_silently=False)
+                # Explicit resend: bypass the once-per-event dedupe
+                dispatch(PAYMENT_VERIFIED, booking, force=True)
 
                 self.message_user(
                     request,
-                    f"Confirmation email sent to {booking.email}",
+                    f"Confirmation email queued for {booking.email}",
                     messages.SUCCESS
                 )
             except Exception as e:
-                self.message_user(request, f"Error sending email: {e}", messages.ERROR)
+                self.message_user(request, f"Error queueing email: {e}", messages.ERROR)
         else:
             self.message_user(
                 request,
@@ -92,6 +117,41 @@ class BookingAdmin(admin.ModelAdmin):
                 messages.WARNING
             )
 
+    def _queue_confirmation_emails(self, request, pks):
+        """
+        Queue the payment-verified email for the eligible bookings among
+        ``pks`` as one outbox batch, a chunk of bookings per query and
+        INSERT, and send the admin to the batch's progress page. The outbox
+        worker delivers the batch over one mail connection per
+        ``send_pending()`` round and records each message's result.
+        """
+        chunk_size = getattr(settings, 'EMAIL_BULK_CHUNK_SIZE', 200)
+        batch = uuid.uuid4()
+        queued = eligible = 0
+        for start in range(0, len(pks), chunk_size):
+            bookings = list(
+                # verification_slip__gt='' excludes both NULL and '' slips
+                Booking.objects.filter(
+                    pk__in=pks[start:start + chunk_size], paid=True, payment_verified=True,
+                    verification_slip__gt='',
+                )
+            )
+            eligible += len(bookings)
+            # Explicit resend: bypass the once-per-event dedupe
+            queued += dispatch_many(PAYMENT_VERIFIED, bookings, request=request, force=True, batch=batch)
+
+        skipped = len(pks) - eligible
+        if skipped:
+            self.message_user(
+                request,
+                f"{skipped} bookings not eligible (check paid, verified, and slip).",
+                messages.WARNING
+            )
+        if not queued:
+            return None
+        self.message_user(request, f"{queued} confirmation emails queued.", messages.SUCCESS)
+        return redirect('admin:Lashify_Artistry_outboundemail_batch', batch)
+
     # =========================================================
     # Boolean status
     # =========================================================
@@ -100,34 +160,42 @@ class BookingAdmin(admin.ModelAdmin):
     is_confirmed.boolean = True
     is_confirmed.short_description = 'Confirmed'
 
+    def service_display(self, obj):
+        return obj.get_service_display()
+    service_display.short_description = 'Service'
+    service_display.admin_order_field = 'service'
+
     # =========================================================
-    # Image Previews
+    # Image Previews (pre-rendered, see thumbnails.py)
     # =========================================================
+    def _rendition(self, fieldfile, rendition, style, empty):
+        if not fieldfile:
+            return empty
+        url = rendition_url(fieldfile, rendition)
+        if not url:
+            return "⚠️ Missing file"
+        return format_html(
+            '<a href="{}" target="_blank"><img src="{}" style="{}" loading="lazy" /></a>',
+            signed_media_url(fieldfile.name), url, style
+        )
+
     def payment_proof_preview(self, obj):
-        if obj.payment_proof:
-            return format_html('<img src="{}" style="max-height:150px; border:1px solid #ccc;" />', obj.payment_proof.url)
-        return "No image"
+        return self._rendition(obj.payment_proof, 'preview', "max-height:150px; border:1px solid #ccc;", "No image")
     payment_proof_preview.short_description = 'Proof of Payment'
 
     def verification_slip_preview(self, obj):
-        if obj.verification_slip:
-            return format_html('<img src="{}" style="max-height:150px; border:1px solid #ccc;" />', obj.verification_slip.url)
-        return "No slip"
+        return self._rendition(obj.verification_slip, 'preview', "max-height:150px; border:1px solid #ccc;", "No slip")
     verification_slip_preview.short_description = 'Verification Slip'
 
     # =========================================================
     # Thumbnails in list view
     # =========================================================
     def payment_proof_thumb(self, obj):
-        if obj.payment_proof:
-            return format_html('<img src="{}" style="max-height:50px;" />', obj.payment_proof.url)
-        return "-"
+        return self._rendition(obj.payment_proof, 'thumb', "max-height:50px;", "-")
     payment_proof_thumb.short_description = 'Proof'
 
     def verification_slip_thumb(self, obj):
-        if obj.verification_slip:
-            return format_html('<img src="{}" style="max-height:50px;" />', obj.verification_slip.url)
-        return "-"
+        return self._rendition(obj.verification_slip, 'thumb', "max-height:50px;", "-")
     verification_slip_thumb.short_description = 'Slip'
 
     # =========================================================
@@ -138,7 +206,94 @@ class BookingAdmin(admin.ModelAdmin):
         updated = queryset.update(payment_verified=True)
         self.message_user(request, f"{updated} bookings marked as verified.")
 
+    @admin.action(description="✅📨 Mark as Verified and email confirmation")
+    def mark_as_verified_and_email(self, request, queryset):
+        # Keep the pks: the changelist filter may be "not verified", which the
+        # queryset would no longer match after the UPDATE.
+        pks = list(queryset.values_list('pk', flat=True))
+        updated = Booking.objects.filter(pk__in=pks).update(payment_verified=True)
+        self.message_user(request, f"{updated} bookings marked as verified.")
+        return self._queue_confirmation_emails(request, pks)
+
     @admin.action(description="📨 Resend confirmation email")
     def resend_confirmation_email(self, request, queryset):
-        for booking in queryset:
-            self._send_confirmation_email(request, booking)
+        return self._queue_confirmation_emails(request, list(queryset.values_list('pk', flat=True)))
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    """Read-mostly view of the email outbox."""
+
+    list_display = ('subject', 'recipients', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject', 'to')
+    actions = ['retry_now']
+    readonly_fields = (
+        'subject', 'body', 'content_subtype', 'from_email', 'to', 'attachments',
+        'batch', 'attempts', 'last_error', 'created_at', 'sent_at',
+    )
+
+    def get_urls(self):
+        return [
+            path(
+                'batch/<uuid:batch>/',
+                self.admin_site.admin_view(self.batch_view),
+                name='Lashify_Artistry_outboundemail_batch',
+            ),
+        ] + super().get_urls()
+
+    def batch_view(self, request, batch):
+        """Delivery progress of one bulk action's emails; refreshes until done."""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        emails = OutboundEmail.objects.filter(batch=batch)
+        counts = dict(emails.values_list('status').annotate(n=Count('pk')).order_by())
+        total = sum(counts.values())
+        pending = counts.get(OutboundEmail.STATUS_PENDING, 0)
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': "Email batch progress",
+            'batch': batch,
+            'total': total,
+            'sent': counts.get(OutboundEmail.STATUS_SENT, 0),
+            'failed': counts.get(OutboundEmail.STATUS_FAILED, 0),
+            'pending': pending,
+            'percent': round(100 * (total - pending) / total) if total else 100,
+            # Failed messages, and pending ones that are retrying after an error
+            'problems': emails.exclude(last_error='').select_related('booking').order_by('pk')[:100],
+            'changelist_url': reverse('admin:Lashify_Artistry_outboundemail_changelist') + f'?batch={batch}',
+        }
+        return TemplateResponse(request, 'admin/Lashify_Artistry/outboundemail/batch.html', context)
+
+    def recipients(self, obj):
+        return ", ".join(obj.to)
+    recipients.short_description = 'To'
+
+    @admin.action(description="🔁 Retry selected emails now")
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status=OutboundEmail.STATUS_SENT).update(
+            status=OutboundEmail.STATUS_PENDING, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f"{updated} emails queued for retry.")
+
+
+@admin.register(DailyCapacity)
+class DailyCapacityAdmin(admin.ModelAdmin):
+    """Per-day slot counts; edit ``capacity`` to open or close a day."""
+
+    list_display = ('date', 'category', 'capacity', 'booked', 'available')
+    list_editable = ('capacity',)
+    list_filter = ('category',)
+    date_hierarchy = 'date'
+    readonly_fields = ('booked',)
+
+
+@admin.register(Service)
+class ServiceAdmin(admin.ModelAdmin):
+    """Service catalogue; saving bumps the version every process checks."""
+
+    list_display = ('name', 'code', 'category', 'price', 'duration_minutes', 'is_active', 'sort_order')
+    list_editable = ('price', 'is_active', 'sort_order')
+    list_filter = ('category', 'is_active')
+    search_fields = ('name', 'code')
@@ -0,0 +1,596 @@
+"""
+Benchmarks for the booking, confirmation, admin and static page flows.
+
+Runs against a throwaway test database (SQLite in memory, or a test
+database on the configured Postgres server) seeded with N bookings. Email
+goes to the locmem backend and uploads to a temporary MEDIA_ROOT, so no
+network or real data is touched. Each scenario reports latency percentiles,
+queries per request and peak Python memory (tracemalloc) per request.
+
+``throughput()`` compares the WSGI and ASGI request paths: the same burst
+of concurrent bookings (with proof uploads) goes through Django's WSGI
+handler on a thread pool and through its ASGI handler on one event loop.
+
+``sqlite_writes()`` forks several processes that all post bookings to one
+SQLite file at once, with the default connection settings and then with
+the tuned profile from settings (WAL, IMMEDIATE transactions, busy timeout).
+
+``email_throughput()`` sends through the SMTP and HTTP API backends to
+local fake servers that wait a fixed round-trip time before each reply,
+and reports messages per second for each.
+
+Run with ``python manage.py benchmark``; see that command for options.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from statistics import mean, median
+import asyncio
+import io
+import itertools
+import json
+import multiprocessing
+import platform
+import random
+import socketserver
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+
+import django
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, connections
+from django.test import AsyncClient, Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from . import catalogue
+from .links import my_bookings_url
+from .references import allocate_references
+
+SEED_EMAILS = 500  # bookings are spread over this many customers
+
+
+# ------------------------------
+# Seeding
+# ------------------------------
+
+def seed_bookings(count, log=print):
+    """Bulk-insert ``count`` bookings spread over customers, services and dates."""
+    from .models import Booking
+
+    codes = list(catalogue.services())
+    today = date.today()
+    rng = random.Random(42)
+    references = iter(allocate_references(count))
+    batch = []
+    for i in range(count):
+        service = catalogue.get_service(codes[i % len(codes)])
+        batch.append(Booking(
+            name=f"Customer {i % SEED_EMAILS}",
+            email=f"customer{i % SEED_EMAILS}@example.com",
+            service=service.code,
+            date=today + timedelta(days=rng.randint(-365, 365)),
+            fee=service.price,
+            paid=rng.random() < 0.5,
+            payment_verified=rng.random() < 0.3,
+            reference=next(references),
+            confirmation_token=uuid.uuid4(),
+            created_at=timezone.now(),
+        ))
+        if len(batch) == 2000:
+            Booking.objects.bulk_create(batch)
+            batch = []
+            log(f"  seeded {i + 1}/{count}")
+    Booking.objects.bulk_create(batch)
+
+
+def sample_jpeg(size=(1600, 1200)):
+    """A photo-sized JPEG (noise, so it doesn't compress to nothing)."""
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.effect_noise(size, 48).convert('RGB').save(buffer, 'JPEG', quality=85)
+    return buffer.getvalue()
+
+
+# ------------------------------
+# Scenarios
+# ------------------------------
+
+def scenarios(client, admin_client):
+    """``[(name, callable)]``; each callable makes one request."""
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from .models import Booking
+
+    counter = itertools.count()
+    proof = sample_jpeg()
+    far_future = date.today() + timedelta(days=3650)
+    codes = [code for code, _name in catalogue.service_choices()]
+
+    def create_booking(upload):
+        def run():
+            i = next(counter)
+            data = {
+                'name': 'Bench', 'email': f'bench{i}@example.com',
+                'service': codes[i % len(codes)],
+                # A new day per request so capacity never runs out
+                'date': (far_future + timedelta(days=i)).isoformat(),
+                'custom_details': 'benchmark',
+            }
+            if upload:
+                data['payment_proof'] = SimpleUploadedFile('proof.jpg', proof, 'image/jpeg')
+            return client.post('/create-booking/', data)
+        return run
+
+    sample = list(Booking.objects.order_by('?').values('email', 'reference', 'confirmation_token')[:500])
+    samples = itertools.cycle(sample)
+
+    def lookup():
+        row = next(samples)
+        return client.post('/my-bookings/', {'email': row['email'], 'reference': row['reference']})
+
+    def customer_page():
+        return client.get(my_bookings_url(next(samples)['email']))
+
+    def confirm():
+        return client.get(f"/confirm/{next(samples)['confirmation_token']}/")
+
+    def get(c, url):
+        return lambda: c.get(url)
+
+    changelist = '/admin/Lashify_Artistry/booking/'
+    return [
+        ('static: index', get(client, '/')),
+        ('static: about', get(client, '/about/')),
+        ('static: services', get(client, '/services/')),
+        ('static: services-detail', get(client, '/services-detail/')),
+        ('create_booking', create_booking(upload=False)),
+        ('create_booking + proof upload', create_booking(upload=True)),
+        ('my_bookings lookup', lookup),
+        ('my_bookings signed page', customer_page),
+        ('send_customer_confirmation', confirm),
+        ('admin changelist', get(admin_client, changelist)),
+        ('admin changelist search', get(admin_client, f'{changelist}?q=customer42')),
+        ('admin changelist filter', get(admin_client, f'{changelist}?paid__exact=1&service=C_lashes')),
+    ]
+
+
+def _booking_form(i, proof, codes, first_day):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+
+    return {
+        'name': 'Load', 'email': f'load{i}@example.com',
+        'service': codes[i % len(codes)],
+        'date': (first_day + timedelta(days=i)).isoformat(),
+        'payment_proof': SimpleUploadedFile('proof.jpg', proof, 'image/jpeg'),
+    }
+
+
+# ------------------------------
+# Measuring
+# ------------------------------
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def measure(run, iterations, warmup=2):
+    for _ in range(warmup):
+        run()
+
+    timings, queries, statuses = [], [], set()
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = run()
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(len(captured))
+        statuses.add(response.status_code)
+
+    # Memory on separate runs: tracemalloc slows everything down
+    peaks = []
+    for _ in range(min(iterations, 5)):
+        tracemalloc.start()
+        run()
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return {
+        'p50_ms': round(median(timings), 3),
+        'p90_ms': round(_percentile(timings, 90), 3),
+        'p99_ms': round(_percentile(timings, 99), 3),
+        'mean_ms': round(mean(timings), 3),
+        'max_ms': round(max(timings), 3),
+        'queries': median(queries),
+        'max_queries': max(queries),
+        'peak_kb': round(max(peaks) / 1024, 1),
+        'statuses': sorted(statuses),
+    }
+
+
+def _throughput_result(timings, statuses, elapsed):
+    return {
+        'requests': len(timings),
+        'requests_per_s': round(len(timings) / elapsed, 1),
+        'p50_ms': round(median(timings), 3),
+        'p99_ms': round(_percentile(timings, 99), 3),
+        'statuses': sorted(statuses),
+    }
+
+
+def _wsgi_burst(forms, concurrency):
+    local = threading.local()
+
+    def post(form):
+        client = getattr(local, 'client', None) or Client()
+        local.client = client
+        start = time.perf_counter()
+        response = client.post('/create-booking/', form)
+        return (time.perf_counter() - start) * 1000, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(post, forms))
+    return _throughput_result([t for t, _ in results], {s for _, s in results}, time.perf_counter() - start)
+
+
+async def _asgi_burst(forms, concurrency):
+    slots = asyncio.Semaphore(concurrency)
+    client = AsyncClient()
+
+    async def post(form):
+        async with slots:
+            start = time.perf_counter()
+            response = await client.post('/create-booking/', form)
+            return (time.perf_counter() - start) * 1000, response.status_code
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(post(form) for form in forms))
+    return _throughput_result([t for t, _ in results], {s for _, s in results}, time.perf_counter() - start)
+
+
+def throughput(concurrency, requests, log=print):
+    """Bookings per second through the WSGI and the ASGI handler."""
+    proof = sample_jpeg()
+    codes = [code for code, _name in catalogue.service_choices()]
+    results = {}
+    for offset, mode in enumerate(('wsgi', 'asgi')):
+        # Fresh dates per run so capacity never runs out
+        first_day = date.today() + timedelta(days=4000 + offset * requests)
+        forms = [_booking_form(i, proof, codes, first_day) for i in range(requests)]
+        if mode == 'wsgi':
+            result = _wsgi_burst(forms, concurrency)
+        else:
+            result = asyncio.run(_asgi_burst(forms, concurrency))
+        results[f'create_booking x{concurrency} ({mode})'] = result
+        log(f"  {mode}: {result['requests_per_s']:>7.1f} req/s  p50 {result['p50_ms']:>8.2f} ms  "
+            f"p99 {result['p99_ms']:>8.2f} ms  {result['statuses']}")
+    return results
+
+
+# ------------------------------
+# SQLite writers
+# ------------------------------
+
+# Stock Django: rollback journal, DEFERRED transactions, 5 s busy timeout
+SQLITE_DEFAULT_OPTIONS = {'timeout': 5}
+
+
+def _write_worker(args):
+    """
+    Post ``writes`` bookings from a forked process, reading the customer's
+    bookings page after each one; ``[(kind, ms, status)]``.
+    """
+    worker, writes, first_day = args
+    client = Client(raise_request_exception=False)
+    codes = [code for code, _name in catalogue.service_choices()]
+    email = f'writer{worker}@example.com'
+    client.get(my_bookings_url(email))  # warm up templates and the catalogue
+    results = []
+    for i in range(writes):
+        day = first_day + timedelta(days=worker * writes + i)
+        start = time.perf_counter()
+        response = client.post('/create-booking/', {
+            'name': 'Writer', 'email': email, 'service': codes[i % len(codes)], 'date': day.isoformat(),
+        })
+        results.append(('write', (time.perf_counter() - start) * 1000, response.status_code))
+        start = time.perf_counter()
+        response = client.get(my_bookings_url(email))
+        results.append(('read', (time.perf_counter() - start) * 1000, response.status_code))
+    connections.close_all()
+    return results
+
+
+def sqlite_writes(processes, writes, log=print):
+    """
+    Bookings per second, latencies and failed requests with ``processes``
+    writers (each also reading), for the default SQLite options and the
+    tuned ones in settings.
+    """
+    tuned = dict(connection.settings_dict['OPTIONS'])
+    context = multiprocessing.get_context('fork')
+    results = {}
+    try:
+        profiles = (('default', SQLITE_DEFAULT_OPTIONS, 'DELETE'), ('tuned', tuned, 'WAL'))
+        for offset, (profile, options, journal_mode) in enumerate(profiles):
+            connection.settings_dict['OPTIONS'] = options
+            connections.close_all()
+            # The journal mode is stored in the file and can only change while
+            # no other connection is open, so set it before forking
+            with connection.cursor() as cursor:
+                cursor.execute(f'PRAGMA journal_mode={journal_mode}')
+            # Children must open their own connections
+            connections.close_all()
+            first_day = date.today() + timedelta(days=8000 + offset * processes * writes)
+            start = time.perf_counter()
+            with context.Pool(processes) as pool:
+                runs = pool.map(_write_worker, [(worker, writes, first_day) for worker in range(processes)])
+            elapsed = time.perf_counter() - start
+            requests = [request for run in runs for request in run]
+            write_ms = [ms for kind, ms, _status in requests if kind == 'write']
+            read_ms = [ms for kind, ms, _status in requests if kind == 'read']
+            failed = sum(1 for kind, _ms, status in requests if status >= 500)
+            results[f'{processes} writers ({profile})'] = result = {
+                'requests': len(requests),
+                'failed': failed,
+                'writes_per_s': round(len(write_ms) / elapsed, 1),
+                'write_p50_ms': round(median(write_ms), 3),
+                'write_p99_ms': round(_percentile(write_ms, 99), 3),
+                'read_p50_ms': round(median(read_ms), 3),
+                'read_p99_ms': round(_percentile(read_ms, 99), 3),
+            }
+            log(f"  {profile:<8} {result['writes_per_s']:>7.1f} writes/s  "
+                f"write p50 {result['write_p50_ms']:>7.2f} p99 {result['write_p99_ms']:>8.2f} ms  "
+                f"read p50 {result['read_p50_ms']:>7.2f} p99 {result['read_p99_ms']:>8.2f} ms  {failed} failed")
+    finally:
+        connection.settings_dict['OPTIONS'] = tuned
+        connections.close_all()
+    return results
+
+
+# ------------------------------
+# Email
+# ------------------------------
+
+class _FakeAPIHandler(BaseHTTPRequestHandler):
+    """Accepts Brevo ``/v3/smtp/email`` calls; keeps connections alive."""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # headers and body are separate writes
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        time.sleep(self.server.rtt)
+        status, reply = self.answer(body)
+        reply = json.dumps(reply).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def answer(self, body):
+        """``(status, reply)`` for a request body."""
+        count = len(body.get('messageVersions', [])) or 1
+        return 201, {'messageIds': [f'<{uuid.uuid4()}@fake>' for _ in range(count)]}
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _FakeSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: every command is accepted."""
+
+    def reply(self, line):
+        time.sleep(self.server.rtt)
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.reply('220 fake ESMTP')
+        for line in self.rfile:
+            command = line[:4].upper()
+            if command == b'DATA':
+                self.reply('354 go ahead')
+                for data in self.rfile:
+                    if data == b'.\r\n':
+                        break
+                self.reply('250 queued')
+            elif command == b'QUIT':
+                self.reply('221 bye')
+                return
+            elif command in (b'EHLO', b'HELO'):
+                self.reply('250 fake')
+            else:
+                self.reply('250 ok')
+
+
+def _serve(server_class, handler, rtt):
+    server = server_class(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    server.rtt = rtt
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _emails(count):
+    return [
+        EmailMessage(
+            subject=f'Booking Confirmed {i}',
+            body=f'<p>Hi Customer {i}, your booking is confirmed ✅.</p>',
+            from_email='bench@example.com',
+            to=[f'customer{i}@example.com'],
+        )
+        for i in range(count)
+    ]
+
+
+def email_throughput(count, rtt=0.02, log=print):
+    """
+    Messages per second for SMTP (a connection per message, as the admin
+    used to do, and one shared connection, as the outbox worker does) and
+    for the HTTP API (a call per message, and batched). Both fake servers
+    wait ``rtt`` seconds before every reply, standing in for the network.
+    """
+    class SMTPServer(socketserver.ThreadingTCPServer):
+        allow_reuse_address = True
+
+    smtp = _serve(SMTPServer, _FakeSMTPHandler, rtt)
+    api = _serve(ThreadingHTTPServer, _FakeAPIHandler, rtt)
+    smtp_backend = {
+        'backend': 'django.core.mail.backends.smtp.EmailBackend',
+        'host': '127.0.0.1', 'port': smtp.server_address[1], 'use_tls': False,
+        'username': '', 'password': '',
+    }
+    api_backend = {
+        'backend': 'Lashify_Artistry.email_backends.BrevoEmailBackend',
+        'api_url': f'http://127.0.0.1:{api.server_address[1]}/v3/smtp/email', 'api_key': 'fake',
+    }
+
+    def connection_per_message(messages):
+        for message in messages:
+            get_connection(**smtp_backend).send_messages([message])
+
+    def shared(options):
+        def send(messages):
+            with get_connection(**options) as mail:
+                mail.send_messages(messages)
+        return send
+
+    scenarios = [
+        ('smtp, connection per message', connection_per_message),
+        ('smtp, shared connection', shared(smtp_backend)),
+        ('api, call per message', shared({**api_backend, 'batch_size': 1})),
+        ('api, batched', shared(api_backend)),
+    ]
+    results = {}
+    try:
+        for name, send in scenarios:
+            start = time.perf_counter()
+            send(_emails(count))
+            elapsed = time.perf_counter() - start
+            results[name] = {'messages': count, 'messages_per_s': round(count / elapsed, 1)}
+            log(f"  {name:<32} {results[name]['messages_per_s']:>8.1f} msg/s")
+    finally:
+        smtp.shutdown()
+        api.shutdown()
+    return results
+
+
+def run(bookings, iterations, only=None, concurrency=0, emails=0, writers=0, log=print):
+    """Create a test database, seed it and measure every scenario."""
+    from django.contrib.auth import get_user_model
+
+    setup_test_environment()
+    scratch = tempfile.TemporaryDirectory()
+    test_name = connection.settings_dict['TEST'].get('NAME')
+    if (concurrency or writers) and connection.vendor == 'sqlite':
+        # An in-memory database is one shared-cache connection per thread,
+        # which fails concurrent writes outright ("table is locked")
+        connection.settings_dict['TEST']['NAME'] = f'{scratch.name}/benchmark.sqlite3'
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    # Replicas (db_router.py) read the test database too
+    for alias in getattr(settings, 'DATABASE_REPLICAS', ()):
+        connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+    try:
+        with override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+            MEDIA_ROOT=scratch.name,
+            RATE_LIMITS={},
+            DEBUG=False,
+        ):
+            catalogue.invalidate()
+            log(f"Seeding {bookings} bookings ({connection.vendor})")
+            seed_bookings(bookings, log=log)
+
+            admin = get_user_model().objects.create_superuser('bench', 'bench@example.com', 'bench')
+            admin_client = Client()
+            admin_client.force_login(admin)
+
+            results = {}
+            for name, scenario in scenarios(Client(), admin_client):
+                if only and not any(part in name for part in only):
+                    continue
+                results[name] = measure(scenario, iterations)
+                r = results[name]
+                log(f"  {name:<32} p50 {r['p50_ms']:>8.2f} ms  p90 {r['p90_ms']:>8.2f} ms  "
+                    f"{r['queries']:>4} queries  {r['peak_kb']:>8.1f} KB")
+
+            # Before throughput(): its pool and sync_to_async threads keep
+            # their SQLite connections open, and the journal mode can't
+            # change while any connection is
+            writes = {}
+            if writers and connection.vendor == 'sqlite':
+                log(f"SQLite writers ({writers} processes)")
+                writes = sqlite_writes(writers, max(iterations, 10), log=log)
+
+            load = {}
+            if concurrency:
+                log(f"Concurrent bookings ({concurrency} in flight)")
+                load = throughput(concurrency, max(iterations, concurrency * 4), log=log)
+
+            email = {}
+            if emails:
+                log(f"Email delivery ({emails} messages, fake servers)")
+                email = email_throughput(emails, log=log)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        connection.settings_dict['TEST']['NAME'] = test_name
+        scratch.cleanup()
+
+    return {
+        'meta': {
+            'bookings': bookings,
+            'iterations': iterations,
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'deploy_version': getattr(settings, 'DEPLOY_VERSION', 'dev'),
+            'timestamp': timezone.now().isoformat(),
+        },
+        'results': results,
+        'throughput': load,
+        'sqlite_writes': writes,
+        'email': email,
+    }
+
+
+# ------------------------------
+# Comparing
+# ------------------------------
+
+def compare(baseline, current, threshold):
+    """
+    ``[(scenario, metric, before, after, change %, regressed)]`` for the
+    scenarios in both runs. Latency regresses when it grows by more than
+    ``threshold`` percent; query counts regress on any increase.
+    """
+    rows = []
+    for name, after in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        for metric in ('p50_ms', 'p90_ms', 'queries', 'peak_kb'):
+            old, new = before[metric], after[metric]
+            change = (new - old) / old * 100 if old else 0.0
+            if metric == 'queries':
+                regressed = new > old
+            else:
+                regressed = change > threshold
+            rows.append((name, metric, old, new, round(change, 1), regressed))
+    return rows
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save(result, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
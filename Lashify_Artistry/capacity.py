@@ -0,0 +1,126 @@
+"""
+Per-day booking capacity by service category.
+
+Each (category, date) pair has one ``DailyCapacity`` row holding the number
+of slots and how many are taken. Taking a slot is a single conditional
+``UPDATE ... SET booked = booked + 1 WHERE booked < capacity``: the database
+locks the row for the update and re-checks the condition, so concurrent
+bookings on SQLite and Postgres can never push ``booked`` past ``capacity``
+and nobody has to retry. Availability for a month is one range query on the
+(category, date) unique index.
+"""
+from calendar import monthrange
+from datetime import date as date_type, timedelta
+
+from django.conf import settings
+from django.db.models import F
+
+
+class SlotUnavailable(Exception):
+    """No capacity left for the category on that date."""
+
+    def __init__(self, category, date):
+        self.category = category
+        self.date = date
+        super().__init__(f"No {category} slots left on {date}")
+
+
+# ------------------------------
+# Categories
+# ------------------------------
+
+def category_for_service(service):
+    """
+    The catalogue category of ``service``. Codes missing from the catalogue
+    fall back to their suffix: ``'C_lashes'`` -> ``'lashes'``, ``'hair'`` -> ``'hair'``.
+    """
+    from .catalogue import get_service
+
+    known = get_service(service)
+    if known is not None:
+        return known.category
+    return (service or '').rsplit('_', 1)[-1]
+
+
+def default_capacity(category):
+    per_category = getattr(settings, 'BOOKING_DAILY_CAPACITY', {})
+    return per_category.get(category, getattr(settings, 'BOOKING_DEFAULT_DAILY_CAPACITY', 4))
+
+
+# ------------------------------
+# Reserving / releasing
+# ------------------------------
+
+def _take(category, date, overbook):
+    from .models import DailyCapacity
+
+    rows = DailyCapacity.objects.filter(category=category, date=date)
+    if not overbook:
+        rows = rows.filter(booked__lt=F('capacity'))
+    return rows.update(booked=F('booked') + 1)
+
+
+def reserve(service, date, overbook=False):
+    """
+    Take one slot for ``service`` on ``date``; raises ``SlotUnavailable`` when
+    the day is full. ``overbook=True`` (staff only) always succeeds.
+    """
+    from .models import DailyCapacity
+
+    category = category_for_service(service)
+    if _take(category, date, overbook):
+        return
+    # Either the day is full or its row doesn't exist yet; get_or_create
+    # copes with two requests creating the same row at once.
+    DailyCapacity.objects.get_or_create(
+        category=category, date=date, defaults={'capacity': default_capacity(category)},
+    )
+    if not _take(category, date, overbook):
+        raise SlotUnavailable(category, date)
+
+
+def release(service, date):
+    """Give back one slot for ``service`` on ``date``."""
+    from .models import DailyCapacity
+
+    DailyCapacity.objects.filter(
+        category=category_for_service(service), date=date, booked__gt=0
+    ).update(booked=F('booked') - 1)
+
+
+# ------------------------------
+# Availability
+# ------------------------------
+
+def month_bounds(year, month):
+    return date_type(year, month, 1), date_type(year, month, monthrange(year, month)[1])
+
+
+def availability(service, start, end):
+    """
+    ``[{'date', 'capacity', 'booked', 'available'}, ...]`` for every day from
+    ``start`` to ``end`` inclusive. Days without a row have full default capacity.
+    """
+    from .models import DailyCapacity
+
+    category = category_for_service(service)
+    rows = {
+        row['date']: row
+        for row in DailyCapacity.objects.filter(
+            category=category, date__range=(start, end)
+        ).values('date', 'capacity', 'booked')
+    }
+    default = default_capacity(category)
+
+    days = []
+    day = start
+    while day <= end:
+        row = rows.get(day, {'capacity': default, 'booked': 0})
+        days.append({
+            'date': day,
+            'capacity': row['capacity'],
+            'booked': row['booked'],
+            'available': max(row['capacity'] - row['booked'], 0),
+        })
+        day += timedelta(days=1)
+    return days
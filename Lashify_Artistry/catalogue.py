@@ -0,0 +1,87 @@
+"""
+Process-local cache of the ``Service`` catalogue.
+
+Every lookup is a dict hit. The whole catalogue is loaded in one query and
+kept until its version changes. Saving or deleting a ``Service`` writes a
+new token to the single ``CatalogueVersion`` row in the same transaction,
+so every worker process sees the change (a LocMem cache would only tell
+the process that saved). Each process re-reads the token at most every
+CATALOGUE_CHECK_SECONDS, or on every call with ``fresh=True``; booking
+creation uses that, so a new price applies to the very next booking.
+"""
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+_lock = threading.Lock()
+_loaded = {'version': None, 'services': {}, 'current': None, 'checked_at': None}
+
+
+def _read_version():
+    from .models import CatalogueVersion
+
+    token = CatalogueVersion.objects.filter(pk=1).values_list('token', flat=True).first()
+    if token is None:
+        token = CatalogueVersion.objects.get_or_create(pk=1)[0].token
+    return token.hex
+
+
+def version(fresh=False):
+    """Current catalogue version token, re-read from the database when due."""
+    checked_at = _loaded['checked_at']
+    now = time.monotonic()
+    if fresh or checked_at is None or now - checked_at >= getattr(settings, 'CATALOGUE_CHECK_SECONDS', 5):
+        current = _read_version()
+        with _lock:
+            _loaded['current'] = current
+            _loaded['checked_at'] = now
+    return _loaded['current']
+
+
+def invalidate():
+    """Start a new version; every process reloads on its next check."""
+    from .models import CatalogueVersion
+
+    CatalogueVersion.objects.update_or_create(pk=1, defaults={'token': uuid.uuid4()})
+    with _lock:
+        _loaded['checked_at'] = None
+
+
+def services(fresh=False):
+    """``{code: Service}`` for every service, active or not, in display order."""
+    current = version(fresh)
+    if _loaded['version'] != current:
+        from .models import Service
+
+        loaded = {service.code: service for service in Service.objects.all()}
+        with _lock:
+            _loaded['services'] = loaded
+            _loaded['version'] = current
+    return _loaded['services']
+
+
+# ------------------------------
+# Lookups
+# ------------------------------
+
+def get_service(code, active_only=False, fresh=False):
+    service = services(fresh).get(code)
+    if service is None or (active_only and not service.is_active):
+        return None
+    return service
+
+
+def service_name(code):
+    """Display name for ``code``; the code itself if it's not in the catalogue."""
+    service = services().get(code)
+    return service.name if service else code
+
+
+def service_choices(active_only=True):
+    return [
+        (service.code, service.name)
+        for service in services().values()
+        if service.is_active or not active_only
+    ]
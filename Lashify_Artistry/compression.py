@@ -0,0 +1,246 @@
+"""
+HTML minification and gzip/Brotli compression for responses from the views.
+
+WhiteNoise already serves pre-compressed static files; ``CompressionMiddleware``
+handles everything else that is text. HTML is minified first (whitespace
+between text collapsed, comments dropped; tags and the contents of
+``<pre>``, ``<textarea>``, ``<script>`` and ``<style>`` are left exactly as
+they are), then compressed with the best encoding the client accepts:
+Brotli when the ``brotli`` package is installed, otherwise gzip. Streaming
+responses are compressed chunk by chunk. Small responses and responses that
+already have a Content-Encoding (e.g. from the page cache) pass through.
+"""
+import re
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript', 'application/xml',
+    'application/rss+xml', 'image/svg+xml',
+)
+
+# Pads gzip output by a random amount, as Django's GZipMiddleware does (BREACH)
+MAX_RANDOM_BYTES = 100
+
+
+# ------------------------------
+# Minification
+# ------------------------------
+
+_TOKENS = re.compile(
+    r'<!--.*?-->'
+    r'|<(pre|textarea|script|style)\b.*?</\1\s*>'
+    r'|<[^>]*>',
+    re.S | re.I,
+)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def _collapse(match):
+    return '\n' if '\n' in match.group() else ' '
+
+
+def minify_html(html):
+    """
+    Collapse each whitespace run in text to one space (or one newline) and
+    drop comments other than IE conditional ones. Tags and raw-text elements
+    are copied unchanged, so attribute values and preformatted text survive.
+    """
+    parts = []
+    position = 0
+    for match in _TOKENS.finditer(html):
+        parts.append(_WHITESPACE.sub(_collapse, html[position:match.start()]))
+        token = match.group()
+        if not token.startswith('<!--') or token.startswith('<!--[if'):
+            parts.append(token)
+        position = match.end()
+    parts.append(_WHITESPACE.sub(_collapse, html[position:]))
+    return ''.join(parts)
+
+
+# ------------------------------
+# Negotiation
+# ------------------------------
+
+def _accepted(header):
+    """``{coding: q}`` from an Accept-Encoding header."""
+    codings = {}
+    for item in header.split(','):
+        coding, _sep, params = item.strip().partition(';')
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _eq, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding.strip().lower()] = q
+    return codings
+
+
+def choose_encoding(request):
+    """
+    ``'br'``, ``'gzip'`` or ``None`` for this request: the coding with the
+    highest q-value, Brotli on a tie.
+    """
+    codings = _accepted(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    wildcard = codings.get('*', 0.0)
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best = max(offered, key=lambda coding: codings.get(coding, wildcard))  # first wins ties
+    return best if codings.get(best, wildcard) > 0 else None
+
+
+# ------------------------------
+# Compressors
+# ------------------------------
+
+def brotli_compress(data, quality=None):
+    if quality is None:
+        quality = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+    return brotli.compress(data, mode=brotli.MODE_TEXT, quality=quality)
+
+
+def _brotli_sequence(sequence):
+    compressor = brotli.Compressor(
+        mode=brotli.MODE_TEXT, quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+    )
+    for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def _brotli_async_sequence(sequence):
+    compressor = brotli.Compressor(
+        mode=brotli.MODE_TEXT, quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+    )
+    async for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def _gzip_async_sequence(sequence):
+    # Same framing as django.utils.text.compress_sequence, for async iterators
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in sequence:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _compress(data, encoding):
+    if encoding == 'br':
+        return brotli_compress(data)
+    return compress_string(data, max_random_bytes=MAX_RANDOM_BYTES)
+
+
+def _compress_stream(response, encoding):
+    if response.is_async:
+        stream = _brotli_async_sequence if encoding == 'br' else _gzip_async_sequence
+        return stream(response.streaming_content)
+    if encoding == 'br':
+        return _brotli_sequence(response.streaming_content)
+    return compress_sequence(response.streaming_content, max_random_bytes=MAX_RANDOM_BYTES)
+
+
+# ------------------------------
+# Middleware
+# ------------------------------
+
+def _content_type(response):
+    return response.get('Content-Type', '').split(';')[0].strip().lower()
+
+
+def _is_html(response):
+    return _content_type(response) == 'text/html'
+
+
+def _compressible(response):
+    content_type = _content_type(response)
+    return any(content_type.startswith(prefix) for prefix in COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """
+    Minifies HTML and compresses text responses. Sits just inside WhiteNoise,
+    so static files never reach it. Range responses are left alone.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 500)
+        self.minify = getattr(settings, 'COMPRESSION_MINIFY_HTML', True)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process(request, await self.get_response(request))
+
+    def process(self, request, response):
+        if (
+            response.has_header('Content-Encoding')
+            or response.has_header('Content-Range')
+            or 'no-transform' in response.get('Cache-Control', '')
+        ):
+            return response
+
+        if (
+            self.minify and not response.streaming and _is_html(response)
+            and not getattr(response, 'html_minified', False)
+        ):
+            response.content = minify_html(response.content.decode(response.charset)).encode(response.charset)
+            response.html_minified = True
+            if response.has_header('Content-Length'):
+                response['Content-Length'] = str(len(response.content))
+
+        if not _compressible(response):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = _compress_stream(response, encoding)
+            # The compressed size is only known once it has been sent
+            del response['Content-Length']
+        else:
+            compressed = _compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # A strong ETag names the uncompressed bytes (RFC 9110 8.8.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,12 @@
+from django.conf import settings
+
+
+def fragment_cache(request):
+    """
+    Vary-on values for the ``{% cache %}`` fragments in base.html and the
+    pages: a deploy starts fresh fragments.
+    """
+    return {
+        'DEPLOY_VERSION': getattr(settings, 'DEPLOY_VERSION', 'dev'),
+        'FRAGMENT_CACHE_TIMEOUT': getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 60 * 60 * 24),
+    }
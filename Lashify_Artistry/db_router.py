@@ -0,0 +1,183 @@
+"""
+Primary/replica database routing.
+
+Writes always go to ``default``. Reads go to a randomly chosen healthy
+replica from DATABASE_REPLICAS, except in these cases, which read from the
+primary:
+
+- inside a transaction on the primary;
+- during a request that is not GET/HEAD/OPTIONS, or that has written;
+- for REPLICA_PIN_SECONDS after a request that wrote. A cookie carries
+  this, so the page a POST redirects to sees its own write despite
+  replication lag;
+- when no replica passed its last health check.
+
+Every REPLICA_HEALTH_CHECK_SECONDS, each replica runs ``SELECT 1``. On
+Postgres the check also measures replay lag, and a replica more than
+REPLICA_MAX_LAG_SECONDS behind is skipped until it catches up.
+
+To try it locally, copy the SQLite database and point a replica at the copy::
+
+    cp db.sqlite3 /tmp/replica.sqlite3
+    DATABASE_REPLICA_URLS=sqlite:////tmp/replica.sqlite3 python manage.py runserver
+"""
+from contextvars import ContextVar
+import logging
+import random
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = 'use_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+
+class _RequestState:
+    __slots__ = ('primary', 'wrote')
+
+    def __init__(self, primary):
+        self.primary = primary
+        self.wrote = False
+
+
+# Set by ReplicaPinMiddleware for the duration of a request. The object is
+# shared, not copied, by the threads sync_to_async runs the ORM in, so a
+# write in any of them pins the whole request.
+current_request = ContextVar('db_router_request', default=None)
+
+
+# ------------------------------
+# Health
+# ------------------------------
+
+_health = {}  # alias -> (healthy, monotonic time of the check)
+_health_lock = threading.Lock()
+
+
+def _check(alias):
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(_LAG_SQL)
+                lag = float(cursor.fetchone()[0] or 0)
+                if lag > getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 30):
+                    logger.warning("Replica %s is %.1fs behind; reading from the primary", alias, lag)
+                    return False
+            else:
+                cursor.execute('SELECT 1')
+        return True
+    except Exception as e:
+        logger.warning("Replica %s failed its health check: %s", alias, e)
+        connection.close()
+        return False
+
+
+def healthy_replicas():
+    """The replica aliases that passed their last check, re-checking stale ones."""
+    now = time.monotonic()
+    interval = getattr(settings, 'REPLICA_HEALTH_CHECK_SECONDS', 10)
+    healthy = []
+    for alias in getattr(settings, 'DATABASE_REPLICAS', ()):
+        ok, checked_at = _health.get(alias, (False, None))
+        # One thread re-checks; the others use the last result meanwhile
+        if (checked_at is None or now - checked_at >= interval) and _health_lock.acquire(blocking=False):
+            try:
+                ok = _check(alias)
+                _health[alias] = (ok, now)
+            finally:
+                _health_lock.release()
+        if ok:
+            healthy.append(alias)
+    return healthy
+
+
+# ------------------------------
+# Router
+# ------------------------------
+
+class ReplicaRouter:
+    """``DATABASE_ROUTERS`` entry; see the module docstring."""
+
+    def db_for_read(self, model, **hints):
+        state = current_request.get()
+        if (state is not None and state.primary) or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        replicas = healthy_replicas()
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = current_request.get()
+        if state is not None:
+            state.primary = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        return db == DEFAULT_DB_ALIAS
+
+
+# ------------------------------
+# Middleware
+# ------------------------------
+
+class ReplicaPinMiddleware:
+    """
+    Reads from the primary for unsafe requests and for requests carrying
+    the pin cookie. Sets the cookie on responses to requests that wrote.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state, token = self._begin(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        return self._end(request, response, state)
+
+    async def __acall__(self, request):
+        state, token = self._begin(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        return self._end(request, response, state)
+
+    def _begin(self, request):
+        state = _RequestState(primary=request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES)
+        return state, current_request.set(state)
+
+    def _end(self, request, response, state):
+        if state.wrote and self.pin_seconds:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=self.pin_seconds,
+                secure=request.is_secure(), httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,250 @@
+"""
+Email through Brevo's transactional HTTP API.
+
+``BrevoEmailBackend`` posts to ``/v3/smtp/email`` over a keep-alive
+``requests`` session that every backend in the thread shares, so there is
+no SMTP conversation (and TLS handshake) per connection. Messages with the
+same sender, attachments, headers and kind of content (HTML, text or both)
+go out as ``messageVersions`` of one API call, up to EMAIL_API_BATCH_SIZE
+per call.
+
+Messages the API can't express (inline ``cid:`` images, non-HTML
+alternatives), and messages whose call fails for any reason other than a
+400, are sent through EMAIL_API_FALLBACK_BACKEND (SMTP) instead. A 400 for
+a batch is split in halves and retried, so only the messages the API
+rejects on their own get the error.
+"""
+from email.mime.base import MIMEBase
+from email.utils import parseaddr
+import base64
+import json
+import logging
+import threading
+
+import requests
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+# Parts of a payload that messages must share to go out in one call
+_SHARED = ('sender', 'attachment', 'headers')
+_CONTENT = ('htmlContent', 'textContent')
+_RECIPIENTS = ('to', 'cc', 'bcc', 'replyTo')
+
+
+def _session():
+    """This thread's keep-alive session."""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = _local.session = requests.Session()
+        session.headers['accept'] = 'application/json'
+    return session
+
+
+class APIError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+
+
+def send_batch(connection, email_messages):
+    """
+    ``[error or None]`` for each message. Backends with a ``send_batch()``
+    get all of them at once; any other backend gets one message at a time.
+    """
+    if hasattr(connection, 'send_batch'):
+        return connection.send_batch(email_messages)
+    errors = []
+    for message in email_messages:
+        try:
+            connection.send_messages([message])
+        except Exception as e:
+            errors.append(e)
+        else:
+            errors.append(None)
+    return errors
+
+
+# ------------------------------
+# Payloads
+# ------------------------------
+
+def _address(value):
+    name, email = parseaddr(value)
+    return {'email': email, 'name': name} if name else {'email': email}
+
+
+def _content(message):
+    """``{'htmlContent': ..., 'textContent': ...}``, or ``None`` if the API can't carry it."""
+    content = {}
+    if message.content_subtype == 'html':
+        content['htmlContent'] = message.body
+    else:
+        content['textContent'] = message.body
+    for alternative, mimetype in getattr(message, 'alternatives', []):
+        if mimetype != 'text/html' or 'htmlContent' in content:
+            return None
+        content['htmlContent'] = alternative
+    return content
+
+
+def _attachments(message):
+    """Brevo attachment dicts, or ``None`` for MIME parts (inline images need a Content-ID)."""
+    attachments = []
+    for attachment in message.attachments:
+        if isinstance(attachment, MIMEBase):
+            return None
+        filename, content, _mimetype = attachment
+        if isinstance(content, str):
+            content = content.encode()
+        attachments.append({'name': filename, 'content': base64.b64encode(content).decode('ascii')})
+    return attachments
+
+
+def payload(message):
+    """The API request body for ``message``, or ``None`` if it has to go by SMTP."""
+    content = _content(message)
+    attachments = _attachments(message)
+    if content is None or attachments is None:
+        return None
+    body = {
+        'sender': _address(message.from_email or settings.DEFAULT_FROM_EMAIL),
+        'subject': message.subject,
+        **content,
+    }
+    for field, addresses in (('to', message.to), ('cc', message.cc), ('bcc', message.bcc)):
+        if addresses:
+            body[field] = [_address(a) for a in addresses]
+    if message.reply_to:
+        body['replyTo'] = _address(message.reply_to[0])
+    if attachments:
+        body['attachment'] = attachments
+    if message.extra_headers:
+        body['headers'] = {name: str(value) for name, value in message.extra_headers.items()}
+    return body
+
+
+def _batch_key(body):
+    """Payloads with equal keys can go out in one call."""
+    key = {field: body.get(field) for field in _SHARED}
+    # A version inherits any top-level content it doesn't set itself, so a
+    # text-only message batched after an HTML one would get that HTML body
+    key['content'] = [field for field in _CONTENT if field in body]
+    return json.dumps(key, sort_keys=True)
+
+
+def batch_payload(payloads):
+    """
+    One request body sending every payload in ``payloads``. They must have
+    the same ``_batch_key()``.
+    """
+    if len(payloads) == 1:
+        return payloads[0]
+    # Top-level content is the default each version overrides
+    body = {key: value for key, value in payloads[0].items() if key not in _RECIPIENTS}
+    body['messageVersions'] = [
+        {key: value for key, value in p.items() if key not in _SHARED} for p in payloads
+    ]
+    return body
+
+
+# ------------------------------
+# Backend
+# ------------------------------
+
+class BrevoEmailBackend(BaseEmailBackend):
+    """Sends through Brevo's HTTP API; see the module docstring."""
+
+    def __init__(self, fail_silently=False, api_key=None, api_url=None, batch_size=None,
+                 timeout=None, fallback_backend=None, **kwargs):
+        super().__init__(fail_silently=fail_silently)
+        self.api_key = api_key or getattr(settings, 'EMAIL_API_KEY', '')
+        self.api_url = api_url or getattr(settings, 'EMAIL_API_URL', 'https://api.brevo.com/v3/smtp/email')
+        self.batch_size = batch_size or getattr(settings, 'EMAIL_API_BATCH_SIZE', 50)
+        self.timeout = timeout or getattr(settings, 'EMAIL_TIMEOUT', None) or 30
+        self.fallback_backend = fallback_backend or getattr(settings, 'EMAIL_API_FALLBACK_BACKEND', None)
+        self.fallback_kwargs = kwargs
+        self.fallback = None
+
+    def close(self):
+        # The HTTP session stays open for the next backend in this thread
+        if self.fallback is not None:
+            self.fallback.close()
+            self.fallback = None
+
+    def send_messages(self, email_messages):
+        if not email_messages:
+            return 0
+        errors = self.send_batch(email_messages)
+        failures = [error for error in errors if error is not None]
+        if failures and not self.fail_silently:
+            raise failures[0]
+        return len(errors) - len(failures)
+
+    def send_batch(self, email_messages):
+        """``[error or None]`` for each message, in order."""
+        errors = [None] * len(email_messages)
+        by_smtp = []
+        groups = {}
+        for index, message in enumerate(email_messages):
+            if not message.recipients():
+                continue
+            body = payload(message)
+            if body is None:
+                by_smtp.append(index)
+                continue
+            groups.setdefault(_batch_key(body), []).append((index, body))
+
+        for group in groups.values():
+            for start in range(0, len(group), self.batch_size):
+                self._send_chunk(group[start:start + self.batch_size], errors, by_smtp)
+
+        for index in sorted(by_smtp):
+            errors[index] = self._send_fallback(email_messages[index])
+        return errors
+
+    def _send_chunk(self, chunk, errors, by_smtp):
+        """Post ``[(index, body)]`` as one call, recording errors by index."""
+        try:
+            self._post(batch_payload([body for _index, body in chunk]))
+        except (requests.RequestException, APIError) as e:
+            status = getattr(e, 'status', None)
+            if status == 400 and len(chunk) > 1:
+                # One bad message rejects the whole call: halve until it's isolated
+                middle = len(chunk) // 2
+                self._send_chunk(chunk[:middle], errors, by_smtp)
+                self._send_chunk(chunk[middle:], errors, by_smtp)
+            elif self.fallback_backend and status != 400:
+                logger.warning("Email API failed (%s); sending %s messages by SMTP", e, len(chunk))
+                by_smtp.extend(index for index, _body in chunk)
+            else:
+                for index, _body in chunk:
+                    errors[index] = e
+
+    def _post(self, body):
+        response = _session().post(
+            self.api_url, json=body, headers={'api-key': self.api_key}, timeout=self.timeout,
+        )
+        if response.status_code >= 300:
+            try:
+                detail = response.json().get('message', response.text)
+            except ValueError:
+                detail = response.text
+            raise APIError(response.status_code, detail[:500])
+        return response
+
+    def _send_fallback(self, message):
+        if not self.fallback_backend:
+            return ValueError("Message needs SMTP (inline images) and EMAIL_API_FALLBACK_BACKEND is not set")
+        try:
+            if self.fallback is None:
+                self.fallback = get_connection(self.fallback_backend, fail_silently=False, **self.fallback_kwargs)
+                self.fallback.open()
+            self.fallback.send_messages([message])
+        except Exception as e:
+            return e
+        return None
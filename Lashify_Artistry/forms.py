@@ -1,8 +1,30 @@
 # forms.py
 from django import forms
 from .models import Booking
+from .uploads import normalize_image
+from .catalogue import service_choices
 
 class BookingForm(forms.ModelForm):
     class Meta:
         model = Booking
         fields = '__all__'  # or list fields manually if needed
+
+
+class BookingAdminForm(forms.ModelForm):
+    """Admin form that rejects verification slips the upload pipeline can't process."""
+
+    # Inactive services too, so older bookings stay editable
+    service = forms.ChoiceField(choices=lambda: service_choices(active_only=False))
+
+    # The normalized copy of a new slip, for save_model() to store as is
+    normalized_slip = None
+
+    class Meta:
+        model = Booking
+        fields = '__all__'
+
+    def clean_verification_slip(self):
+        slip = self.cleaned_data.get('verification_slip')
+        if slip and 'verification_slip' in self.changed_data:
+            self.normalized_slip = normalize_image(slip)  # raises ValidationError
+        return slip
@@ -0,0 +1,172 @@
+"""
+Idempotent POST handling.
+
+``idempotent`` remembers the response to a POST under an idempotency key and
+replays it when the same request arrives again (double-clicked submit,
+browser retry), without running the view, so no second booking, upload or
+email is created.
+
+The key is the form's ``idempotency_key`` field (a random UUID set by the
+page's JavaScript) or, when that is missing, a hash of the posted fields and
+uploaded file contents. Responses are kept in the ``IDEMPOTENCY_CACHE_ALIAS``
+cache for ``IDEMPOTENCY_TTL`` seconds; a short lock entry makes a duplicate
+that arrives while the first request is still running wait for its result.
+A retry can reach a different worker, so that cache must be shared between
+them: the project's is a database cache, whose ``add()`` is atomic.
+Async views get an async wrapper that waits without blocking the event loop.
+"""
+from functools import wraps
+import asyncio
+import hashlib
+import re
+import time
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+KEY_FIELD = 'idempotency_key'
+_VALID_KEY = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+_POLL_SECONDS = 0.1
+
+
+def request_key(request):
+    """The client's idempotency key, or a hash of the request payload."""
+    supplied = request.POST.get(KEY_FIELD, '')
+    if _VALID_KEY.match(supplied):
+        return f"{request.path}:{supplied}"
+
+    digest = hashlib.sha256(request.path.encode())
+    for name in sorted(request.POST):
+        if name in (KEY_FIELD, 'csrfmiddlewaretoken'):
+            continue
+        for value in request.POST.getlist(name):
+            digest.update(f"\0{name}={value.strip()}".encode())
+    for name in sorted(request.FILES):
+        for upload in request.FILES.getlist(name):
+            digest.update(f"\0{name}:{upload.size}:".encode())
+            for chunk in upload.chunks():
+                digest.update(chunk)
+            upload.seek(0)
+    return f"{request.path}:payload:{digest.hexdigest()}"
+
+
+def _replay(stored):
+    response = HttpResponse(stored['content'], status=stored['status'], content_type=stored['content_type'])
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _wait_for_result(cache, key, lock_key):
+    """Poll until the in-flight request stores its response or gives up."""
+    deadline = time.monotonic() + getattr(settings, 'IDEMPOTENCY_WAIT_SECONDS', 15)
+    while time.monotonic() < deadline:
+        time.sleep(_POLL_SECONDS)
+        stored = cache.get(key)
+        if stored is not None:
+            return stored
+        if cache.get(lock_key) is None:
+            return None
+    return None
+
+
+async def _await_result(cache, key, lock_key):
+    """``_wait_for_result`` for async views."""
+    deadline = time.monotonic() + getattr(settings, 'IDEMPOTENCY_WAIT_SECONDS', 15)
+    while time.monotonic() < deadline:
+        await asyncio.sleep(_POLL_SECONDS)
+        stored = await cache.aget(key)
+        if stored is not None:
+            return stored
+        if await cache.aget(lock_key) is None:
+            return None
+    return None
+
+
+def _in_progress():
+    return HttpResponse(
+        "This request is already being processed. Please wait a moment and refresh.",
+        status=409,
+    )
+
+
+def _stored(response):
+    """What to keep for replaying ``response``, or None."""
+    # Only successes are replayed; after an error the same form can be fixed and resent
+    if 200 <= response.status_code < 300 and not response.streaming:
+        return {
+            'status': response.status_code,
+            'content': response.content,
+            'content_type': response['Content-Type'],
+        }
+    return None
+
+
+def idempotent(view):
+    """Replay successful (2xx) POST responses for repeated idempotency keys."""
+    if iscoroutinefunction(view):
+        return _async_idempotent(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'POST':
+            return view(request, *args, **kwargs)
+
+        cache = caches[getattr(settings, 'IDEMPOTENCY_CACHE_ALIAS', 'default')]
+        key = f"idempotency:{request_key(request)}"
+        lock_key = f"{key}:lock"
+
+        stored = cache.get(key)
+        if stored is not None:
+            return _replay(stored)
+
+        if not cache.add(lock_key, 1, getattr(settings, 'IDEMPOTENCY_LOCK_SECONDS', 60)):
+            stored = _wait_for_result(cache, key, lock_key)
+            if stored is not None:
+                return _replay(stored)
+            return _in_progress()
+
+        try:
+            response = view(request, *args, **kwargs)
+            stored = _stored(response)
+            if stored is not None:
+                cache.set(key, stored, getattr(settings, 'IDEMPOTENCY_TTL', 60 * 60 * 24))
+            return response
+        finally:
+            cache.delete(lock_key)
+
+    return wrapper
+
+
+def _async_idempotent(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'POST':
+            return await view(request, *args, **kwargs)
+
+        cache = caches[getattr(settings, 'IDEMPOTENCY_CACHE_ALIAS', 'default')]
+        # Parses the body and hashes uploads: not on the event loop
+        key = f"idempotency:{await sync_to_async(request_key, thread_sensitive=False)(request)}"
+        lock_key = f"{key}:lock"
+
+        stored = await cache.aget(key)
+        if stored is not None:
+            return _replay(stored)
+
+        if not await cache.aadd(lock_key, 1, getattr(settings, 'IDEMPOTENCY_LOCK_SECONDS', 60)):
+            stored = await _await_result(cache, key, lock_key)
+            if stored is not None:
+                return _replay(stored)
+            return _in_progress()
+
+        try:
+            response = await view(request, *args, **kwargs)
+            stored = _stored(response)
+            if stored is not None:
+                await cache.aset(key, stored, getattr(settings, 'IDEMPOTENCY_TTL', 60 * 60 * 24))
+            return response
+        finally:
+            await cache.adelete(lock_key)
+
+    return wrapper
@@ -0,0 +1,25 @@
+"""
+Signed links that let customers reach their own data without an account.
+"""
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+
+MY_BOOKINGS_SALT = 'lashify.my-bookings'
+
+
+def make_my_bookings_token(email):
+    return signing.dumps(email, salt=MY_BOOKINGS_SALT, compress=True)
+
+
+def read_my_bookings_token(token):
+    """Return the email inside ``token``, or ``None`` if it is invalid or expired."""
+    max_age = getattr(settings, 'MY_BOOKINGS_LINK_MAX_AGE', 60 * 60 * 24 * 30)
+    try:
+        return signing.loads(token, salt=MY_BOOKINGS_SALT, max_age=max_age)
+    except signing.BadSignature:
+        return None
+
+
+def my_bookings_url(email):
+    return reverse('customer_bookings', args=[make_my_bookings_token(email)])
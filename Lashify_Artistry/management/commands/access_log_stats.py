@@ -0,0 +1,85 @@
+from collections import defaultdict
+from pathlib import Path
+import gzip
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _percentile(ordered, pct):
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _default_files():
+    """The current access logs and their rotated (gzipped) siblings."""
+    path = Path(str(getattr(settings, 'ACCESS_LOG_PATH', '') or 'logs/access-{worker}.jsonl'))
+    stem = path.name.replace('{worker}', '*').split('.')[0]
+    return sorted(path.parent.glob(f"{stem.rstrip('*')}*"))
+
+
+def _read(path):
+    opener = gzip.open if path.suffix == '.gz' else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+class Command(BaseCommand):
+    help = "Summarize the JSON access log: requests, errors and p50/p95/p99 latency per route."
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='*', help="Log files (.jsonl or .jsonl.N.gz). Default: ACCESS_LOG_PATH and its rotations.")
+        parser.add_argument('--since', help="Only records at or after this ISO timestamp.")
+        parser.add_argument('--sort', choices=['count', 'p95', 'p99', 'errors'], default='count')
+        parser.add_argument('--json', action='store_true', help="Print the summary as JSON.")
+
+    def handle(self, *args, **options):
+        files = [Path(f) for f in options['files']] or _default_files()
+        if not files:
+            raise CommandError("No access log files found.")
+
+        durations = defaultdict(list)
+        errors = defaultdict(int)
+        sent = defaultdict(int)
+        for path in files:
+            for record in _read(path):
+                if options['since'] and record.get('ts', '') < options['since']:
+                    continue
+                route = f"{record.get('method', '?')} {record.get('route', '?')}"
+                durations[route].append(record.get('duration_ms', 0))
+                sent[route] += record.get('bytes') or 0
+                if record.get('status', 0) >= 500:
+                    errors[route] += 1
+
+        summary = []
+        for route, values in durations.items():
+            values.sort()
+            summary.append({
+                'route': route,
+                'count': len(values),
+                'errors': errors[route],
+                'p50': _percentile(values, 50),
+                'p95': _percentile(values, 95),
+                'p99': _percentile(values, 99),
+                'avg_kb': round(sent[route] / len(values) / 1024, 1),
+            })
+        summary.sort(key=lambda row: row[options['sort']], reverse=True)
+
+        if options['json']:
+            self.stdout.write(json.dumps(summary, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'route':<50} {'count':>7} {'5xx':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'avg KB':>8}"
+        )
+        for row in summary:
+            self.stdout.write(
+                f"{row['route']:<50} {row['count']:>7} {row['errors']:>5} "
+                f"{row['p50']:>9.2f} {row['p95']:>9.2f} {row['p99']:>9.2f} {row['avg_kb']:>8.1f}"
+            )
+        self.stdout.write(f"\n📄 {sum(r['count'] for r in summary)} requests from {len(files)} file(s)")
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Lashify_Artistry import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the booking, confirmation, admin and static page flows on a "
+        "seeded test database and write the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=1000,
+                            help="Bookings to seed (e.g. 1000, 10000, 100000).")
+        parser.add_argument('--iterations', type=int, default=50, help="Requests per scenario.")
+        parser.add_argument('--only', action='append', default=[],
+                            help="Only run scenarios whose name contains this (repeatable).")
+        parser.add_argument('--concurrency', type=int, default=0,
+                            help="Also post this many bookings at once through the WSGI and ASGI handlers.")
+        parser.add_argument('--writers', type=int, default=0,
+                            help="Also post bookings from this many processes at once (SQLite only).")
+        parser.add_argument('--emails', type=int, default=0,
+                            help="Also send this many emails through SMTP and the HTTP API to fake servers.")
+        parser.add_argument('--output', default='benchmark-results.json', help="Where to write the results.")
+        parser.add_argument('--compare', metavar='BASELINE',
+                            help="Compare against an earlier results file; exits non-zero on regressions.")
+        parser.add_argument('--threshold', type=float, default=20.0,
+                            help="Allowed latency/memory increase in percent for --compare.")
+
+    def handle(self, *args, **options):
+        baseline = benchmarks.load(options['compare']) if options['compare'] else None
+
+        result = benchmarks.run(
+            options['bookings'], options['iterations'], only=options['only'],
+            concurrency=options['concurrency'], emails=options['emails'],
+            writers=options['writers'], log=self.stdout.write,
+        )
+        benchmarks.save(result, options['output'])
+        self.stdout.write(self.style.SUCCESS(f"📊 Results written to {options['output']}"))
+
+        if baseline is None:
+            return
+
+        if baseline['meta']['bookings'] != result['meta']['bookings']:
+            self.stderr.write(
+                f"Baseline was seeded with {baseline['meta']['bookings']} bookings, "
+                f"this run with {result['meta']['bookings']}."
+            )
+
+        regressions = 0
+        self.stdout.write(f"\n{'scenario':<32} {'metric':<8} {'before':>10} {'after':>10} {'change':>8}")
+        for name, metric, before, after, change, regressed in benchmarks.compare(
+            baseline, result, options['threshold']
+        ):
+            line = f"{name:<32} {metric:<8} {before:>10} {after:>10} {change:>+7.1f}%"
+            if regressed:
+                regressions += 1
+                line = self.style.ERROR(line + "  ⚠️")
+            self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(f"{regressions} metric(s) regressed beyond the threshold.")
+        self.stdout.write(self.style.SUCCESS("No regressions."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from Lashify_Artistry.responsive_images import available_formats, build
+
+
+class Command(BaseCommand):
+    help = "Generate resized AVIF/WebP/JPEG variants of the static gallery images."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=None,
+                            help="Worker processes (default: one per CPU).")
+        parser.add_argument('--force', action='store_true',
+                            help="Re-encode every image, ignoring the existing manifest.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"🖼️  Building responsive images ({', '.join(available_formats())})")
+        log = self.stdout.write if options['verbosity'] > 1 else (lambda message: None)
+        built, skipped = build(jobs=options['jobs'], force=options['force'], log=log)
+        self.stdout.write(self.style.SUCCESS(f"{built} images built, {skipped} unchanged."))
@@ -0,0 +1,19 @@
+from django.contrib.staticfiles.management.commands.collectstatic import Command as CollectStaticCommand
+
+from Lashify_Artistry.responsive_images import build
+
+
+class Command(CollectStaticCommand):
+    """collectstatic that first builds the responsive image variants."""
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--skip-responsive-images', action='store_true',
+                            help="Do not build responsive image variants first.")
+
+    def handle(self, **options):
+        if not options['skip_responsive_images'] and not options['dry_run']:
+            built, skipped = build(log=lambda message: None)
+            if options['verbosity'] >= 1:
+                self.stdout.write(f"Responsive images: {built} built, {skipped} unchanged.")
+        return super().handle(**options)
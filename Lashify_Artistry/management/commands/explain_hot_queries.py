@@ -0,0 +1,59 @@
+import uuid
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from Lashify_Artistry.models import Booking, OutboundEmail
+
+
+def hot_queries():
+    """The queries that run on every request of a busy page, by name."""
+    today = date.today()
+    return [
+        ("confirmation link (send_customer_confirmation)",
+         Booking.objects.filter(confirmation_token=uuid.uuid4())),
+        ("reference lookup (my_bookings form)",
+         Booking.objects.filter(email__iexact='someone@example.com', reference='X' * 16)),
+        ("customer bookings page (customer_bookings)",
+         Booking.objects.filter(email='someone@example.com').order_by('-date', '-id')[:21]),
+        ("customer bookings next page (keyset cursor)",
+         Booking.objects.filter(email='someone@example.com', date__lt=today).order_by('-date', '-id')[:21]),
+        ("admin changelist (Meta.ordering)",
+         Booking.objects.order_by('-created_at')[:100]),
+        ("admin filter: service + date",
+         Booking.objects.filter(date=today, service='C_lashes')),
+        ("admin filter: payment state + date range",
+         Booking.objects.filter(paid=True, payment_verified=False,
+                                date__range=(today, today + timedelta(days=30))).order_by('-created_at')),
+        ("outbox due messages (send_queued_mail)",
+         OutboundEmail.objects.filter(status=OutboundEmail.STATUS_PENDING,
+                                      next_attempt_at__lte=timezone.now()).order_by('next_attempt_at', 'pk')[:50]),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Print the EXPLAIN plan of each hot booking query, to spot missing indexes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true',
+                            help="Run EXPLAIN ANALYZE (PostgreSQL only; executes the queries).")
+        parser.add_argument('--sql', action='store_true', help="Also print the SQL of each query.")
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        explain_options = {}
+        if options['analyze']:
+            if vendor == 'postgresql':
+                explain_options = {'analyze': True, 'buffers': True}
+            else:
+                self.stderr.write(f"--analyze is not supported on {vendor}; showing plans only.")
+
+        self.stdout.write(f"Database: {vendor}\n")
+        for name, queryset in hot_queries():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"== {name}"))
+            if options['sql']:
+                self.stdout.write(str(queryset.query))
+            self.stdout.write(queryset.explain(**explain_options))
+            self.stdout.write("")
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from Lashify_Artistry.models import Booking
+from Lashify_Artistry.thumbnails import RENDITIONS, generate_renditions
+
+
+class Command(BaseCommand):
+    help = "Generate missing thumbnail/preview renditions for existing booking images."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Regenerate renditions that already exist.")
+
+    def handle(self, *args, **options):
+        images = generated = failed = 0
+        bookings = (
+            # __gt='' skips both NULL and '' (no image)
+            Booking.objects.filter(Q(payment_proof__gt='') | Q(verification_slip__gt=''))
+            .only('pk', 'payment_proof', 'verification_slip')
+            .order_by('pk')
+        )
+        for booking in bookings.iterator(chunk_size=500):
+            for fieldfile in (booking.payment_proof, booking.verification_slip):
+                if not fieldfile:
+                    continue
+                images += 1
+                made = generate_renditions(fieldfile, force=options['force'])
+                generated += made
+                failed += len(RENDITIONS) - made
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{images} images checked, {generated} renditions ready, {failed} failed."
+        ))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Lashify_Artistry.outbox import send_pending
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails from the outbox. Runs until interrupted unless --once is given."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Messages per batch (default: EMAIL_OUTBOX_BATCH_SIZE).")
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help="Seconds to sleep when the outbox is empty.")
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the due messages once and exit.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        try:
+            while True:
+                sent, failed = send_pending(batch_size=batch_size)
+                if sent or failed:
+                    self.stdout.write(f"📨 Sent {sent}, failed {failed}")
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping outbox worker.")
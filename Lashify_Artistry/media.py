@@ -0,0 +1,219 @@
+"""
+Protected media: payment proofs, verification slips and their renditions.
+
+Nothing under MEDIA_ROOT is public. ``/media/<name>`` is served to staff,
+or to anyone holding a URL from ``signed_media_url()``. The admin uses
+signed URLs, so a changelist full of thumbnails needs no session or user
+lookup per image. A signature stays the same for a MEDIA_URL_MAX_AGE
+window and expires one to two windows after it is made, so browsers can
+cache the images.
+
+MEDIA_SERVE_MODE picks who sends the bytes:
+
+- ``django`` (default): streamed from storage, with ETag, Last-Modified,
+  If-None-Match and single-range ``Range`` requests (206). Under WSGI a
+  whole file goes to the server's ``wsgi.file_wrapper`` (sendfile under
+  gunicorn). Under ASGI it is read in chunks without holding a thread.
+- ``x-accel``: an empty response with ``X-Accel-Redirect`` to
+  MEDIA_ACCEL_PREFIX + name. An nginx ``internal`` location aliasing
+  MEDIA_ROOT then serves the file and handles ranges and conditional
+  requests itself.
+- ``x-sendfile``: ``X-Sendfile`` with the file's absolute path (Apache
+  mod_xsendfile, lighttpd).
+"""
+from urllib.parse import quote, urlencode
+import mimetypes
+import posixpath
+import re
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.crypto import constant_time_compare
+from django.utils.http import content_disposition_header, http_date
+
+MEDIA_SALT = 'lashify.media'
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _max_age():
+    return getattr(settings, 'MEDIA_URL_MAX_AGE', 60 * 60)
+
+
+# ------------------------------
+# Signed URLs
+# ------------------------------
+
+def _signature(name, expires):
+    return signing.Signer(salt=MEDIA_SALT).signature(f'{name}:{expires}')
+
+
+def signed_media_url(name):
+    """A URL for storage name ``name`` that works without logging in, for a while."""
+    window = _max_age()
+    expires = (int(time.time()) // window + 2) * window
+    return f"{default_storage.url(name)}?{urlencode({'expires': expires, 'sig': _signature(name, expires)})}"
+
+
+def has_valid_signature(request, name):
+    try:
+        expires = int(request.GET.get('expires', ''))
+    except ValueError:
+        return False
+    return expires >= time.time() and constant_time_compare(
+        _signature(name, expires), request.GET.get('sig', '')
+    )
+
+
+def can_view(request, name):
+    # The signature first: it needs no session or user lookup
+    return has_valid_signature(request, name) or (request.user.is_active and request.user.is_staff)
+
+
+# ------------------------------
+# Ranges
+# ------------------------------
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def byte_range(request, size, etag, last_modified):
+    """
+    ``(first, last)`` byte positions asked for by a single-range ``Range``
+    header, or ``None`` to send the whole file: there is no header, it asks
+    for several ranges, or ``If-Range`` names another version.
+    """
+    header = request.META.get('HTTP_RANGE', '')
+    match = _RANGE.match(header.strip())
+    if not match:
+        return None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range not in (etag, http_date(last_modified)):
+        return None
+
+    first, last = match.groups()
+    if not first:
+        if not last or int(last) == 0:
+            raise RangeNotSatisfiable
+        return max(size - int(last), 0), size - 1
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size or first > last:
+        raise RangeNotSatisfiable
+    return first, last
+
+
+# ------------------------------
+# Serving
+# ------------------------------
+
+class _FileRange:
+    """``length`` bytes of ``file`` from its current position, for FileResponse."""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+async def _aread(file, length, block_size):
+    # ASGI collects a sync iterator into one list before sending it
+    read = sync_to_async(file.read, thread_sensitive=False)
+    try:
+        while length > 0:
+            data = await read(min(block_size, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+    finally:
+        await sync_to_async(file.close, thread_sensitive=False)()
+
+
+def _content_type(name):
+    content_type, encoding = mimetypes.guess_type(name)
+    return content_type if content_type and not encoding else 'application/octet-stream'
+
+
+def _file_response(request, name, first, length, size, status):
+    file = default_storage.open(name, 'rb')
+    if first:
+        file.seek(first)
+    if isinstance(request, ASGIRequest):
+        content = _aread(file, length, FileResponse.block_size)
+    elif length < size:
+        content = _FileRange(file, length)
+    else:
+        content = file
+    response = FileResponse(content, status=status, content_type=_content_type(name))
+    response['Content-Length'] = str(length)
+    response['Content-Disposition'] = content_disposition_header(False, posixpath.basename(name))
+    return response
+
+
+def _stream(request, name):
+    try:
+        size = default_storage.size(name)
+        last_modified = int(default_storage.get_modified_time(name).timestamp())
+    except (OSError, SuspiciousFileOperation):
+        raise Http404("No such file.")
+    etag = f'"{last_modified:x}-{size:x}"'
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        try:
+            requested = byte_range(request, size, etag, last_modified)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+        else:
+            if requested is None:
+                response = _file_response(request, name, 0, size, size, status=200)
+            else:
+                first, last = requested
+                response = _file_response(request, name, first, last - first + 1, size, status=206)
+                response['Content-Range'] = f'bytes {first}-{last}/{size}'
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def serve(request, name):
+    """The response for media file ``name``; the caller has checked access."""
+    # Normalised names only, so a proxy is never sent outside MEDIA_ROOT
+    if posixpath.normpath(name) != name or name.startswith('/') or name.split('/')[0] == '..':
+        raise Http404("No such file.")
+    mode = getattr(settings, 'MEDIA_SERVE_MODE', 'django')
+    if mode == 'x-accel':
+        response = HttpResponse(content_type=_content_type(name))
+        response['X-Accel-Redirect'] = getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/') + quote(name)
+    elif mode == 'x-sendfile':
+        try:
+            path = default_storage.path(name)
+        except SuspiciousFileOperation:
+            raise Http404("No such file.")
+        response = HttpResponse(content_type=_content_type(name))
+        response['X-Sendfile'] = path
+    else:
+        response = _stream(request, name)
+    patch_cache_control(response, private=True, max_age=_max_age())
+    return response
@@ -0,0 +1,329 @@
+"""
+Request, SQL, template and email metrics in Prometheus text format.
+
+* ``MetricsMiddleware`` times each request and, through a database
+  ``execute_wrapper`` installed on every connection, counts its queries and
+  their time. The request's timer is found through a ContextVar, so queries
+  run from ``sync_to_async`` threads under ASGI are counted too. Everything is
+  labelled with the URL name (``view``), never the raw path, so the number
+  of series stays small.
+* ``InstrumentedDjangoTemplates`` (a TEMPLATES backend) times each
+  top-level template render.
+* ``InstrumentedEmailBackend`` wraps ``METRICS_EMAIL_BACKEND`` and records
+  send counts, failures and latency.
+
+``render()`` produces the text served at ``/metrics/``. Values live in the
+process that recorded them; each gunicorn worker reports its own, tagged
+with a ``pid`` label.
+"""
+from bisect import bisect_left
+from contextvars import ContextVar
+import os
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+_PID = str(os.getpid())
+
+
+def _update_pid():
+    global _PID
+    _PID = str(os.getpid())
+
+
+if hasattr(os, 'register_at_fork'):
+    # gunicorn --preload imports this module before forking workers
+    os.register_at_fork(after_in_child=_update_pid)
+
+
+# ------------------------------
+# Registry
+# ------------------------------
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}'
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name, self.help, self.label_names = name, help_text, ('pid',) + tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        key = (_PID,) + labels
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_labels(self.label_names, key)} {value}"
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.label_names = name, help_text, ('pid',) + tuple(labels)
+        self.buckets = tuple(buckets)
+        # key -> [per-bucket counts..., +Inf count, sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        key = (_PID,) + labels
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 2)
+            row[index] += 1
+            row[-1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [(key, list(row)) for key, row in self._values.items()]
+        for key, row in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), row[:-1]):
+                cumulative += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, key)} {row[-1]}"
+            yield f"{self.name}_count{_labels(self.label_names, key)} {cumulative}"
+
+
+REQUEST_DURATION = Histogram(
+    'lashify_request_duration_seconds', "Request duration by URL name.", ('view', 'method', 'status'))
+REQUEST_QUERIES = Histogram(
+    'lashify_request_db_queries', "Database queries per request.", ('view',), buckets=QUERY_COUNT_BUCKETS)
+DB_QUERY_SECONDS = Counter(
+    'lashify_db_query_seconds_total', "Time spent in database queries.", ('view',))
+DB_QUERY_ERRORS = Counter(
+    'lashify_db_query_errors_total', "Database queries that raised.", ('view',))
+TEMPLATE_RENDER = Histogram(
+    'lashify_template_render_seconds', "Top-level template render time.", ('view', 'template'))
+EMAIL_SEND = Histogram(
+    'lashify_email_send_seconds', "Time per send_messages() call to the email backend.", ('view',))
+EMAILS_SENT = Counter(
+    'lashify_emails_sent_total', "Messages accepted by the email backend.", ('view',))
+EMAIL_FAILURES = Counter(
+    'lashify_email_send_failures_total', "send_messages() calls that raised.", ('view', 'error'))
+
+METRICS = (
+    REQUEST_DURATION, REQUEST_QUERIES, DB_QUERY_SECONDS, DB_QUERY_ERRORS,
+    TEMPLATE_RENDER, EMAIL_SEND, EMAILS_SENT, EMAIL_FAILURES,
+)
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+# ------------------------------
+# Request context
+# ------------------------------
+
+# URL name of the request being handled; 'background' outside requests
+# (e.g. the send_queued_mail worker)
+current_view = ContextVar('lashify_metrics_view', default='background')
+# Query timer of the request being handled
+current_timer = ContextVar('lashify_metrics_timer', default=None)
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unmatched>'
+    return match.view_name or '<unnamed>'
+
+
+class _QueryTimer:
+    """Queries and their time for one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.errors = 0
+
+
+def _timed_execute(execute, sql, params, many, context):
+    timer = current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    except Exception:
+        timer.errors += 1
+        raise
+    finally:
+        timer.count += 1
+        timer.seconds += time.perf_counter() - start
+
+
+def _install_timer(sender, connection, **kwargs):
+    if _timed_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_timed_execute)
+
+
+connection_created.connect(_install_timer, dispatch_uid='lashify_metrics_timer')
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer, tokens, start = self._begin(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self._end(tokens)
+        return self._record(request, response, timer, start)
+
+    async def __acall__(self, request):
+        timer, tokens, start = self._begin(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self._end(tokens)
+        return self._record(request, response, timer, start)
+
+    def _begin(self, request):
+        timer = request.query_timer = _QueryTimer()  # also read by AccessLogMiddleware
+        tokens = (current_view.set('<unmatched>'), current_timer.set(timer))
+        return timer, tokens, time.perf_counter()
+
+    def _end(self, tokens):
+        view_token, timer_token = tokens
+        current_view.reset(view_token)
+        current_timer.reset(timer_token)
+
+    def _record(self, request, response, timer, start):
+        view = _view_name(request)
+        REQUEST_DURATION.observe(
+            time.perf_counter() - start, view, request.method, f"{response.status_code // 100}xx"
+        )
+        REQUEST_QUERIES.observe(timer.count, view)
+        if timer.seconds:
+            DB_QUERY_SECONDS.inc(view, amount=timer.seconds)
+        if timer.errors:
+            DB_QUERY_ERRORS.inc(view, amount=timer.errors)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # URL resolution has happened; label templates and emails from here on
+        current_view.set(_view_name(request))
+
+
+# ------------------------------
+# Templates
+# ------------------------------
+
+class _TimedTemplate:
+    def __init__(self, template, name):
+        self.template = template
+        self.name = name
+
+    @property
+    def origin(self):
+        return self.template.origin
+
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            TEMPLATE_RENDER.observe(time.perf_counter() - start, current_view.get(), self.name)
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timing each ``render()``."""
+
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code), '<string>')
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name), template_name)
+
+
+# ------------------------------
+# Email
+# ------------------------------
+
+class InstrumentedEmailBackend(BaseEmailBackend):
+    """Wraps ``METRICS_EMAIL_BACKEND`` and records each send."""
+
+    def __init__(self, fail_silently=False, **kwargs):
+        super().__init__(fail_silently=fail_silently)
+        self.backend = get_connection(
+            getattr(settings, 'METRICS_EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend'),
+            fail_silently=fail_silently, **kwargs,
+        )
+
+    def open(self):
+        return self.backend.open()
+
+    def close(self):
+        return self.backend.close()
+
+    def send_messages(self, email_messages):
+        view = current_view.get()
+        start = time.perf_counter()
+        try:
+            sent = self.backend.send_messages(email_messages)
+        except Exception as e:
+            EMAIL_FAILURES.inc(view, type(e).__name__)
+            raise
+        finally:
+            EMAIL_SEND.observe(time.perf_counter() - start, view)
+        EMAILS_SENT.inc(view, amount=sent or 0)
+        return sent
+
+    def send_batch(self, email_messages):
+        """``[error or None]`` per message; one call when the wrapped backend batches."""
+        from .email_backends import send_batch
+
+        view = current_view.get()
+        start = time.perf_counter()
+        try:
+            errors = send_batch(self.backend, email_messages)
+        finally:
+            EMAIL_SEND.observe(time.perf_counter() - start, view)
+        for error in errors:
+            if error is not None:
+                EMAIL_FAILURES.inc(view, type(error).__name__)
+        EMAILS_SENT.inc(view, amount=errors.count(None))
+        return errors
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Lashify_Artistry', '0011_outboundemail_origin'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['email', '-date', '-id'], name='booking_email_date_idx'),
+        ),
+    ]
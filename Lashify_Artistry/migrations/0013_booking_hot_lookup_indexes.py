@@ -0,0 +1,50 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:41
+
+import uuid
+from django.db import migrations, models
+
+
+def reissue_duplicate_tokens(apps, schema_editor):
+    """
+    0006 gave every pre-existing booking the same default token. Keep the
+    oldest booking's token and give the others fresh ones so the unique
+    index can be built (their old links already failed with
+    MultipleObjectsReturned).
+    """
+    Booking = apps.get_model('Lashify_Artistry', 'Booking')
+    seen = set()
+    for booking in Booking.objects.order_by('pk').only('pk', 'confirmation_token'):
+        token = booking.confirmation_token
+        if token is None or token not in seen:
+            seen.add(token)
+            continue
+        booking.confirmation_token = uuid.uuid4()
+        booking.save(update_fields=['confirmation_token'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Lashify_Artistry', '0012_booking_email_date_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(reissue_duplicate_tokens, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='booking',
+            name='confirmation_token',
+            field=models.UUIDField(blank=True, default=uuid.uuid4, editable=False, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['date', 'service'], name='booking_date_service_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['paid', 'payment_verified', 'date'], name='booking_payment_state_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['created_at'], name='booking_created_at_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Lashify_Artistry', '0013_booking_hot_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='payment_proof_original',
+            field=models.FileField(blank=True, null=True, upload_to='proofs/originals/'),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='verification_slip_original',
+            field=models.FileField(blank=True, null=True, upload_to='verification_slips/originals/'),
+        ),
+    ]
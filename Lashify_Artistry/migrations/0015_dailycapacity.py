@@ -0,0 +1,52 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:57
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def count_existing_bookings(apps, schema_editor):
+    """Start each day's ``booked`` from the bookings already on it."""
+    Booking = apps.get_model('Lashify_Artistry', 'Booking')
+    DailyCapacity = apps.get_model('Lashify_Artistry', 'DailyCapacity')
+    per_category = getattr(settings, 'BOOKING_DAILY_CAPACITY', {})
+    default = getattr(settings, 'BOOKING_DEFAULT_DAILY_CAPACITY', 4)
+
+    counts = Counter(
+        (service.rsplit('_', 1)[-1], date)
+        for service, date in Booking.objects.values_list('service', 'date').iterator()
+    )
+    DailyCapacity.objects.bulk_create([
+        DailyCapacity(
+            category=category, date=date, booked=booked,
+            capacity=max(per_category.get(category, default), booked),
+        )
+        for (category, date), booked in counts.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Lashify_Artistry', '0014_booking_original_uploads'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCapacity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=20)),
+                ('date', models.DateField()),
+                ('capacity', models.PositiveSmallIntegerField()),
+                ('booked', models.PositiveSmallIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'daily capacity',
+                'ordering': ['date', 'category'],
+                'constraints': [models.UniqueConstraint(fields=('category', 'date'), name='capacity_category_date_uniq')],
+            },
+        ),
+        migrations.RunPython(count_existing_bookings, migrations.RunPython.noop),
+    ]
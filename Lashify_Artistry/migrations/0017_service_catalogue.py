@@ -0,0 +1,88 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:01
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+# (code, name, price) from the old Booking.SERVICE_CHOICES and the booking
+# page's fee table, in their original order
+SERVICES = [
+    ('tattoo', 'Semi Permanent Tattoos', 15000),
+    ('GNSL_nails', 'Gel nails (short length)', 6000),
+    ('GNML_nails', 'Gel nails (medium length)', 8000),
+    ('GNLL_nails', 'Gel nails (long length)', 10000),
+    ('ANSLP_nails', 'Acrylic nails short length plain', 10000),
+    ('ANSLFT_nails', 'Acrylic nails short length french tips', 12000),
+    ('ANSLED_nails', 'Acrylic nails short length extra designs', 14000),
+    ('ANMLP_nails', 'Acrylic nails medium length plain', 12000),
+    ('ANMLFT_nails', 'Acrylic nails medium length french tips', 15000),
+    ('ANMLED_nails', 'Acrylic nails medium length extra designs', 18000),
+    ('ANLLP_nails', 'Acrylic nails long length plain', 16000),
+    ('ANLLFT_nails', 'Acrylic nails long length french tips', 20000),
+    ('ANLLED_nails', 'Acrylic nails long length extra designs', 25000),
+    ('ANELLP_nails', 'Acrylic nails extra long length plain', 18000),
+    ('ANELLFT_nails', 'Acrylic nails extra long length french tips', 22000),
+    ('ANELLED_nails', 'Acrylic nails extra long length extra designs', 30000),
+    ('C_lashes', 'Classic Lashes', 12000),
+    ('H_lashes', 'Hybrid Lashes', 18000),
+    ('V_lashes', 'Volume Lashes', 22000),
+    ('MV_lashes', 'Mega Volume Lashes', 28000),
+    ('N_pedicure', 'Normal Pedicure', 6000),
+    ('F_pedicure', 'French Pedicure', 6000),
+    ('P_pedicure', 'Paraffin Pedicure', 6000),
+    ('hair', 'Hair Styling', 9000),
+    ('manicure', 'Manicure', 5000),
+    ('facial', 'Facial Treatment', 7000),
+]
+
+DURATIONS = {'tattoo': 120, 'nails': 90, 'lashes': 120, 'pedicure': 60, 'hair': 120, 'manicure': 45, 'facial': 60}
+
+
+def seed_services(apps, schema_editor):
+    Service = apps.get_model('Lashify_Artistry', 'Service')
+    rows = []
+    for order, (code, name, price) in enumerate(SERVICES):
+        category = code.rsplit('_', 1)[-1]
+        rows.append(Service(
+            code=code, name=name, category=category, price=Decimal(price),
+            duration_minutes=DURATIONS.get(category, 60), sort_order=order,
+        ))
+    Service.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+def remove_services(apps, schema_editor):
+    apps.get_model('Lashify_Artistry', 'Service').objects.filter(
+        code__in=[code for code, _name, _price in SERVICES]
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Lashify_Artistry', '0016_ratelimitbucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Service',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=30, unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('category', models.CharField(help_text='Capacity is shared per category.', max_length=20)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('duration_minutes', models.PositiveSmallIntegerField(default=60)),
+                ('is_active', models.BooleanField(default=True)),
+                ('sort_order', models.PositiveSmallIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['sort_order', 'name'],
+            },
+        ),
+        migrations.RunPython(seed_services, remove_services),
+        migrations.AlterField(
+            model_name='booking',
+            name='service',
+            field=models.CharField(max_length=30),
+        ),
+    ]
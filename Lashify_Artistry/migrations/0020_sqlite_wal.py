@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def enable_wal(apps, schema_editor):
+    # WAL is stored in the database file, so it is set once here rather than
+    # by every connection (see SQLITE_PRAGMAS in settings)
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=WAL')
+
+
+class Migration(migrations.Migration):
+
+    # The journal mode can't change inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('Lashify_Artistry', '0019_catalogueversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(enable_wal, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,13 @@
-from django.db import models
-from django.core.mail import EmailMessage, send_mail
-from django.conf import settings
-from django.contrib.sites.models import Site
-from django.urls import reverse
+from functools import partial
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from .tracking import TrackedFieldsMixin
+from .thumbnails import generate_renditions
+from . import capacity, catalogue
+from .references import new_reference
 import uuid
-import random
-import string
 
 
 # ------------------------------
@@ -14,113 +16,75 @@ import string
 
 def generate_reference_code():
     """
-    Generates a random reference code of 16 characters (uppercase letters + digits).
+    Default for ``Booking.reference``: a time-ordered, checksummed code
+    (see references.py). Kept under this name for migration 0008.
     """
-    characters = string.ascii_uppercase + string.digits
-    return ''.join(random.choices(characters, k=16))
+    return new_reference()
 
 
-def send_admin_booking_notification(booking):
+# ------------------------------
+# Service Catalogue
+# ------------------------------
+
+class Service(models.Model):
     """
-    Sends an email to the admin when a new booking is created.
+    A bookable service. Prices and names are read through ``catalogue`` (a
+    per-process cache), never per request from this table.
     """
-    try:
-        current_site = Site.objects.get_current()
-        confirm_url = f"http://lashify-artistry.onrender.com{reverse('send_customer_confirmation', args=[booking.confirmation_token])}"
-
-        message = f"""
-📥 New Booking Received!
-
-👤 Name: {booking.name}
-💅 Service: {booking.get_service_display()}
-📧 Email: {booking.email}
-📅 Date: {booking.date}
-💳 Payment Method: {booking.get_payment_method_display()}
-💵 Fee: ₦{booking.fee:,.2f}
-
-Click below to verify and send confirmation to the customer:
-🔗 {confirm_url}
-"""
-
-        send_mail(
-            subject="📥 New Booking Notification - Lashify Artistry",
-            body=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=["olamideadedokun36@gmail.com"],  # TODO: Replace with real admin email
-        )
-        email.send(fail_silently=False)
+    code = models.CharField(max_length=30, unique=True)
+    name = models.CharField(max_length=100)
+    category = models.CharField(max_length=20, help_text="Capacity is shared per category.")
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    duration_minutes = models.PositiveSmallIntegerField(default=60)
+    is_active = models.BooleanField(default=True)
+    sort_order = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ['sort_order', 'name']
+
+    def __str__(self):
+        return self.name
+
+
+class CatalogueVersion(models.Model):
+    """
+    One row whose token changes with every ``Service`` change; the worker
+    processes compare it with the catalogue they have loaded.
+    """
+    token = models.UUIDField(default=uuid.uuid4)
+
 
-    except Exception as e:
-        print("❌ Failed to send admin notification:", e)
+@receiver([post_save, post_delete], sender=Service)
+def _invalidate_catalogue(sender, **kwargs):
+    # In the same transaction, so the new token and the new rows commit together
+    catalogue.invalidate()
 
 
 # ------------------------------
 # Booking Model
 # ------------------------------
 
-class Booking(models.Model):
+class Booking(TrackedFieldsMixin, models.Model):
     # --- Choices ---
-    SERVICE_CHOICES = [
-        # Tattoos
-        ('tattoo', 'Semi Permanent Tattoos'),
-
-        # Gel Nails
-        ('GNSL_nails', 'Gel nails (short length)'),
-        ('GNML_nails', 'Gel nails (medium length)'),
-        ('GNLL_nails', 'Gel nails (long length)'),
-
-        # Acrylic Nails - Short
-        ('ANSLP_nails', 'Acrylic nails short length plain'),
-        ('ANSLFT_nails', 'Acrylic nails short length french tips'),
-        ('ANSLED_nails', 'Acrylic nails short length extra designs'),
-
-        # Acrylic Nails - Medium
-        ('ANMLP_nails', 'Acrylic nails medium length plain'),
-        ('ANMLFT_nails', 'Acrylic nails medium length french tips'),
-        ('ANMLED_nails', 'Acrylic nails medium length extra designs'),
-
-        # Acrylic Nails - Long
-        ('ANLLP_nails', 'Acrylic nails long length plain'),
-        ('ANLLFT_nails', 'Acrylic nails long length french tips'),
-        ('ANLLED_nails', 'Acrylic nails long length extra designs'),
-
-        # Acrylic Nails - Extra Long
-        ('ANELLP_nails', 'Acrylic nails extra long length plain'),
-        ('ANELLFT_nails', 'Acrylic nails extra long length french tips'),
-        ('ANELLED_nails', 'Acrylic nails extra long length extra designs'),
-
-        # Lashes
-        ('C_lashes', 'Classic Lashes'),
-        ('H_lashes', 'Hybrid Lashes'),
-        ('V_lashes', 'Volume Lashes'),
-        ('MV_lashes', 'Mega Volume Lashes'),
-
-        # Pedicures
-        ('N_pedicure', 'Normal Pedicure'),
-        ('F_pedicure', 'French Pedicure'),
-        ('P_pedicure', 'Paraffin Pedicure'),
-
-        # Others
-        ('hair', 'Hair Styling'),
-        ('manicure', 'Manicure'),
-        ('facial', 'Facial Treatment'),
-    ]
-
     PAYMENT_METHODS = [
         ('manual', 'Manual Transfer'),
         ('paystack', 'Paystack (Online)'),
     ]
 
+    # Fields whose transitions trigger side effects in save()
+    tracked_fields = ('paid', 'payment_verified', 'payment_proof', 'verification_slip', 'date', 'service')
+
     # --- Fields ---
     name = models.CharField(max_length=100)
     email = models.EmailField()
-    service = models.CharField(max_length=30, choices=SERVICE_CHOICES)
+    service = models.CharField(max_length=30)  # Service.code
     custom_details = models.TextField(blank=True)
     date = models.DateField()
     fee = models.DecimalField(max_digits=10, decimal_places=2, default=5000)
     payment_method = models.CharField(max_length=50, null=True, blank=True)
     payment_verified = models.BooleanField(default=False)
     payment_proof = models.ImageField(upload_to='proofs/', blank=True, null=True)
+    payment_proof_original = models.FileField(upload_to='proofs/originals/', blank=True, null=True)
 
     reference = models.CharField(max_length=100, unique=True, default=generate_reference_code)
     paid = models.BooleanField(default=False)
@@ -128,57 +92,194 @@ class Booking(models.Model):
 
     verification_notes = models.TextField(blank=True, null=True)
     verification_slip = models.ImageField(upload_to='verification_slips/', blank=True, null=True)
-    confirmation_token = models.UUIDField(default=uuid.uuid4, editable=False, null=True, blank=True)
+    verification_slip_original = models.FileField(
+        upload_to='verification_slips/originals/', blank=True, null=True
+    )
+    confirmation_token = models.UUIDField(default=uuid.uuid4, editable=False, null=True, blank=True, unique=True)
 
     # --- Meta & String Representation ---
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # customer_bookings: WHERE email = ? ORDER BY date DESC, id DESC
+            models.Index(fields=['email', '-date', '-id'], name='booking_email_date_idx'),
+            # Day views / availability: WHERE date = ? [AND service = ?]
+            models.Index(fields=['date', 'service'], name='booking_date_service_idx'),
+            # Admin filters: paid / payment_verified, usually with a date range
+            models.Index(fields=['paid', 'payment_verified', 'date'], name='booking_payment_state_idx'),
+            # Default ordering (Meta.ordering) for the admin changelist
+            models.Index(fields=['created_at'], name='booking_created_at_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.get_service_display()} on {self.date}"
 
+    def get_service_display(self):
+        return catalogue.service_name(self.service)
+
     # --- Save Override ---
-    def save(self, *args, **kwargs):
-        is_new = self.pk is None
-        send_verification_email = False
-
-        # Check if "paid" changed from False -> True
-        if self.pk:
-            previous = Booking.objects.get(pk=self.pk)
-            if not previous.paid and self.paid:
-                send_verification_email = True
-
-        super().save(*args, **kwargs)
-
-        # ✅ Send payment verification email to customer
-        if send_verification_email and self.email and self.verification_slip:
-            try:
-                email = EmailMessage(
-                    subject="✅ Payment Verified - Lashify Artistry",
-                    body=f"""
-Hi {self.name},
-
-Your payment for {self.get_service_display()} has been successfully verified.
-
-📅 Appointment Date: {self.date}
-💵 Fee: ₦{self.fee:,.2f}
-📌 Reference: {self.reference}
-
-Attached is your proof of verification.
-
-We look forward to seeing you!
-
-With love,  
-Lashify Artistry 💖
-""",
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    to=[self.email],
-                )
-                email.attach_file(self.verification_slip.path)
-                email.send(fail_silently=False)
-            except Exception as e:
-                print("❌ Failed to send payment verification email:", e)
-
-        # 📧 Send admin notification for new bookings
+    def save(self, *args, overbook=False, **kwargs):
+        """
+        Saving also reserves (or moves) the booking's capacity slot and raises
+        ``capacity.SlotUnavailable`` if the day is full. Staff pass
+        ``overbook=True`` to book past capacity.
+        """
+        is_new = self._state.adding
+        # Views pass the date as a string; compare and reserve with a real date
+        self.date = self._meta.get_field('date').to_python(self.date)
+        changes = self.get_field_changes(kwargs.get('update_fields'))
+
+        # Check if "paid" or "payment_verified" changed False -> True (no extra query needed)
+        payment_confirmed = (
+            changes.get('paid') == (False, True)
+            or changes.get('payment_verified') == (False, True)
+        )
+
+        # Images that need thumbnails/previews once the transaction commits
+        new_images = [
+            name for name in ('payment_proof', 'verification_slip')
+            if getattr(self, name) and (is_new or name in changes)
+        ]
+
+        from .notifications import dispatch, BOOKING_CREATED, PAYMENT_VERIFIED
+
+        # The booking and its outbox rows commit (or roll back) together
+        with transaction.atomic():
+            self._move_slot(is_new, changes, overbook)
+            super().save(*args, **kwargs)
+
+            # 📧 Notify admin + customer about new bookings
+            if is_new:
+                dispatch(BOOKING_CREATED, self)
+
+            # ✅ Payment verification email to customer (sent once per booking)
+            if payment_confirmed:
+                dispatch(PAYMENT_VERIFIED, self)
+
+        for name in new_images:
+            transaction.on_commit(partial(generate_renditions, getattr(self, name)))
+
+    def _move_slot(self, is_new, changes, overbook):
+        """Reserve the new (service, date) slot and release the old one."""
         if is_new:
-            send_admin_booking_notification(self)
+            capacity.reserve(self.service, self.date, overbook=overbook)
+            return
+        if 'date' not in changes and 'service' not in changes:
+            return
+        old_date = changes.get('date', (self.date,))[0]
+        old_service = changes.get('service', (self.service,))[0]
+        if (old_date, capacity.category_for_service(old_service)) == (
+            self.date, capacity.category_for_service(self.service)
+        ):
+            return
+        capacity.reserve(self.service, self.date, overbook=overbook)
+        capacity.release(old_service, old_date)
+
+
+@receiver(post_delete, sender=Booking)
+def _release_slot(sender, instance, **kwargs):
+    capacity.release(
+        instance.get_loaded_value('service', instance.service),
+        instance.get_loaded_value('date', instance.date),
+    )
+
+
+# ------------------------------
+# Capacity
+# ------------------------------
+
+class DailyCapacity(models.Model):
+    """
+    Slots per service category per day. ``booked`` is kept in step with the
+    bookings by ``capacity.reserve()``/``release()``.
+    """
+    category = models.CharField(max_length=20)
+    date = models.DateField()
+    capacity = models.PositiveSmallIntegerField()
+    booked = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ['date', 'category']
+        verbose_name_plural = 'daily capacity'
+        constraints = [
+            # Also the index for month-range availability queries
+            models.UniqueConstraint(fields=['category', 'date'], name='capacity_category_date_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.category} on {self.date}: {self.booked}/{self.capacity}"
+
+    @property
+    def available(self):
+        return max(self.capacity - self.booked, 0)
+
+
+# ------------------------------
+# Email Outbox
+# ------------------------------
+
+class OutboundEmail(models.Model):
+    """
+    An email waiting to be delivered by the ``send_queued_mail`` worker.
+
+    Rows are written in the same transaction as the data they describe, so a
+    booking and its notifications are either both saved or both rolled back.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    # --- Message ---
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    content_subtype = models.CharField(max_length=20, default='plain')
+    from_email = models.CharField(max_length=254, blank=True)
+    to = models.JSONField(default=list)
+    # [{"path": "<storage name>", "cid": "<content id or empty>"}, ...]
+    attachments = models.JSONField(default=list, blank=True)
+
+    # --- Origin ---
+    event = models.CharField(max_length=40, blank=True)
+    booking = models.ForeignKey(
+        Booking, null=True, blank=True, on_delete=models.SET_NULL, related_name='emails'
+    )
+    # One message per (event, booking, recipients); NULL for forced resends.
+    dedupe_key = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    # Shared by the messages one bulk admin action queued; see its progress page.
+    batch = models.UUIDField(null=True, blank=True, db_index=True)
+
+    # --- Delivery state ---
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
+
+
+# ------------------------------
+# Rate limiting
+# ------------------------------
+
+class RateLimitBucket(models.Model):
+    """Token bucket for ``ratelimit.DatabaseBackend``."""
+    key = models.CharField(max_length=100, unique=True)
+    tokens = models.FloatField()
+    updated_at = models.FloatField()  # Unix time; plain float keeps the refill maths in SQL
+
+    def __str__(self):
+        return f"{self.key}: {self.tokens:.2f}"
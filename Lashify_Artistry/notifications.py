@@ -0,0 +1,230 @@
+"""
+Booking notification dispatcher.
+
+Every booking email goes through ``dispatch(event, booking)``. Each event has
+one or more builders; every message a builder returns is queued in the
+outbox with a dedupe key of (event, booking, recipients), so the same event
+can never email the same people twice.
+"""
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.urls import reverse
+
+from . import outbox
+from .links import my_bookings_url
+
+BOOKING_CREATED = 'booking_created'
+PAYMENT_VERIFIED = 'payment_verified'
+CUSTOMER_CONFIRMED = 'customer_confirmed'
+
+_builders = {}
+
+
+def builder(event):
+    """Register a function ``(booking, site_url) -> dict | None`` for ``event``."""
+    def register(func):
+        _builders.setdefault(event, []).append(func)
+        return func
+    return register
+
+
+def dedupe_key(event, booking, recipients):
+    recipients = ",".join(sorted(r.strip().lower() for r in recipients))
+    return hashlib.sha256(f"{event}:{booking.pk}:{recipients}".encode()).hexdigest()
+
+
+def _site_url(request):
+    if request is not None:
+        return request.build_absolute_uri('/').rstrip('/')
+    return settings.SITE_URL.rstrip('/')
+
+
+def _messages(event, booking, site_url, force):
+    """``[(message, dedupe key)]`` from the builders registered for ``event``."""
+    messages = []
+    for build in _builders.get(event, []):
+        message = build(booking, site_url)
+        if not message:
+            continue
+        key = None if force else dedupe_key(event, booking, message['to'])
+        messages.append((message, key))
+    return messages
+
+
+def dispatch(event, booking, *, request=None, force=False):
+    """
+    Queue every message registered for ``event``.
+
+    ``force`` skips deduplication, for explicit resends from the admin.
+    Returns the queued ``OutboundEmail`` rows (duplicates are left out).
+    """
+    queued = []
+    for message, key in _messages(event, booking, _site_url(request), force):
+        outbound = outbox.enqueue(event=event, booking=booking, dedupe_key=key, **message)
+        if outbound is not None:
+            queued.append(outbound)
+    return queued
+
+
+def dispatch_many(event, bookings, *, request=None, force=False, batch=None):
+    """
+    ``dispatch()`` for many bookings at once: every message is queued with a
+    single INSERT and tagged with ``batch``. Returns the number queued.
+    """
+    site_url = _site_url(request)
+    queued = []
+    for booking in bookings:
+        for message, key in _messages(event, booking, site_url, force):
+            queued.append({**message, 'event': event, 'booking': booking, 'dedupe_key': key, 'batch': batch})
+    return outbox.enqueue_many(queued)
+
+
+async def adispatch(event, booking, *, request=None, force=False):
+    """``dispatch()`` for async views; rows are written through the async ORM."""
+    # Builders may look up the service catalogue, which can query
+    messages = await sync_to_async(_messages)(event, booking, _site_url(request), force)
+    queued = []
+    for message, key in messages:
+        outbound = await outbox.aenqueue(event=event, booking=booking, dedupe_key=key, **message)
+        if outbound is not None:
+            queued.append(outbound)
+    return queued
+
+
+# ------------------------------
+# Helpers
+# ------------------------------
+
+def _confirmation_url(booking, site_url):
+    return site_url + reverse('send_customer_confirmation', args=[booking.confirmation_token])
+
+
+def _payment_display(booking):
+    return str(booking.payment_method or "").replace("_", " ").title()
+
+
+# ------------------------------
+# booking_created
+# ------------------------------
+
+@builder(BOOKING_CREATED)
+def admin_new_booking(booking, site_url):
+    confirmation_url = _confirmation_url(booking, site_url)
+    body = f"""
+<html>
+<body>
+<h2>📥 New Booking Received!</h2>
+<p><strong>👤 Name:</strong> {booking.name}<br>
+<strong>💅 Service:</strong> {booking.get_service_display()}<br>
+<strong>📧 Email:</strong> {booking.email}<br>
+<strong>📅 Date:</strong> {booking.date}<br>
+<strong>💳 Payment Method:</strong> {_payment_display(booking)}<br>
+<strong>💰 Fee:</strong> ₦{booking.fee}</p>
+
+<p>Click below to verify and send confirmation to the customer:<br>
+<a href="{confirmation_url}">{confirmation_url}</a></p>
+"""
+    # Inline proof image if uploaded
+    inline_images = {}
+    if booking.payment_proof:
+        inline_images["proof"] = booking.payment_proof.name
+        body += (
+            '<p><b>Payment Proof:</b><br>'
+            '<img src="cid:proof" style="max-width:400px;"></p>'
+        )
+
+    return {
+        'subject': f"New Booking - {booking.get_service_display()}",
+        'body': body,
+        'to': getattr(settings, "ADMIN_EMAILS", [settings.DEFAULT_FROM_EMAIL]),
+        'html': True,
+        'inline_images': inline_images,
+    }
+
+
+@builder(BOOKING_CREATED)
+def customer_new_booking(booking, site_url):
+    if not booking.email:
+        return None
+    confirmation_url = _confirmation_url(booking, site_url)
+    bookings_url = site_url + my_bookings_url(booking.email)
+    return {
+        'subject': "Your Booking Confirmation - Lashify Artistry",
+        'body': f"""
+Hi {booking.name},<br><br>
+
+Thank you for booking with Lashify Artistry! 💖<br><br>
+
+💅 <b>Service:</b> {booking.get_service_display()}<br>
+📅 <b>Date:</b> {booking.date}<br>
+💰 <b>Booking Fee:</b> ₦{booking.fee}<br>
+💳 <b>Payment Method:</b> {_payment_display(booking)}<br><br>
+
+Please confirm your booking by clicking below:<br>
+<a href="{confirmation_url}">{confirmation_url}</a><br><br>
+
+📌 <b>Reference:</b> {booking.reference}<br>
+View all your bookings any time: <a href="{bookings_url}">{bookings_url}</a><br><br>
+
+With love,<br>
+Lashify Artistry
+""",
+        'to': [booking.email],
+        'html': True,
+    }
+
+
+# ------------------------------
+# payment_verified
+# ------------------------------
+
+@builder(PAYMENT_VERIFIED)
+def customer_payment_verified(booking, site_url):
+    if not (booking.email and booking.verification_slip):
+        return None
+    return {
+        'subject': "✅ Payment Verified - Lashify Artistry",
+        'body': f"""
+Hi {booking.name},
+
+Your payment for {booking.get_service_display()} has been successfully verified.
+
+📅 Appointment Date: {booking.date}
+💵 Fee: ₦{booking.fee:,.2f}
+📌 Reference: {booking.reference}
+
+Attached is your proof of verification.
+
+We look forward to seeing you!
+
+With love,
+Lashify Artistry 💖
+""",
+        'to': [booking.email],
+        'attachments': [booking.verification_slip.name],
+    }
+
+
+# ------------------------------
+# customer_confirmed
+# ------------------------------
+
+@builder(CUSTOMER_CONFIRMED)
+def customer_booking_confirmed(booking, site_url):
+    if not booking.email:
+        return None
+    return {
+        'subject': "Booking Confirmed - Lashify Artistry",
+        'body': f"""
+Hi {booking.name},<br><br>
+
+Your booking for <b>{booking.get_service_display()}</b> on {booking.date} has been confirmed ✅.<br><br>
+
+Thank you,<br>
+Lashify Artistry
+""",
+        'to': [booking.email],
+        'html': True,
+    }
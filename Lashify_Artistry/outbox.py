@@ -0,0 +1,227 @@
+"""
+Transactional email outbox.
+
+Views call ``enqueue()`` instead of sending mail directly. The row is written
+in the caller's transaction and delivered later by ``send_pending()``, which
+the ``send_queued_mail`` management command runs in a loop.
+"""
+from datetime import timedelta
+from email.mime.image import MIMEImage
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .email_backends import send_batch
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------------------
+# Queueing
+# ------------------------------
+
+def _outbound(subject, body, to, *, html=False, from_email=None, attachments=(), inline_images=None,
+              event='', booking=None, dedupe_key=None, batch=None):
+    files = [{'path': name, 'cid': ''} for name in attachments]
+    files += [{'path': name, 'cid': cid} for cid, name in (inline_images or {}).items()]
+
+    return OutboundEmail(
+        subject=subject,
+        body=body,
+        content_subtype='html' if html else 'plain',
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(to),
+        attachments=files,
+        event=event,
+        booking=booking,
+        dedupe_key=dedupe_key,
+        batch=batch,
+    )
+
+
+def enqueue(subject, body, to, **kwargs):
+    """
+    Queue an email for background delivery.
+
+    ``attachments`` is a list of storage names attached as regular files.
+    ``inline_images`` maps a Content-ID to a storage name, for use as
+    ``<img src="cid:...">`` in HTML bodies.
+
+    When ``dedupe_key`` is given and a message with that key is already
+    queued, nothing is written and ``None`` is returned.
+    """
+    outbound = _outbound(subject, body, to, **kwargs)
+
+    if outbound.dedupe_key is None:
+        outbound.save()
+        return outbound
+
+    if OutboundEmail.objects.filter(dedupe_key=outbound.dedupe_key).exists():
+        return None
+    # The unique constraint settles races between the check and the insert.
+    created = OutboundEmail.objects.bulk_create([outbound], ignore_conflicts=True)
+    return created[0] if created else None
+
+
+async def aenqueue(subject, body, to, **kwargs):
+    """``enqueue()`` through the async ORM, for async views."""
+    outbound = _outbound(subject, body, to, **kwargs)
+
+    if outbound.dedupe_key is None:
+        await outbound.asave()
+        return outbound
+
+    if await OutboundEmail.objects.filter(dedupe_key=outbound.dedupe_key).aexists():
+        return None
+    created = await OutboundEmail.objects.abulk_create([outbound], ignore_conflicts=True)
+    return created[0] if created else None
+
+
+def enqueue_many(messages):
+    """
+    Queue a list of ``enqueue()`` keyword dicts with one INSERT.
+
+    Messages whose ``dedupe_key`` is already queued are dropped. Returns the
+    number of rows written.
+    """
+    outbound = [_outbound(**message) for message in messages]
+    keys = [row.dedupe_key for row in outbound if row.dedupe_key is not None]
+    if keys:
+        queued = set(OutboundEmail.objects.filter(dedupe_key__in=keys).values_list('dedupe_key', flat=True))
+        outbound = [row for row in outbound if row.dedupe_key is None or row.dedupe_key not in queued]
+    # As in enqueue(), the unique constraint settles races with other writers.
+    OutboundEmail.objects.bulk_create(outbound, ignore_conflicts=True)
+    return len(outbound)
+
+
+def build_message(outbound, connection=None):
+    """Turn an ``OutboundEmail`` row back into an ``EmailMessage``."""
+    message = EmailMessage(
+        subject=outbound.subject,
+        body=outbound.body,
+        from_email=outbound.from_email or settings.DEFAULT_FROM_EMAIL,
+        to=outbound.to,
+        connection=connection,
+    )
+    message.content_subtype = outbound.content_subtype
+
+    for item in outbound.attachments:
+        with default_storage.open(item['path'], 'rb') as f:
+            content = f.read()
+        if item.get('cid'):
+            image = MIMEImage(content)
+            image.add_header('Content-ID', f"<{item['cid']}>")
+            message.attach(image)
+        else:
+            message.attach(os.path.basename(item['path']), content)
+
+    return message
+
+
+# ------------------------------
+# Delivery
+# ------------------------------
+
+def retry_delay(attempts):
+    """Exponential backoff: base, 2*base, 4*base ... capped at the maximum."""
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_BASE_SECONDS', 30)
+    cap = getattr(settings, 'EMAIL_OUTBOX_RETRY_MAX_SECONDS', 3600)
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), cap))
+
+
+def _claim_batch(batch_size):
+    """
+    Reserve up to ``batch_size`` due messages for this worker.
+
+    Claiming pushes ``next_attempt_at`` forward by a lease, using a conditional
+    UPDATE per row so two workers never pick the same message. If a worker dies
+    mid-batch its rows become due again once the lease expires.
+    """
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=getattr(settings, 'EMAIL_OUTBOX_LEASE_SECONDS', 300))
+
+    candidates = (
+        OutboundEmail.objects
+        .filter(status=OutboundEmail.STATUS_PENDING, next_attempt_at__lte=now)
+        .order_by('next_attempt_at', 'pk')[:batch_size]
+    )
+
+    claimed = []
+    for outbound in candidates:
+        won = OutboundEmail.objects.filter(
+            pk=outbound.pk,
+            status=OutboundEmail.STATUS_PENDING,
+            next_attempt_at=outbound.next_attempt_at,
+        ).update(next_attempt_at=lease_until)
+        if won:
+            claimed.append(outbound)
+    return claimed
+
+
+def _record_failure(outbound, error):
+    outbound.attempts += 1
+    outbound.last_error = str(error)[:2000]
+    if outbound.attempts >= getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 6):
+        outbound.status = OutboundEmail.STATUS_FAILED
+    else:
+        outbound.next_attempt_at = timezone.now() + retry_delay(outbound.attempts)
+    outbound.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+    logger.warning("Outbox email %s failed (attempt %s): %s", outbound.pk, outbound.attempts, error)
+
+
+def _record_success(outbound):
+    outbound.attempts += 1
+    outbound.status = OutboundEmail.STATUS_SENT
+    outbound.sent_at = timezone.now()
+    outbound.last_error = ''
+    outbound.save(update_fields=['attempts', 'status', 'sent_at', 'last_error'])
+
+
+def send_pending(batch_size=None, connection=None):
+    """
+    Deliver one batch of due messages over a single mail connection, or in
+    as few calls as the backend can manage (see ``email_backends.send_batch``).
+
+    Returns ``(sent, failed)`` counts.
+    """
+    batch_size = batch_size or getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 50)
+    claimed = _claim_batch(batch_size)
+    if not claimed:
+        return 0, 0
+
+    connection = connection or get_connection(fail_silently=False)
+    sent = failed = 0
+
+    try:
+        connection.open()
+    except Exception as e:
+        for outbound in claimed:
+            _record_failure(outbound, e)
+        return 0, len(claimed)
+
+    try:
+        built = []
+        for outbound in claimed:
+            try:
+                built.append((outbound, build_message(outbound, connection)))
+            except Exception as e:
+                _record_failure(outbound, e)
+                failed += 1
+        # HTTP API backends send the whole batch in a few calls
+        errors = send_batch(connection, [message for _outbound, message in built])
+        for (outbound, _message), error in zip(built, errors):
+            if error is None:
+                _record_success(outbound)
+                sent += 1
+            else:
+                _record_failure(outbound, error)
+                failed += 1
+    finally:
+        connection.close()
+
+    return sent, failed
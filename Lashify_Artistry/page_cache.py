@@ -0,0 +1,167 @@
+"""
+Full-page cache for the context-free marketing pages.
+
+``cached_page`` stores each page's rendered HTML minified and compressed
+(gzip, plus Brotli when available) in the ``PAGE_CACHE_ALIAS`` cache and
+serves it with a strong ETag, Last-Modified and Cache-Control, answering
+conditional GETs with 304. Keys include the
+deploy version, a signature of the template files and the service
+catalogue version, so a deploy, a template edit or a price change starts a
+fresh cache.
+"""
+from functools import lru_cache, wraps
+import gzip
+import hashlib
+import os
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, parse_etags
+
+from . import catalogue
+from .compression import brotli, brotli_compress, choose_encoding, minify_html
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11  # slow, but each page is compressed once per cache entry
+
+
+# ------------------------------
+# Versioning
+# ------------------------------
+
+def _template_dirs():
+    dirs = []
+    for engine in settings.TEMPLATES:
+        dirs.extend(str(d) for d in engine.get('DIRS', []))
+    return dirs
+
+
+def _scan_templates():
+    """Hash of the path + mtime of every template file."""
+    digest = hashlib.sha1()
+    for directory in _template_dirs():
+        for root, _dirs, files in os.walk(directory):
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                try:
+                    digest.update(f"{path}:{os.stat(path).st_mtime_ns}".encode())
+                except OSError:
+                    continue
+    return digest.hexdigest()[:12]
+
+
+_cached_scan = lru_cache(maxsize=1)(_scan_templates)
+
+
+def page_cache_version():
+    """
+    Deploy version + template signature + service catalogue version (pages
+    show prices). Templates are re-scanned on every call in DEBUG.
+    """
+    templates = _scan_templates() if settings.DEBUG else _cached_scan()
+    return f"{getattr(settings, 'DEPLOY_VERSION', 'dev')}.{templates}.{catalogue.version()}"
+
+
+# ------------------------------
+# Conditional requests
+# ------------------------------
+
+def _etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return None
+    etags = parse_etags(header)
+    return '*' in etags or etag in etags
+
+
+def _not_modified(request, etag, last_modified):
+    matched = _etag_matches(request, etag)
+    if matched is not None:
+        return matched
+    since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return since is not None and int(last_modified) <= since
+
+
+# ------------------------------
+# Decorator
+# ------------------------------
+
+def _serve(request, entry):
+    encoding = choose_encoding(request)
+    if encoding == 'br' and entry.get('br') is None:
+        encoding = 'gzip'
+    # Different bytes need different strong ETags
+    suffix = {'br': '-br', 'gzip': '-gz'}.get(encoding, '')
+    etag = f'"{entry["hash"]}{suffix}"'
+
+    if _not_modified(request, etag, entry['last_modified']):
+        response = HttpResponseNotModified()
+    else:
+        if encoding == 'br':
+            body = entry['br']
+        elif encoding == 'gzip':
+            body = entry['body']
+        else:
+            body = gzip.decompress(entry['body'])
+        response = HttpResponse(body, content_type=entry['content_type'])
+        response.html_minified = True  # CompressionMiddleware leaves it alone
+        if encoding:
+            response['Content-Encoding'] = encoding
+        response['Content-Length'] = str(len(body))
+
+    max_age = getattr(settings, 'PAGE_CACHE_MAX_AGE', 300)
+    shared_max_age = getattr(settings, 'PAGE_CACHE_SHARED_MAX_AGE', max_age)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    response['Cache-Control'] = f"public, max-age={max_age}, s-maxage={shared_max_age}"
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def _cacheable(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not response.has_header('Content-Encoding')
+    )
+
+
+def cached_page(view):
+    """
+    Cache a view whose output depends only on the URL path.
+
+    Only GET/HEAD are cached; the query string is ignored on purpose so it
+    cannot be used to fill the cache.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(request, *args, **kwargs)
+
+        cache = caches[getattr(settings, 'PAGE_CACHE_ALIAS', 'default')]
+        key = f"page:{page_cache_version()}:{request.path}"
+        entry = cache.get(key)
+
+        if entry is None:
+            response = view(request, *args, **kwargs)
+            if not _cacheable(response):
+                return response
+            body = response.content
+            if response['Content-Type'].startswith('text/html'):
+                body = minify_html(body.decode(response.charset)).encode(response.charset)
+            entry = {
+                'body': gzip.compress(body, GZIP_LEVEL, mtime=0),
+                'br': brotli_compress(body, BROTLI_QUALITY) if brotli is not None else None,
+                'hash': hashlib.sha256(body).hexdigest()[:32],
+                'content_type': response['Content-Type'],
+                'last_modified': int(time.time()),
+            }
+            cache.set(key, entry, getattr(settings, 'PAGE_CACHE_TIMEOUT', 60 * 60 * 24))
+
+        return _serve(request, entry)
+
+    return wrapper
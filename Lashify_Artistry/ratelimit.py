@@ -0,0 +1,265 @@
+"""
+Rate limiting and load shedding for expensive POST endpoints.
+
+``RateLimitMiddleware`` applies the token buckets in ``RATE_LIMITS`` to
+POSTs on the named URLs: first per client IP (before the body is read),
+then per submitted email. An empty bucket answers 429 with Retry-After.
+Requests that pass also need one of ``RATE_LIMIT_MAX_CONCURRENT`` in-flight
+slots for this process, otherwise they get 503 straight away instead of
+queueing behind slow uploads and SMTP.
+
+Buckets are stored by ``RATE_LIMIT_BACKEND``:
+
+* ``LocalBackend``: in-process; exact, but each worker has its own buckets.
+* ``CacheBackend``: Django cache (``RATE_LIMIT_CACHE_ALIAS``); shared when the
+  cache is, approximate under concurrent updates to the same key.
+* ``DatabaseBackend``: ``RateLimitBucket`` rows updated with one conditional
+  UPDATE; exact across workers.
+"""
+from collections import OrderedDict
+import hashlib
+import math
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F, Value
+from django.db.models.functions import Least
+from django.http import HttpResponse
+from django.urls import NoReverseMatch, reverse
+from django.utils.module_loading import import_string
+
+
+# ------------------------------
+# Token bucket
+# ------------------------------
+
+def _refill(tokens, updated, capacity, rate, now):
+    return min(capacity, tokens + (now - updated) * rate)
+
+
+def _retry_after(tokens, rate):
+    """Seconds until the bucket holds one whole token."""
+    return max(1, math.ceil((1 - tokens) / rate))
+
+
+class LocalBackend:
+    """Buckets in a bounded in-process LRU dict."""
+
+    max_entries = 10_000
+
+    def __init__(self):
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, rate):
+        """Take one token; returns ``(allowed, retry_after_seconds)``."""
+        now = time.time()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = _refill(tokens, updated, capacity, rate, now)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+        return allowed, 0 if allowed else _retry_after(tokens, rate)
+
+
+class CacheBackend:
+    """Buckets in the Django cache; expire once they would be full again."""
+
+    def __init__(self):
+        self.cache = caches[getattr(settings, 'RATE_LIMIT_CACHE_ALIAS', 'default')]
+
+    def consume(self, key, capacity, rate):
+        now = time.time()
+        cache_key = f"ratelimit:{key}"
+        tokens, updated = self.cache.get(cache_key, (capacity, now))
+        tokens = _refill(tokens, updated, capacity, rate, now)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self.cache.set(cache_key, (tokens, now), math.ceil(capacity / rate))
+        return allowed, 0 if allowed else _retry_after(tokens, rate)
+
+
+class DatabaseBackend:
+    """
+    Buckets in ``RateLimitBucket``. Taking a token is a single UPDATE that
+    refills and decrements only if a whole token is available, so concurrent
+    workers can't overspend a bucket.
+    """
+
+    # Delete idle buckets every this many new ones
+    prune_every = 200
+
+    def __init__(self):
+        self._created = 0
+
+    def _take(self, key, capacity, rate, now):
+        from .models import RateLimitBucket
+
+        refilled = Least(
+            Value(float(capacity)),
+            F('tokens') + (Value(now) - F('updated_at')) * Value(float(rate)),
+        )
+        return (
+            RateLimitBucket.objects
+            .alias(available=refilled)
+            .filter(key=key, available__gte=1)
+            .update(tokens=refilled - 1, updated_at=now)
+        )
+
+    def consume(self, key, capacity, rate):
+        from .models import RateLimitBucket
+
+        now = time.time()
+        if self._take(key, capacity, rate, now):
+            return True, 0
+
+        bucket, created = RateLimitBucket.objects.get_or_create(
+            key=key, defaults={'tokens': capacity - 1, 'updated_at': now}
+        )
+        if created:
+            self._prune(capacity, rate, now)
+            return True, 0
+        # Created by a concurrent request in the meantime, or really empty
+        if self._take(key, capacity, rate, now):
+            return True, 0
+        tokens = _refill(bucket.tokens, bucket.updated_at, capacity, rate, now)
+        return False, _retry_after(tokens, rate)
+
+    def _prune(self, capacity, rate, now):
+        from .models import RateLimitBucket
+
+        self._created += 1
+        if self._created % self.prune_every == 0:
+            # Anything idle for a day has long since refilled
+            RateLimitBucket.objects.filter(updated_at__lt=now - 60 * 60 * 24).delete()
+
+
+# ------------------------------
+# Middleware
+# ------------------------------
+
+def client_ip(request):
+    """
+    Client address. Behind ``RATE_LIMIT_PROXY_COUNT`` reverse proxies the
+    address is taken from X-Forwarded-For, counting from the right so
+    clients can't spoof it.
+    """
+    proxies = getattr(settings, 'RATE_LIMIT_PROXY_COUNT', 0)
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    if proxies and forwarded:
+        hops = [hop.strip() for hop in forwarded.split(',') if hop.strip()]
+        if len(hops) >= proxies:
+            return hops[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _digest(value):
+    return hashlib.sha1(value.encode()).hexdigest()[:20]
+
+
+def _busy():
+    response = HttpResponse("🚦 We're busy right now. Please try again in a moment.", status=503)
+    response['Retry-After'] = '5'
+    return response
+
+
+class RateLimitMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.backend = import_string(
+            getattr(settings, 'RATE_LIMIT_BACKEND', 'Lashify_Artistry.ratelimit.LocalBackend')
+        )()
+        self.in_flight = threading.BoundedSemaphore(getattr(settings, 'RATE_LIMIT_MAX_CONCURRENT', 4))
+        self._rules = None
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def rules(self):
+        """``{path: (url_name, {key type: (burst, per hour)})}``, resolved on first use."""
+        if self._rules is None:
+            rules = {}
+            for name, limits in getattr(settings, 'RATE_LIMITS', {}).items():
+                try:
+                    rules[reverse(name)] = (name, limits)
+                except NoReverseMatch:
+                    continue
+            self._rules = rules
+        return self._rules
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        rule = self.rules().get(request.path_info) if request.method == 'POST' else None
+        if rule is None:
+            return self.get_response(request)
+
+        name, limits = rule
+        limited = self._check(name, limits, 'ip', client_ip(request))
+        if limited:
+            return limited
+
+        if not self.in_flight.acquire(blocking=False):
+            return _busy()
+        try:
+            limited = self._check_email(request, name, limits)
+            if limited:
+                return limited
+            return self.get_response(request)
+        finally:
+            self.in_flight.release()
+
+    async def __acall__(self, request):
+        rule = self.rules().get(request.path_info) if request.method == 'POST' else None
+        if rule is None:
+            return await self.get_response(request)
+
+        # Backends may touch the cache or database, and the email check
+        # parses the body: keep both off the event loop
+        name, limits = rule
+        limited = await sync_to_async(self._check)(name, limits, 'ip', client_ip(request))
+        if limited:
+            return limited
+
+        if not self.in_flight.acquire(blocking=False):
+            return _busy()
+        try:
+            limited = await sync_to_async(self._check_email)(request, name, limits)
+            if limited:
+                return limited
+            return await self.get_response(request)
+        finally:
+            self.in_flight.release()
+
+    def _check_email(self, request, name, limits):
+        if 'email' not in limits:
+            return None
+        # Reads the body, so only after the IP check and a free slot
+        email = request.POST.get('email', '').strip().lower()
+        return self._check(name, limits, 'email', email)
+
+    def _check(self, name, limits, kind, value):
+        if kind not in limits or not value:
+            return None
+        burst, per_hour = limits[kind]
+        allowed, retry_after = self.backend.consume(
+            f"{name}:{kind}:{_digest(value)}", burst, per_hour / 3600
+        )
+        if allowed:
+            return None
+        response = HttpResponse(
+            f"⏳ Too many attempts. Please try again in {math.ceil(retry_after / 60)} minute(s).",
+            status=429,
+        )
+        response['Retry-After'] = str(retry_after)
+        return response
@@ -0,0 +1,130 @@
+"""
+Booking reference codes.
+
+A reference is 20 Crockford base32 characters (no I, L, O or U)::
+
+    TTTTTTTTTT RRRRRRRRR C
+    |          |         `- check character
+    |          `- 45 random bits from ``secrets``
+    `- milliseconds since the Unix epoch (50 bits)
+
+References sort by creation time, so new rows land at the end of the
+``reference`` index instead of at random pages. Within one process they are
+strictly increasing: a second reference in the same millisecond reuses the
+timestamp and adds one to the random part, so a process never repeats
+itself, and different processes collide only if they draw the same 45 random
+bits in the same millisecond. The state is reset in forked children
+(gunicorn workers), which would otherwise continue from the parent's sequence.
+"""
+import os
+import secrets
+import threading
+import time
+
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+TIME_CHARS = 10
+RANDOM_CHARS = 9
+RANDOM_BITS = RANDOM_CHARS * 5
+LENGTH = TIME_CHARS + RANDOM_CHARS + 1
+
+_DECODE = {char: value for value, char in enumerate(ALPHABET)}
+# Common misreadings, as in the Crockford spec
+_DECODE.update({'O': 0, 'I': 1, 'L': 1})
+
+_lock = threading.Lock()
+_last_ms = 0
+_last_random = 0
+
+
+def _reset_state():
+    global _lock, _last_ms, _last_random
+    _lock = threading.Lock()
+    _last_ms = _last_random = 0
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_state)
+
+
+# ------------------------------
+# Encoding
+# ------------------------------
+
+def _encode(value, length):
+    chars = []
+    for _ in range(length):
+        value, digit = divmod(value, 32)
+        chars.append(ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+
+def _check_char(body):
+    # Odd weights: any single mistyped character changes the sum mod 32
+    total = sum((2 * i + 1) * _DECODE[char] for i, char in enumerate(body))
+    return ALPHABET[total % 32]
+
+
+def _format(ms, random_part):
+    body = _encode(ms, TIME_CHARS) + _encode(random_part, RANDOM_CHARS)
+    return body + _check_char(body)
+
+
+# ------------------------------
+# Allocation
+# ------------------------------
+
+def _next_values(count):
+    """``count`` increasing (ms, random) pairs; caller holds ``_lock``."""
+    global _last_ms, _last_random
+    ms = int(time.time() * 1000)
+    if ms > _last_ms:
+        _last_ms, _last_random = ms, secrets.randbits(RANDOM_BITS - 1)
+    else:
+        # Same (or earlier, after a clock step back) millisecond: keep counting
+        _last_random += 1
+    values = []
+    for _ in range(count):
+        if _last_random >= 1 << RANDOM_BITS:
+            _last_ms, _last_random = _last_ms + 1, secrets.randbits(RANDOM_BITS - 1)
+        values.append((_last_ms, _last_random))
+        _last_random += 1
+    _last_random -= 1
+    return values
+
+
+def new_reference():
+    """One new reference."""
+    with _lock:
+        (ms, random_part), = _next_values(1)
+    return _format(ms, random_part)
+
+
+def allocate_references(count):
+    """
+    ``count`` distinct, increasing references in one call, e.g. for bulk
+    imports: assign them to unsaved bookings and ``bulk_create`` them.
+    """
+    with _lock:
+        values = _next_values(count)
+    return [_format(ms, random_part) for ms, random_part in values]
+
+
+# ------------------------------
+# Validation
+# ------------------------------
+
+def normalize_reference(reference):
+    """Upper-case, drop spaces/hyphens and fix O/I/L misreadings."""
+    cleaned = (reference or '').upper().replace('-', '').replace(' ', '')
+    return ''.join(
+        ALPHABET[_DECODE[char]] if char in _DECODE else char for char in cleaned
+    )
+
+
+def is_valid_reference(reference):
+    """True for a well-formed reference with a correct check character."""
+    return (
+        len(reference) == LENGTH
+        and all(char in ALPHABET for char in reference)
+        and _check_char(reference[:-1]) == reference[-1]
+    )
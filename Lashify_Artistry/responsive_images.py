@@ -0,0 +1,170 @@
+"""
+Responsive image build step.
+
+Generates resized AVIF/WebP/JPEG variants of the gallery images under
+``RESPONSIVE_IMAGES_ROOT / 'static'`` (a STATICFILES_DIRS entry) and writes a
+manifest that the ``{% responsive_img %}`` template tag reads to emit
+``srcset``/``sizes``. Variant names carry a hash of their content, and
+unchanged sources are skipped on rebuild.
+
+Runs as part of ``collectstatic`` or on its own with
+``python manage.py build_responsive_images``.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path, PurePosixPath
+import hashlib
+import io
+import json
+
+from django.conf import settings
+from PIL import Image, ImageOps, features
+
+SOURCE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+VARIANT_PREFIX = 'responsive'
+
+# format -> (Pillow format, file extension, save options)
+ENCODERS = {
+    'avif': ('AVIF', 'avif', {'quality': 50, 'speed': 8}),
+    'webp': ('WEBP', 'webp', {'quality': 75, 'method': 6}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 80, 'optimize': True, 'progressive': True}),
+}
+
+
+def available_formats():
+    """Formats this Pillow build can encode; AVIF needs libavif."""
+    formats = ['jpeg']
+    if features.check('webp'):
+        formats.insert(0, 'webp')
+    if features.check('avif'):
+        formats.insert(0, 'avif')
+    return formats
+
+
+def _settings():
+    root = Path(getattr(settings, 'RESPONSIVE_IMAGES_ROOT', settings.BASE_DIR / 'responsive_images'))
+    return {
+        'source_root': Path(getattr(settings, 'RESPONSIVE_IMAGES_SOURCE', settings.STATICFILES_DIRS[0])),
+        'source_dir': getattr(settings, 'RESPONSIVE_IMAGES_DIR', 'images'),
+        'output_root': root / 'static',
+        'manifest_path': root / 'manifest.json',
+        'widths': tuple(getattr(settings, 'RESPONSIVE_IMAGE_WIDTHS', (160, 320, 480, 640, 960, 1280))),
+    }
+
+
+def load_manifest(path=None):
+    path = Path(path or _settings()['manifest_path'])
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# ------------------------------
+# Encoding
+# ------------------------------
+
+def _target_widths(original_width, widths):
+    """Configured widths below the original, plus the original size itself."""
+    targets = [w for w in widths if w < original_width]
+    targets.append(min(original_width, max(widths)))
+    return sorted(set(targets))
+
+
+def _encode(image, fmt):
+    pil_format, _ext, options = ENCODERS[fmt]
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def build_image(source_path, static_name, output_root, widths, formats, source_hash):
+    """
+    Write every variant of one image and return its manifest entry.
+
+    Top-level function so it can run in a worker process.
+    """
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        width, height = image.size
+
+        stem = PurePosixPath(static_name).with_suffix('')
+        variants = {fmt: [] for fmt in formats}
+        for target in _target_widths(width, widths):
+            resized = image if target == width else image.resize(
+                (target, round(height * target / width)), Image.LANCZOS
+            )
+            for fmt in formats:
+                data = _encode(resized, fmt)
+                digest = hashlib.sha256(data).hexdigest()[:8]
+                name = f"{VARIANT_PREFIX}/{stem}-{target}w.{digest}.{ENCODERS[fmt][1]}"
+                path = Path(output_root) / name
+                if not path.exists():
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    path.write_bytes(data)
+                variants[fmt].append([target, name])
+
+    return {'hash': source_hash, 'width': width, 'height': height, 'variants': variants}
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _is_current(entry, source_hash, widths, formats, output_root):
+    if not entry or entry.get('hash') != source_hash or set(entry['variants']) != set(formats):
+        return False
+    expected = _target_widths(entry['width'], widths)
+    return all(
+        [w for w, _ in entry['variants'][fmt]] == expected
+        and all((output_root / name).exists() for _, name in entry['variants'][fmt])
+        for fmt in formats
+    )
+
+
+def build(jobs=None, force=False, log=print):
+    """
+    Build variants for every source image and rewrite the manifest.
+
+    Returns ``(built, skipped)`` counts.
+    """
+    config = _settings()
+    source_root = config['source_root']
+    output_root = config['output_root']
+    widths = config['widths']
+    formats = available_formats()
+
+    previous = {} if force else load_manifest(config['manifest_path'])
+    manifest, pending = {}, []
+
+    for path in sorted((source_root / config['source_dir']).rglob('*')):
+        if path.suffix.lower() not in SOURCE_EXTENSIONS or not path.is_file():
+            continue
+        static_name = path.relative_to(source_root).as_posix()
+        source_hash = _file_hash(path)
+        entry = previous.get(static_name)
+        if _is_current(entry, source_hash, widths, formats, output_root):
+            manifest[static_name] = entry
+        else:
+            pending.append((str(path), static_name, str(output_root), widths, formats, source_hash))
+
+    output_root.mkdir(parents=True, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {args[1]: pool.submit(build_image, *args) for args in pending}
+        for static_name, future in futures.items():
+            manifest[static_name] = future.result()
+            log(f"  {static_name}")
+
+    config['manifest_path'].parent.mkdir(parents=True, exist_ok=True)
+    with open(config['manifest_path'], 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(manifest.items())), f, indent=1)
+
+    return len(pending), len(manifest) - len(pending)
@@ -0,0 +1,54 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from Lashify_Artistry.responsive_images import load_manifest
+
+register = template.Library()
+
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+
+_manifest = None
+
+
+def _get_manifest():
+    # Re-read on every render in DEBUG so a rebuild shows up without a restart
+    global _manifest
+    if _manifest is None or settings.DEBUG:
+        _manifest = load_manifest()
+    return _manifest
+
+
+def _srcset(variants):
+    return ", ".join(f"{static(name)} {width}w" for width, name in variants)
+
+
+@register.simple_tag
+def responsive_img(src, sizes="100vw", loading="lazy", **attrs):
+    """
+    Render ``<picture>`` with AVIF/WebP/JPEG ``srcset`` for a static image.
+
+    Usage: ``{% responsive_img 'images/1.jpg' class="img-fluid" alt="" sizes="50vw" %}``
+    Falls back to a plain ``<img>`` when the image has not been built.
+    """
+    attrs.setdefault('alt', '')
+    extra = format_html_join(' ', '{}="{}"', sorted(attrs.items()))
+    entry = _get_manifest().get(src)
+
+    if not entry:
+        return format_html('<img src="{}" loading="{}" decoding="async" {}>', static(src), loading, extra)
+
+    variants = entry['variants']
+    fallback = variants['jpeg']
+    # Mid-size JPEG for browsers that ignore srcset
+    default = next((name for width, name in fallback if width >= 960), fallback[-1][1])
+
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        ((MIME_TYPES[fmt], _srcset(variants[fmt]), sizes) for fmt in ('avif', 'webp') if fmt in variants),
+    )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" loading="{}" decoding="async" {}></picture>',
+        sources, static(default), _srcset(fallback), sizes, loading, extra,
+    )
@@ -0,0 +1,128 @@
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+import gzip
+import json
+import shutil
+import tempfile
+
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from Lashify_Artistry import access_log
+from Lashify_Artistry.access_log import AccessLogMiddleware
+
+
+class LogDirMixin:
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir)
+        settings = override_settings(ACCESS_LOG_PATH=str(self.dir / 'access-{worker}.jsonl'))
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(self.stop)
+
+    def stop(self):
+        # Flush the writer thread and let the next test start its own
+        access_log._stop()
+        access_log._started_pid = None
+
+    def write(self, records):
+        for name, lines in records.items():
+            (self.dir / name).write_text(''.join(json.dumps(r) + '\n' for r in lines), encoding='utf-8')
+
+
+class AccessLogMiddlewareTests(LogDirMixin, SimpleTestCase):
+    def request(self, response=None, **attrs):
+        request = RequestFactory().get('/services/')
+        for name, value in attrs.items():
+            setattr(request, name, value)
+        AccessLogMiddleware(lambda request: response or HttpResponse("hello"))(request)
+
+    def records(self, name='access-0.jsonl'):
+        self.stop()
+        return [json.loads(line) for line in (self.dir / name).read_text().splitlines()]
+
+    def test_one_record_per_request(self):
+        self.request(booking_reference='01ABC')
+        self.request(HttpResponse(status=500))
+
+        first, second = self.records()
+
+        self.assertEqual(
+            {key: first[key] for key in ('method', 'route', 'status', 'bytes', 'reference')},
+            {'method': 'GET', 'route': '<unmatched>', 'status': 200, 'bytes': 5, 'reference': '01ABC'},
+        )
+        self.assertGreaterEqual(first['duration_ms'], 0)
+        self.assertEqual(second['status'], 500)
+
+    def test_streaming_bytes_come_from_content_length(self):
+        self.request(StreamingHttpResponse(iter([b'x'])))
+        self.assertIsNone(self.records()[0]['bytes'])
+
+    def test_file_is_named_after_the_worker_slot(self):
+        with mock.patch.dict('os.environ', {'GUNICORN_WORKER_SLOT': '3'}):
+            self.request()
+        self.assertEqual(len(self.records('access-3.jsonl')), 1)
+
+    def test_a_recycled_worker_appends_to_its_slots_file(self):
+        self.request()
+        self.stop()
+        self.request()
+        self.assertEqual(len(self.records()), 2)
+        self.assertEqual([p.name for p in self.dir.iterdir()], ['access-0.jsonl'])
+
+    @override_settings(ACCESS_LOG_MAX_BYTES=300, ACCESS_LOG_BACKUP_COUNT=2)
+    def test_rotated_files_are_gzipped_and_capped(self):
+        for _ in range(20):
+            self.request()
+        self.stop()
+
+        self.assertEqual(
+            sorted(p.name for p in self.dir.iterdir()),
+            ['access-0.jsonl', 'access-0.jsonl.1.gz', 'access-0.jsonl.2.gz'],
+        )
+        with gzip.open(self.dir / 'access-0.jsonl.1.gz', 'rt') as rotated:
+            self.assertEqual(json.loads(rotated.readline())['route'], '<unmatched>')
+
+    @override_settings(ACCESS_LOG_PATH='')
+    def test_empty_path_turns_it_off(self):
+        self.request()
+        self.assertFalse(access_log.start())
+        self.assertEqual(list(self.dir.iterdir()), [])
+
+
+class AccessLogStatsTests(LogDirMixin, SimpleTestCase):
+    def stats(self, *args):
+        out = StringIO()
+        call_command('access_log_stats', *args, '--json', stdout=out)
+        return {row['route']: row for row in json.loads(out.getvalue())}
+
+    def test_summary_per_route_across_workers_and_rotations(self):
+        def record(ms, status=200, route='services', ts='2031-05-01T10:00:00'):
+            return {'ts': ts, 'method': 'GET', 'route': route, 'status': status, 'duration_ms': ms, 'bytes': 2048}
+
+        self.write({
+            'access-0.jsonl': [record(ms) for ms in range(1, 51)],
+            'access-1.jsonl': [record(ms) for ms in range(51, 101)] + [record(5, 502, 'home')],
+        })
+        with gzip.open(self.dir / 'access-1.jsonl.1.gz', 'wt') as rotated:
+            rotated.write(json.dumps(record(1, route='home', ts='2031-04-30T10:00:00')) + '\n')
+
+        summary = self.stats()
+
+        self.assertEqual(
+            {key: summary['GET services'][key] for key in ('count', 'errors', 'p50', 'p95', 'p99', 'avg_kb')},
+            {'count': 100, 'errors': 0, 'p50': 50, 'p95': 95, 'p99': 99, 'avg_kb': 2.0},
+        )
+        self.assertEqual((summary['GET home']['count'], summary['GET home']['errors']), (2, 1))
+        self.assertEqual(self.stats('--since', '2031-05-01')['GET home']['count'], 1)
+
+    def test_explicit_files_and_bad_lines(self):
+        (self.dir / 'other.jsonl').write_text('not json\n' + json.dumps({'route': 'x', 'duration_ms': 1}) + '\n')
+        self.assertEqual(self.stats(str(self.dir / 'other.jsonl'))['? x']['count'], 1)
+
+    def test_no_files_is_an_error(self):
+        with self.assertRaises(CommandError):
+            call_command('access_log_stats', stdout=StringIO())
@@ -0,0 +1,46 @@
+from datetime import date
+
+from django.contrib.admin import helpers
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from Lashify_Artistry.models import Booking, OutboundEmail
+from Lashify_Artistry.notifications import PAYMENT_VERIFIED
+
+
+class ConfirmationActionTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('owner', 'owner@example.com', 'pw'))
+
+    def booking(self, day, **fields):
+        fields.setdefault('paid', True)
+        booking = Booking(name="Ada", email="ada@example.com", service='C_lashes', date=date(2031, 5, day))
+        booking.save()
+        # Straight to the database: the save() hooks are not under test here
+        Booking.objects.filter(pk=booking.pk).update(**fields)
+        return booking.pk
+
+    def run_action(self, action, pks):
+        return self.client.post('/admin/Lashify_Artistry/booking/', {
+            'action': action, helpers.ACTION_CHECKBOX_NAME: pks,
+        }, follow=True)
+
+    def test_only_bookings_with_a_slip_are_emailed(self):
+        with_slip = self.booking(1, verification_slip='verification_slips/ok.jpg')
+        no_slip = self.booking(2, verification_slip=None)
+        blank_slip = self.booking(3, verification_slip='')
+
+        response = self.run_action('mark_as_verified_and_email', [with_slip, no_slip, blank_slip])
+
+        queued = OutboundEmail.objects.filter(event=PAYMENT_VERIFIED)
+        self.assertEqual([row.booking_id for row in queued], [with_slip])
+        self.assertEqual(queued.get().batch, response.resolver_match.kwargs['batch'])
+        self.assertContains(response, "2 bookings not eligible")
+
+    def test_nothing_eligible_says_so(self):
+        pk = self.booking(1, verification_slip=None)
+
+        response = self.run_action('mark_as_verified_and_email', [pk])
+
+        self.assertFalse(OutboundEmail.objects.filter(event=PAYMENT_VERIFIED).exists())
+        self.assertContains(response, "1 bookings not eligible")
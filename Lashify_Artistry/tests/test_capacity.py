@@ -0,0 +1,139 @@
+from datetime import date
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from Lashify_Artistry import capacity
+from Lashify_Artistry.capacity import SlotUnavailable
+from Lashify_Artistry.models import Booking, DailyCapacity
+
+DAY = date(2031, 5, 1)
+
+
+def slots(day=DAY, category='lashes'):
+    return DailyCapacity.objects.values_list('booked', 'capacity').get(category=category, date=day)
+
+
+@override_settings(BOOKING_DAILY_CAPACITY={'lashes': 2}, BOOKING_DEFAULT_DAILY_CAPACITY=4)
+class ReserveTests(TestCase):
+    def test_first_reservation_creates_the_day(self):
+        capacity.reserve('C_lashes', DAY)
+        self.assertEqual(slots(), (1, 2))
+
+    def test_full_day_raises(self):
+        capacity.reserve('C_lashes', DAY)
+        capacity.reserve('C_lashes', DAY)
+
+        with self.assertRaises(SlotUnavailable) as raised:
+            capacity.reserve('C_lashes', DAY)
+
+        self.assertEqual(raised.exception.category, 'lashes')
+        self.assertEqual(slots(), (2, 2))
+
+    def test_overbook_ignores_capacity(self):
+        for _ in range(3):
+            capacity.reserve('C_lashes', DAY, overbook=True)
+        self.assertEqual(slots(), (3, 2))
+
+    def test_categories_are_counted_separately(self):
+        capacity.reserve('C_lashes', DAY)
+        capacity.reserve('C_lashes', DAY)
+        capacity.reserve('gel_nails', DAY)
+        self.assertEqual(slots(category='nails'), (1, 4))
+
+    def test_reservation_is_one_conditional_update(self):
+        capacity.reserve('C_lashes', DAY)
+
+        with CaptureQueriesContext(connection) as ctx:
+            capacity.reserve('C_lashes', DAY)
+
+        (query,) = [q['sql'] for q in ctx.captured_queries if 'dailycapacity' in q['sql']]
+        # The database re-checks booked < capacity under the row lock
+        self.assertTrue(query.startswith('UPDATE'))
+        self.assertIn('"booked" < (', query)
+
+    def test_release_never_goes_below_zero(self):
+        capacity.reserve('C_lashes', DAY)
+        capacity.release('C_lashes', DAY)
+        capacity.release('C_lashes', DAY)
+        self.assertEqual(slots(), (0, 2))
+
+    def test_availability_fills_in_missing_days(self):
+        capacity.reserve('C_lashes', DAY)
+
+        days = capacity.availability('C_lashes', DAY, date(2031, 5, 3))
+
+        self.assertEqual([day['available'] for day in days], [1, 2, 2])
+
+
+@override_settings(BOOKING_DAILY_CAPACITY={'lashes': 1})
+class BookingSlotTests(TestCase):
+    def book(self, day=DAY, **kwargs):
+        booking = Booking(name="Ada", email="ada@example.com", service='C_lashes', date=day)
+        booking.save(**kwargs)
+        return booking
+
+    def test_booking_a_full_day_saves_nothing(self):
+        self.book()
+        with self.assertRaises(SlotUnavailable):
+            self.book()
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_moving_a_booking_moves_its_slot(self):
+        booking = self.book()
+        booking.date = date(2031, 5, 2)
+        booking.save()
+
+        self.assertEqual(slots()[0], 0)
+        self.assertEqual(slots(date(2031, 5, 2))[0], 1)
+
+    def test_moving_to_a_full_day_keeps_the_old_slot(self):
+        self.book(date(2031, 5, 2))
+        booking = self.book()
+        booking.date = date(2031, 5, 2)
+
+        with self.assertRaises(SlotUnavailable):
+            booking.save()
+
+        self.assertEqual(slots()[0], 1)
+        self.assertEqual(Booking.objects.filter(date=DAY).count(), 1)
+
+    def test_deleting_a_booking_frees_its_slot(self):
+        self.book().delete()
+        self.assertEqual(slots()[0], 0)
+
+    def test_staff_can_overbook(self):
+        self.book()
+        self.book(overbook=True)
+        self.assertEqual(slots(), (2, 1))
+
+
+@override_settings(BOOKING_DAILY_CAPACITY={'lashes': 1}, RATE_LIMITS={})
+class CreateBookingCapacityTests(TestCase):
+    def setUp(self):
+        caches['idempotency'].clear()
+
+    def post(self, name):
+        return self.client.post('/create-booking/', {
+            'name': name, 'email': f'{name.lower()}@example.com', 'service': 'C_lashes', 'date': DAY.isoformat(),
+        })
+
+    def test_full_day_returns_409(self):
+        self.assertEqual(self.post("Ada").status_code, 200)
+
+        response = self.post("Bo")
+
+        self.assertEqual(response.status_code, 409)
+        self.assertContains(response, "fully booked", status_code=409)
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(slots(), (1, 1))
+
+    def test_availability_endpoint_reports_the_full_day(self):
+        self.post("Ada")
+
+        data = self.client.get('/availability/', {'service': 'C_lashes', 'month': '2031-05'}).json()
+
+        self.assertEqual(data['days'][0], {'date': '2031-05-01', 'available': 0})
+        self.assertEqual(data['days'][1]['available'], 1)
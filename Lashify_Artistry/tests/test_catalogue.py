@@ -0,0 +1,114 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+import uuid
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from Lashify_Artistry import catalogue
+from Lashify_Artistry.models import Booking, CatalogueVersion, Service
+
+
+def forget_catalogue():
+    # As if this were a worker process that has not loaded anything yet
+    catalogue._loaded.update(version=None, services={}, current=None, checked_at=None)
+
+
+def token():
+    return CatalogueVersion.objects.get(pk=1).token
+
+
+def changed_by_another_worker(code, price):
+    # What a Service save in another process leaves behind: a new price and
+    # token in the database, and nothing in this process's memory
+    Service.objects.filter(code=code).update(price=price)
+    CatalogueVersion.objects.filter(pk=1).update(token=uuid.uuid4())
+
+
+class CatalogueVersionTests(TestCase):
+    def setUp(self):
+        forget_catalogue()
+        self.addCleanup(forget_catalogue)
+
+    def test_saving_or_deleting_a_service_changes_the_token(self):
+        catalogue.version()
+        before = token()
+        service = Service.objects.get(code='C_lashes')
+
+        service.price += 1
+        service.save()
+        after_save = token()
+        service.delete()
+
+        self.assertNotEqual(after_save, before)
+        self.assertNotIn(token(), (before, after_save))
+
+    def test_a_save_here_reloads_at_once(self):
+        catalogue.services()
+        service = Service.objects.get(code='C_lashes')
+        service.name = "Classic Set"
+        service.save()
+
+        self.assertEqual(catalogue.service_name('C_lashes'), "Classic Set")
+
+    @override_settings(CATALOGUE_CHECK_SECONDS=5)
+    def test_another_workers_change_is_seen_within_the_check_interval(self):
+        with mock.patch.object(catalogue.time, 'monotonic', return_value=100.0):
+            old_price = catalogue.get_service('C_lashes').price
+            changed_by_another_worker('C_lashes', old_price + 10)
+
+            self.assertEqual(catalogue.get_service('C_lashes').price, old_price)
+            self.assertEqual(catalogue.get_service('C_lashes', fresh=True).price, old_price + 10)
+
+    @override_settings(CATALOGUE_CHECK_SECONDS=5)
+    def test_token_is_rechecked_once_due(self):
+        with mock.patch.object(catalogue.time, 'monotonic', return_value=100.0):
+            old_price = catalogue.get_service('C_lashes').price
+            changed_by_another_worker('C_lashes', old_price + 10)
+        with mock.patch.object(catalogue.time, 'monotonic', return_value=105.0):
+            self.assertEqual(catalogue.get_service('C_lashes').price, old_price + 10)
+
+    def test_lookups_between_checks_run_no_queries(self):
+        catalogue.services()
+        with self.assertNumQueries(0):
+            catalogue.service_name('C_lashes')
+            catalogue.service_choices()
+
+
+@override_settings(RATE_LIMITS={})
+class BookingPriceTests(TestCase):
+    def setUp(self):
+        forget_catalogue()
+        self.addCleanup(forget_catalogue)
+        caches['idempotency'].clear()
+
+    def post(self, **fields):
+        return self.client.post('/create-booking/', {
+            'name': 'Ada', 'email': 'ada@example.com', 'service': 'C_lashes',
+            'date': date(2031, 5, 1).isoformat(), **fields,
+        })
+
+    def test_fee_comes_from_the_catalogue_not_the_form(self):
+        response = self.post(fee='1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Booking.objects.get().fee, Service.objects.get(code='C_lashes').price)
+        self.assertNotEqual(Booking.objects.get().fee, Decimal('1'))
+
+    def test_next_booking_uses_another_workers_new_price(self):
+        catalogue.services()
+        changed_by_another_worker('C_lashes', Decimal('12345.00'))
+
+        self.post()
+
+        self.assertEqual(Booking.objects.get().fee, Decimal('12345.00'))
+
+    def test_inactive_service_is_refused(self):
+        Service.objects.filter(code='C_lashes').update(is_active=False)
+        catalogue.invalidate()
+
+        response = self.post()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Booking.objects.exists())
@@ -0,0 +1,181 @@
+import asyncio
+import gzip
+from unittest import skipUnless
+
+from django.core.cache import caches
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from Lashify_Artistry.compression import CompressionMiddleware, brotli, choose_encoding, minify_html
+
+requires_brotli = skipUnless(brotli is not None, "brotli is not installed")
+# Codings the middleware can produce here, best first
+CODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+PAGE = "<html>\n  <body>\n" + "    <p>Lash   extensions</p>\n" * 60 + "  </body>\n</html>\n"
+
+
+def decode(response):
+    body = b''.join(response.streaming_content) if response.streaming else response.content
+    encoding = response.get('Content-Encoding')
+    if encoding == 'br':
+        return brotli.decompress(body)
+    if encoding == 'gzip':
+        return gzip.decompress(body)
+    return body
+
+
+class NegotiationTests(SimpleTestCase):
+    def choose(self, header):
+        return choose_encoding(RequestFactory().get('/', HTTP_ACCEPT_ENCODING=header))
+
+    @requires_brotli
+    def test_brotli_wins_a_tie(self):
+        self.assertEqual(self.choose('gzip, deflate, br'), 'br')
+
+    def test_q_values_are_respected(self):
+        self.assertEqual(self.choose('br;q=0.5, gzip'), 'gzip')
+        self.assertEqual(self.choose('br;q=0, gzip;q=0.1'), 'gzip')
+
+    def test_refused_or_missing_codings(self):
+        self.assertIsNone(self.choose(''))
+        self.assertIsNone(self.choose('identity'))
+        self.assertIsNone(self.choose('gzip;q=0, br;q=0'))
+        self.assertIsNone(self.choose('*;q=0'))
+
+    @requires_brotli
+    def test_wildcard(self):
+        self.assertEqual(self.choose('*'), 'br')
+        self.assertEqual(self.choose('br;q=0, *'), 'gzip')
+
+    def test_malformed_q_counts_as_refused(self):
+        self.assertEqual(self.choose('br;q=abc, gzip'), 'gzip')
+
+
+class MinifyTests(SimpleTestCase):
+    def test_whitespace_runs_collapse(self):
+        self.assertEqual(minify_html("<p>a   b</p>\n\n   <p>c</p>"), "<p>a b</p>\n<p>c</p>")
+
+    def test_space_between_inline_elements_survives(self):
+        self.assertEqual(minify_html("<b>Lash</b>   <i>Artistry</i>"), "<b>Lash</b> <i>Artistry</i>")
+
+    def test_raw_text_elements_are_untouched(self):
+        html = (
+            "<pre>  keep\n    this  </pre>"
+            "<textarea name=n>  a\n\n b </textarea>"
+            "<script>var s = 'a    b';\n// <p>  </p>\n</script>"
+            "<style>p  >  b { color: red }</style>"
+        )
+        self.assertEqual(minify_html(html), html)
+
+    def test_tags_and_attribute_values_are_untouched(self):
+        html = '<input value="two  spaces" data-x="a\n  b"   >'
+        self.assertEqual(minify_html(html), html)
+
+    def test_comments_are_dropped_but_conditional_comments_kept(self):
+        self.assertEqual(minify_html("a<!-- secret -->b"), "ab")
+        self.assertEqual(minify_html("<!--[if IE]><p>old</p><![endif]-->"), "<!--[if IE]><p>old</p><![endif]-->")
+
+
+@override_settings(COMPRESSION_MIN_SIZE=200, COMPRESSION_MINIFY_HTML=True)
+class MiddlewareTests(SimpleTestCase):
+    def run_middleware(self, response, accept='gzip, br'):
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept))
+
+    def test_html_is_minified_and_compressed(self):
+        for accept, encoding in [(coding, coding) for coding in CODINGS] + [('', None)]:
+            with self.subTest(accept=accept):
+                response = self.run_middleware(HttpResponse(PAGE), accept)
+
+                self.assertEqual(response.get('Content-Encoding'), encoding)
+                self.assertEqual(decode(response), minify_html(PAGE).encode())
+                if encoding:
+                    self.assertEqual(response['Content-Length'], str(len(response.content)))
+                self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_small_responses_pass_through(self):
+        response = self.run_middleware(HttpResponse("<p>short</p>"))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_non_text_types_are_not_compressed(self):
+        response = self.run_middleware(HttpResponse(b'\x89PNG' * 200, content_type='image/png'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_encoded_range_and_no_transform_responses_pass_through(self):
+        encoded = HttpResponse(PAGE)
+        encoded['Content-Encoding'] = 'gzip'
+        ranged = HttpResponse(PAGE, status=206)
+        ranged['Content-Range'] = 'bytes 0-10/100'
+        no_transform = HttpResponse(PAGE)
+        no_transform['Cache-Control'] = 'no-transform'
+
+        for response in (encoded, ranged, no_transform):
+            self.assertEqual(self.run_middleware(response).content, PAGE.encode())
+
+    def test_strong_etag_becomes_weak(self):
+        response = HttpResponse(PAGE)
+        response['ETag'] = '"abc"'
+        self.assertEqual(self.run_middleware(response)['ETag'], 'W/"abc"')
+
+    def test_json_is_compressed_not_minified(self):
+        body = '{"a":   "  spaced  "}' * 30
+        response = self.run_middleware(HttpResponse(body, content_type='application/json'))
+        self.assertEqual(decode(response), body.encode())
+
+    def test_streaming_response_is_compressed(self):
+        chunks = [PAGE.encode()] * 3
+        for accept in CODINGS:
+            with self.subTest(accept=accept):
+                response = self.run_middleware(StreamingHttpResponse(iter(chunks)), accept)
+
+                self.assertEqual(response['Content-Encoding'], accept)
+                self.assertFalse(response.has_header('Content-Length'))
+                self.assertEqual(decode(response), b''.join(chunks))
+
+    def test_async_streaming_response_is_compressed(self):
+        async def chunks():
+            for _ in range(3):
+                yield PAGE.encode()
+
+        async def collect(response):
+            return b''.join([chunk async for chunk in response.streaming_content])
+
+        for accept in CODINGS:
+            with self.subTest(accept=accept):
+                response = self.run_middleware(StreamingHttpResponse(chunks()), accept)
+                body = asyncio.run(collect(response))
+                decompress = brotli.decompress if accept == 'br' else gzip.decompress
+                self.assertEqual(decompress(body), PAGE.encode() * 3)
+
+
+class CachedPageTests(TestCase):
+    def setUp(self):
+        caches['pages'].clear()
+
+    def test_each_encoding_has_its_own_etag_and_answers_304(self):
+        etags = set()
+        for accept in CODINGS + ('identity',):
+            with self.subTest(accept=accept):
+                response = self.client.get('/services/', HTTP_ACCEPT_ENCODING=accept)
+                self.assertEqual(response.status_code, 200)
+                etag = response['ETag']
+                etags.add(etag)
+
+                again = self.client.get('/services/', HTTP_ACCEPT_ENCODING=accept, HTTP_IF_NONE_MATCH=etag)
+
+                self.assertEqual(again.status_code, 304)
+                self.assertEqual(again.content, b'')
+                self.assertEqual(again['ETag'], etag)
+        self.assertEqual(len(etags), len(CODINGS) + 1)
+
+    def test_stale_etag_gets_the_page(self):
+        response = self.client.get('/services/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH='"old"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn(b'</html>', gzip.decompress(response.content))
+
+    def test_if_modified_since(self):
+        response = self.client.get('/services/')
+        again = self.client.get('/services/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(again.status_code, 304)
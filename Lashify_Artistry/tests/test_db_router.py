@@ -0,0 +1,121 @@
+import asyncio
+from unittest import mock
+
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from Lashify_Artistry import db_router
+from Lashify_Artistry.db_router import PIN_COOKIE, ReplicaPinMiddleware, ReplicaRouter, healthy_replicas
+
+router = ReplicaRouter()
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'], REPLICA_HEALTH_CHECK_SECONDS=10)
+class HealthTests(SimpleTestCase):
+    def setUp(self):
+        db_router._health.clear()
+        self.addCleanup(db_router._health.clear)
+        clock = mock.patch('Lashify_Artistry.db_router.time')
+        self.clock = clock.start().monotonic
+        self.clock.return_value = 1000.0
+        self.addCleanup(clock.stop)
+        check = mock.patch('Lashify_Artistry.db_router._check', return_value=True)
+        self.check = check.start()
+        self.addCleanup(check.stop)
+
+    def test_failed_replica_is_skipped(self):
+        self.check.side_effect = lambda alias: alias == 'replica2'
+        self.assertEqual(healthy_replicas(), ['replica2'])
+        self.assertEqual({router.db_for_read(None) for _ in range(20)}, {'replica2'})
+
+    def test_reads_fall_back_to_the_primary(self):
+        self.check.return_value = False
+        self.assertEqual(router.db_for_read(None), 'default')
+
+    def test_results_are_reused_until_stale(self):
+        healthy_replicas()
+        self.clock.return_value = 1009.0
+        healthy_replicas()
+        self.assertEqual(self.check.call_count, 2)
+
+        self.clock.return_value = 1010.0
+        healthy_replicas()
+        self.assertEqual(self.check.call_count, 4)
+
+    def test_recovered_replica_is_used_again(self):
+        self.check.return_value = False
+        self.assertEqual(healthy_replicas(), [])
+
+        self.check.return_value = True
+        self.clock.return_value = 1010.0
+        self.assertEqual(healthy_replicas(), ['replica1', 'replica2'])
+
+    def test_inside_a_transaction_reads_the_primary(self):
+        with mock.patch.object(connections['default'], 'in_atomic_block', True):
+            self.assertEqual(router.db_for_read(None), 'default')
+
+    def test_writes_and_migrations_go_to_the_primary(self):
+        self.assertEqual(router.db_for_write(None), 'default')
+        self.assertTrue(router.allow_migrate('default', 'Lashify_Artistry'))
+        self.assertFalse(router.allow_migrate('replica1', 'Lashify_Artistry'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], REPLICA_PIN_SECONDS=5)
+class PinMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        db_router._health['replica1'] = (True, float('inf'))
+        self.addCleanup(db_router._health.clear)
+        self.reads = []
+
+    def view(self, write=False):
+        def get_response(request):
+            if write:
+                router.db_for_write(None)
+            self.reads.append(router.db_for_read(None))
+            return HttpResponse("ok")
+        return ReplicaPinMiddleware(get_response)
+
+    def test_get_reads_from_the_replica(self):
+        response = self.view()(RequestFactory().get('/'))
+        self.assertEqual(self.reads, ['replica1'])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_unsafe_methods_read_from_the_primary(self):
+        self.view()(RequestFactory().post('/'))
+        self.assertEqual(self.reads, ['default'])
+
+    def test_write_pins_the_rest_of_the_request_and_sets_the_cookie(self):
+        response = self.view(write=True)(RequestFactory().get('/'))
+
+        self.assertEqual(self.reads, ['default'])
+        cookie = response.cookies[PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], 5)
+        self.assertTrue(cookie['httponly'])
+
+    def test_cookie_pins_the_next_request(self):
+        request = RequestFactory().get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+
+        self.view()(request)
+
+        self.assertEqual(self.reads, ['default'])
+
+    @override_settings(REPLICA_PIN_SECONDS=0)
+    def test_pinning_can_be_disabled(self):
+        response = self.view(write=True)(RequestFactory().post('/'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_state_does_not_leak_past_the_request(self):
+        self.view(write=True)(RequestFactory().post('/'))
+        self.assertIsNone(db_router.current_request.get())
+        self.assertEqual(router.db_for_read(None), 'replica1')
+
+    def test_async_write_sets_the_cookie(self):
+        async def get_response(request):
+            router.db_for_write(None)
+            return HttpResponse("ok")
+
+        response = asyncio.run(ReplicaPinMiddleware(get_response)(RequestFactory().post('/')))
+
+        self.assertIn(PIN_COOKIE, response.cookies)
@@ -0,0 +1,150 @@
+from http.server import ThreadingHTTPServer
+
+from django.core import mail
+from django.core.mail import EmailMessage, EmailMultiAlternatives
+from django.test import SimpleTestCase, override_settings
+
+from Lashify_Artistry.benchmarks import _FakeAPIHandler, _serve
+from Lashify_Artistry.email_backends import BrevoEmailBackend, batch_payload, payload
+
+
+class _RecordingAPIHandler(_FakeAPIHandler):
+    """Records every body; answers 400 for any call to a ``bad`` address, or ``server.status``."""
+
+    def answer(self, body):
+        self.server.bodies.append(body)
+        versions = body.get('messageVersions', [body])
+        if any(to['email'].startswith('bad') for version in versions for to in version['to']):
+            return 400, {'message': 'invalid email address'}
+        if self.server.status != 201:
+            return self.server.status, {'message': 'unavailable'}
+        return super().answer(body)
+
+
+def html(to, body='<p>Hi</p>'):
+    message = EmailMessage('Booking Confirmed', body, 'studio@example.com', [to])
+    message.content_subtype = 'html'
+    return message
+
+
+def text(to, body='Hi'):
+    return EmailMessage('Booking Confirmed', body, 'studio@example.com', [to])
+
+
+class PayloadTests(SimpleTestCase):
+    def test_versions_carry_their_own_recipients_and_content(self):
+        body = batch_payload([payload(html('alice@example.com', '<p>A</p>')),
+                              payload(html('bob@example.com', '<p>B</p>'))])
+
+        self.assertNotIn('to', body)
+        self.assertEqual(
+            [(v['to'], v['htmlContent']) for v in body['messageVersions']],
+            [([{'email': 'alice@example.com'}], '<p>A</p>'), ([{'email': 'bob@example.com'}], '<p>B</p>')],
+        )
+
+    def test_html_alternative_sets_both_contents(self):
+        message = EmailMultiAlternatives('S', 'plain', 'studio@example.com', ['a@example.com'])
+        message.attach_alternative('<p>rich</p>', 'text/html')
+        self.assertEqual(
+            {key: payload(message)[key] for key in ('htmlContent', 'textContent')},
+            {'htmlContent': '<p>rich</p>', 'textContent': 'plain'},
+        )
+
+    def test_messages_the_api_cannot_carry_go_by_smtp(self):
+        message = EmailMultiAlternatives('S', 'plain', 'studio@example.com', ['a@example.com'])
+        message.attach_alternative('plain again', 'text/plain')
+        self.assertIsNone(payload(message))
+
+
+@override_settings(DEFAULT_FROM_EMAIL='studio@example.com')
+class BrevoBackendTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = _serve(ThreadingHTTPServer, _RecordingAPIHandler, 0)
+        cls.addClassCleanup(cls.server.server_close)
+        cls.addClassCleanup(cls.server.shutdown)
+
+    def setUp(self):
+        self.server.bodies = []
+        self.server.status = 201
+
+    def backend(self, **kwargs):
+        return BrevoEmailBackend(
+            api_url=f'http://127.0.0.1:{self.server.server_address[1]}/v3/smtp/email', api_key='test',
+            fallback_backend='django.core.mail.backends.locmem.EmailBackend', **kwargs,
+        )
+
+    def test_same_kind_of_messages_share_one_call(self):
+        sent = self.backend().send_messages([html(f'c{i}@example.com') for i in range(5)])
+
+        self.assertEqual(sent, 5)
+        (body,) = self.server.bodies
+        self.assertEqual(len(body['messageVersions']), 5)
+
+    def test_batch_size_splits_calls(self):
+        self.backend(batch_size=2).send_messages([html(f'c{i}@example.com') for i in range(5)])
+        self.assertEqual([len(b['messageVersions']) for b in self.server.bodies[:2]], [2, 2])
+        self.assertEqual(len(self.server.bodies), 3)
+
+    def test_html_and_text_messages_are_never_batched_together(self):
+        self.backend().send_messages([html('alice@example.com', '<p>private to Alice</p>'),
+                                      text('bob@example.com', 'for Bob')])
+
+        self.assertEqual(len(self.server.bodies), 2)
+        for body in self.server.bodies:
+            if body['to'] == [{'email': 'bob@example.com'}]:
+                self.assertNotIn('htmlContent', body)
+                self.assertEqual(body['textContent'], 'for Bob')
+
+    def test_different_senders_are_separate_calls(self):
+        other = html('b@example.com')
+        other.from_email = 'Owner <owner@example.com>'
+        self.backend().send_messages([html('a@example.com'), other])
+        self.assertEqual(len(self.server.bodies), 2)
+
+    def test_rejected_call_is_halved_until_the_bad_message_is_isolated(self):
+        messages = [html(f'c{i}@example.com') for i in range(8)]
+        messages[5] = html('bad@example')
+
+        errors = self.backend().send_batch(messages)
+
+        self.assertEqual([error is not None for error in errors], [i == 5 for i in range(8)])
+        self.assertEqual(errors[5].status, 400)
+        self.assertEqual(mail.outbox, [])
+        # 8 -> 4 + 4 -> 2 + 2 -> 1 + 1
+        self.assertEqual(len(self.server.bodies), 7)
+
+    def test_send_messages_raises_the_rejection(self):
+        with self.assertRaises(Exception):
+            self.backend().send_messages([html('bad@example')])
+        self.assertEqual(self.backend(fail_silently=True).send_messages([html('bad@example')]), 0)
+
+    def test_server_errors_fall_back_to_smtp(self):
+        self.server.status = 503
+        messages = [html('a@example.com'), html('b@example.com')]
+
+        with self.assertLogs('Lashify_Artistry.email_backends', 'WARNING'):
+            errors = self.backend().send_batch(messages)
+
+        self.assertEqual(errors, [None, None])
+        self.assertEqual([m.to for m in mail.outbox], [['a@example.com'], ['b@example.com']])
+
+    def test_without_fallback_server_errors_are_reported(self):
+        self.server.status = 503
+        backend = self.backend()
+        backend.fallback_backend = None
+
+        errors = backend.send_batch([html('a@example.com')])
+
+        self.assertEqual(errors[0].status, 503)
+        self.assertEqual(mail.outbox, [])
+
+    def test_unsupported_messages_go_straight_to_smtp(self):
+        message = EmailMultiAlternatives('S', 'plain', 'studio@example.com', ['a@example.com'])
+        message.attach_alternative('plain again', 'text/plain')
+
+        self.assertEqual(self.backend().send_batch([message, html('b@example.com')]), [None, None])
+
+        self.assertEqual([m.alternatives for m in mail.outbox], [message.alternatives])
+        self.assertEqual(len(self.server.bodies), 1)
@@ -0,0 +1,122 @@
+from datetime import date
+import threading
+
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from Lashify_Artistry.idempotency import idempotent, request_key
+from Lashify_Artistry.models import Booking
+
+KEY = 'a1b2c3d4-0000-4000-8000-000000000001'
+
+
+# The decorator works the same on any cache; an in-memory one keeps these
+# tests off the database, which the lock tests touch from a second thread
+@override_settings(IDEMPOTENCY_CACHE_ALIAS='default', IDEMPOTENCY_WAIT_SECONDS=2)
+class IdempotentDecoratorTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = caches['default']
+        self.cache.clear()
+        self.calls = []
+
+        @idempotent
+        def view(request):
+            self.calls.append(request)
+            status = int(request.POST.get('status', 200))
+            return HttpResponse(f"response {len(self.calls)}", status=status)
+
+        self.view = view
+
+    def post(self, data):
+        return self.view(RequestFactory().post('/book/', data))
+
+    def test_repeated_key_is_replayed_without_running_the_view(self):
+        first = self.post({'idempotency_key': KEY, 'name': 'Ada'})
+        second = self.post({'idempotency_key': KEY, 'name': 'Ada'})
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+
+    def test_same_payload_without_key_is_replayed(self):
+        self.post({'name': 'Ada', 'date': '2031-05-01'})
+        self.post({'date': '2031-05-01', 'name': 'Ada '})
+        self.assertEqual(len(self.calls), 1)
+
+    def test_different_payloads_run_separately(self):
+        self.post({'name': 'Ada'})
+        self.post({'name': 'Bo'})
+        self.assertEqual(len(self.calls), 2)
+
+    def test_errors_are_not_replayed(self):
+        self.post({'idempotency_key': KEY, 'status': 400})
+        self.post({'idempotency_key': KEY, 'status': 400})
+        self.assertEqual(len(self.calls), 2)
+
+    def test_get_is_not_cached(self):
+        self.view(RequestFactory().get('/book/'))
+        self.view(RequestFactory().get('/book/'))
+        self.assertEqual(len(self.calls), 2)
+
+    def test_uploaded_file_contents_are_part_of_the_key(self):
+        def request(content):
+            return RequestFactory().post('/book/', {'proof': SimpleUploadedFile('p.jpg', content)})
+
+        self.assertEqual(request_key(request(b'one')), request_key(request(b'one')))
+        self.assertNotEqual(request_key(request(b'one')), request_key(request(b'two')))
+
+    # ------------------------------
+    # In-flight lock
+    # ------------------------------
+
+    def lock(self):
+        key = f"idempotency:/book/:{KEY}"
+        self.cache.add(f"{key}:lock", 1, 60)
+        return key
+
+    @override_settings(IDEMPOTENCY_WAIT_SECONDS=0.3)
+    def test_duplicate_of_a_request_in_flight_gets_409(self):
+        self.lock()
+
+        response = self.post({'idempotency_key': KEY})
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.calls, [])
+
+    def test_duplicate_waits_for_the_first_response(self):
+        key = self.lock()
+        stored = {'status': 200, 'content': b'first', 'content_type': 'text/html'}
+        finish = threading.Timer(0.3, self.cache.set, args=(key, stored))
+        finish.start()
+        self.addCleanup(finish.cancel)
+
+        response = self.post({'idempotency_key': KEY})
+
+        self.assertEqual(response.content, b'first')
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertEqual(self.calls, [])
+
+    def test_lock_is_released_after_the_view(self):
+        self.post({'idempotency_key': KEY, 'status': 500})
+        self.assertIsNone(self.cache.get(f"idempotency:/book/:{KEY}:lock"))
+
+
+@override_settings(RATE_LIMITS={})
+class CreateBookingReplayTests(TestCase):
+    def setUp(self):
+        caches['idempotency'].clear()
+
+    def test_double_submit_creates_one_booking(self):
+        data = {
+            'idempotency_key': KEY, 'name': 'Ada', 'email': 'ada@example.com',
+            'service': 'C_lashes', 'date': date(2031, 5, 1).isoformat(),
+        }
+        first = self.client.post('/create-booking/', data)
+        second = self.client.post('/create-booking/', data)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Booking.objects.count(), 1)
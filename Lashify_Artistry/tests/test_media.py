@@ -0,0 +1,140 @@
+from unittest import mock
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from Lashify_Artistry import media
+from Lashify_Artistry.media import RangeNotSatisfiable, byte_range, serve, signed_media_url
+
+NAME = 'proofs/slip.png'
+CONTENT = bytes(range(256)) * 4  # 1024 bytes
+
+
+class MediaRootMixin:
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        settings = override_settings(MEDIA_ROOT=root, MEDIA_SERVE_MODE='django', MEDIA_URL_MAX_AGE=3600)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        default_storage.save(NAME, ContentFile(CONTENT))
+
+
+class ByteRangeTests(SimpleTestCase):
+    def byte_range(self, header, size=100, **extra):
+        request = RequestFactory().get('/', HTTP_RANGE=header, **extra)
+        return byte_range(request, size, '"e"', 0)
+
+    def test_ranges(self):
+        self.assertEqual(self.byte_range('bytes=0-9'), (0, 9))
+        self.assertEqual(self.byte_range('bytes=90-'), (90, 99))
+        self.assertEqual(self.byte_range('bytes=-10'), (90, 99))
+        self.assertEqual(self.byte_range('bytes=-500'), (0, 99))
+        self.assertEqual(self.byte_range('bytes=50-500'), (50, 99))
+
+    def test_whole_file_is_sent_for_unsupported_headers(self):
+        self.assertIsNone(self.byte_range(''))
+        self.assertIsNone(self.byte_range('bytes=0-1,5-6'))
+        self.assertIsNone(self.byte_range('items=0-1'))
+        self.assertIsNone(self.byte_range('bytes=0-9', HTTP_IF_RANGE='"other"'))
+        self.assertEqual(self.byte_range('bytes=0-9', HTTP_IF_RANGE='"e"'), (0, 9))
+
+    def test_unsatisfiable(self):
+        for header in ('bytes=100-', 'bytes=9-5', 'bytes=-0'):
+            with self.subTest(header=header), self.assertRaises(RangeNotSatisfiable):
+                self.byte_range(header)
+
+
+class ServeTests(MediaRootMixin, SimpleTestCase):
+    def get(self, **extra):
+        return serve(RequestFactory().get(f'/media/{NAME}', **extra), NAME)
+
+    def test_whole_file(self):
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_range_gets_206(self):
+        response = self.get(HTTP_RANGE='bytes=10-19')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/1024')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[10:20])
+
+    def test_unsatisfiable_range_gets_416(self):
+        response = self.get(HTTP_RANGE='bytes=5000-')
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+
+    def test_matching_etag_gets_304(self):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_names_outside_media_root_are_not_found(self):
+        for name in ('../settings.py', 'proofs/../../x', '/etc/passwd', 'proofs/./slip.png', 'missing.png'):
+            with self.subTest(name=name), self.assertRaises(Http404):
+                serve(RequestFactory().get('/'), name)
+
+    @override_settings(MEDIA_SERVE_MODE='x-accel', MEDIA_ACCEL_PREFIX='/internal/')
+    def test_x_accel(self):
+        response = self.get()
+        self.assertEqual(response['X-Accel-Redirect'], f'/internal/{NAME}')
+        self.assertEqual(response.content, b'')
+
+    @override_settings(MEDIA_SERVE_MODE='x-sendfile')
+    def test_x_sendfile(self):
+        response = self.get()
+        self.assertEqual(response['X-Sendfile'], default_storage.path(NAME))
+        self.assertEqual(response.content, b'')
+
+
+class ProtectedMediaViewTests(MediaRootMixin, TestCase):
+    url = f'/media/{NAME}'
+
+    def test_anonymous_without_signature_gets_403(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_signed_url_is_served(self):
+        response = self.client.get(signed_media_url(NAME))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+
+    def test_signed_url_with_range(self):
+        response = self.client.get(signed_media_url(NAME), HTTP_RANGE='bytes=-4')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[-4:])
+
+    def test_signature_is_for_one_file(self):
+        default_storage.save('proofs/other.png', ContentFile(b'other'))
+        query = signed_media_url(NAME).partition('?')[2]
+        self.assertEqual(self.client.get(f'/media/proofs/other.png?{query}').status_code, 403)
+
+    def test_tampered_signature_gets_403(self):
+        url = signed_media_url(NAME)
+        self.assertEqual(self.client.get(url[:-1] + ('A' if url[-1] != 'A' else 'B')).status_code, 403)
+
+    def test_expired_signature_gets_403(self):
+        url = signed_media_url(NAME)
+        with mock.patch.object(media.time, 'time', return_value=media.time.time() + 3 * 3600):
+            self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_staff_need_no_signature(self):
+        self.client.force_login(User.objects.create_user('staff', is_staff=True))
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_traversal_is_refused(self):
+        self.client.force_login(User.objects.create_user('staff', is_staff=True))
+        self.assertEqual(self.client.get('/media/proofs/../../manage.py').status_code, 404)
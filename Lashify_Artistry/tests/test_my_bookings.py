@@ -0,0 +1,100 @@
+from datetime import date, timedelta
+
+from django.core import signing
+from django.test import TestCase, override_settings
+
+from Lashify_Artistry.links import make_my_bookings_token, my_bookings_url, read_my_bookings_token
+from Lashify_Artistry.models import Booking
+from Lashify_Artistry.views import MY_BOOKINGS_PAGE_SIZE
+
+
+def add_bookings(email, days, per_day=1):
+    """``per_day`` bookings on each of ``days`` consecutive days; no capacity or emails."""
+    first = date(2031, 1, 1)
+    Booking.objects.bulk_create([
+        Booking(name="Ada", email=email, service='C_lashes', date=first + timedelta(days=day))
+        for day in range(days)
+        for _ in range(per_day)
+    ])
+
+
+class MyBookingsLinkTests(TestCase):
+    def test_token_round_trip(self):
+        self.assertEqual(read_my_bookings_token(make_my_bookings_token('ada@example.com')), 'ada@example.com')
+
+    def test_tampered_token_is_rejected(self):
+        # Bo's email with the timestamp and signature from Ada's token
+        ada = make_my_bookings_token('ada@example.com').split(':')
+        bo = make_my_bookings_token('bo@example.com').split(':')
+        tampered = ':'.join([bo[0], *ada[1:]])
+
+        self.assertIsNone(read_my_bookings_token(tampered))
+        self.assertIsNone(read_my_bookings_token('not-a-token'))
+        self.assertEqual(self.client.get(f"/my-bookings/{tampered}/").status_code, 404)
+
+    def test_token_for_another_salt_is_rejected(self):
+        self.assertIsNone(read_my_bookings_token(signing.dumps('ada@example.com')))
+
+    @override_settings(MY_BOOKINGS_LINK_MAX_AGE=-1)
+    def test_expired_token_is_rejected(self):
+        self.assertIsNone(read_my_bookings_token(make_my_bookings_token('ada@example.com')))
+
+
+class MyBookingsPagingTests(TestCase):
+    def pages(self, email):
+        """Follow ``next`` links; the list of pages of references."""
+        url, pages = my_bookings_url(email) + '?format=json', []
+        while url:
+            data = self.client.get(url).json()
+            pages.append([(b['date'], b['reference']) for b in data['bookings']])
+            url = data['next']
+        return pages
+
+    def test_pages_cover_every_booking_once_newest_first(self):
+        add_bookings('ada@example.com', days=2 * MY_BOOKINGS_PAGE_SIZE + 5)
+
+        pages = self.pages('ada@example.com')
+
+        self.assertEqual([len(page) for page in pages], [MY_BOOKINGS_PAGE_SIZE, MY_BOOKINGS_PAGE_SIZE, 5])
+        rows = [row for page in pages for row in page]
+        self.assertEqual(len(set(rows)), len(rows))
+        self.assertEqual([day for day, _ref in rows], sorted((day for day, _ref in rows), reverse=True))
+
+    def test_page_boundary_inside_one_day(self):
+        # Several bookings share each date, so pages split within a day
+        add_bookings('ada@example.com', days=7, per_day=3)
+
+        pages = self.pages('ada@example.com')
+
+        rows = [row for page in pages for row in page]
+        self.assertEqual(len(rows), 21)
+        self.assertEqual(len(set(rows)), 21)
+
+    def test_exact_page_has_no_next_link(self):
+        add_bookings('ada@example.com', days=MY_BOOKINGS_PAGE_SIZE)
+
+        data = self.client.get(my_bookings_url('ada@example.com') + '?format=json').json()
+
+        self.assertEqual(len(data['bookings']), MY_BOOKINGS_PAGE_SIZE)
+        self.assertIsNone(data['next'])
+
+    def test_only_the_signed_email_is_listed(self):
+        add_bookings('ada@example.com', days=2)
+        add_bookings('bo@example.com', days=3)
+
+        self.assertEqual(sum(len(page) for page in self.pages('ada@example.com')), 2)
+
+    def test_malformed_cursor_starts_from_the_first_page(self):
+        add_bookings('ada@example.com', days=3)
+
+        data = self.client.get(my_bookings_url('ada@example.com') + '?format=json&after=nonsense').json()
+
+        self.assertEqual(len(data['bookings']), 3)
+
+    def test_html_page_renders(self):
+        add_bookings('ada@example.com', days=2)
+
+        response = self.client.get(my_bookings_url('ada@example.com'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['bookings']), 2)
@@ -0,0 +1,53 @@
+from datetime import date
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from Lashify_Artistry import notifications, outbox
+from Lashify_Artistry.models import Booking, OutboundEmail
+from Lashify_Artistry.notifications import BOOKING_CREATED, CUSTOMER_CONFIRMED, dedupe_key, dispatch
+
+
+@override_settings(ADMIN_EMAILS=['owner@example.com'])
+class NotificationTests(TestCase):
+    def setUp(self):
+        self.booking = Booking(name="Ada", email="ada@example.com", service='C_lashes', date=date(2031, 5, 1))
+        self.booking.save()
+
+    def test_dedupe_key_ignores_recipient_case_order_and_spaces(self):
+        self.assertEqual(
+            dedupe_key(BOOKING_CREATED, self.booking, ['B@example.com', ' a@example.com']),
+            dedupe_key(BOOKING_CREATED, self.booking, ['a@example.com', 'b@example.com']),
+        )
+
+    def test_dedupe_key_differs_by_event_booking_and_recipients(self):
+        other = Booking(name="Bo", email="bo@example.com", service='C_lashes', date=date(2031, 5, 2))
+        other.save()
+        key = dedupe_key(BOOKING_CREATED, self.booking, ['a@example.com'])
+
+        self.assertNotEqual(key, dedupe_key(CUSTOMER_CONFIRMED, self.booking, ['a@example.com']))
+        self.assertNotEqual(key, dedupe_key(BOOKING_CREATED, other, ['a@example.com']))
+        self.assertNotEqual(key, dedupe_key(BOOKING_CREATED, self.booking, ['b@example.com']))
+
+    def test_new_booking_queues_admin_and_customer_emails(self):
+        recipients = sorted(tuple(row.to) for row in OutboundEmail.objects.filter(event=BOOKING_CREATED))
+        self.assertEqual(recipients, [('ada@example.com',), ('owner@example.com',)])
+
+    def test_dispatching_an_event_again_queues_nothing(self):
+        self.assertEqual(dispatch(BOOKING_CREATED, self.booking), [])
+        self.assertEqual(OutboundEmail.objects.filter(event=BOOKING_CREATED).count(), 2)
+
+    def test_force_skips_deduplication(self):
+        self.assertEqual(len(dispatch(BOOKING_CREATED, self.booking, force=True)), 2)
+        self.assertEqual(OutboundEmail.objects.filter(event=BOOKING_CREATED).count(), 4)
+
+    def test_dispatch_many_skips_queued_keys(self):
+        self.assertEqual(notifications.dispatch_many(BOOKING_CREATED, [self.booking]), 0)
+        self.assertEqual(notifications.dispatch_many(CUSTOMER_CONFIRMED, [self.booking]), 1)
+
+    def test_booking_and_emails_roll_back_together(self):
+        with mock.patch.object(outbox, 'enqueue', side_effect=RuntimeError("outbox down")):
+            with self.assertRaises(RuntimeError):
+                Booking(name="Cy", email="cy@example.com", service='C_lashes', date=date(2031, 5, 3)).save()
+
+        self.assertFalse(Booking.objects.filter(email="cy@example.com").exists())
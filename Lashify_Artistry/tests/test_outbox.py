@@ -0,0 +1,167 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.db import transaction
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from Lashify_Artistry import outbox
+from Lashify_Artistry.models import OutboundEmail
+
+
+class FailingBackend:
+    """A mail connection whose every send fails."""
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        raise ConnectionError("SMTP is down")
+
+
+@override_settings(
+    EMAIL_OUTBOX_LEASE_SECONDS=300,
+    EMAIL_OUTBOX_RETRY_BASE_SECONDS=30,
+    EMAIL_OUTBOX_RETRY_MAX_SECONDS=3600,
+    EMAIL_OUTBOX_MAX_ATTEMPTS=3,
+)
+class OutboxTests(TestCase):
+    def queue(self, count=1):
+        return [outbox.enqueue(f"Subject {i}", "Body", [f"to{i}@example.com"]) for i in range(count)]
+
+    def make_due(self):
+        OutboundEmail.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+
+    # ------------------------------
+    # Claiming
+    # ------------------------------
+
+    def test_claim_leases_due_rows(self):
+        self.queue(3)
+        before = timezone.now()
+
+        claimed = outbox._claim_batch(10)
+
+        self.assertEqual(len(claimed), 3)
+        for row in OutboundEmail.objects.all():
+            self.assertGreaterEqual(row.next_attempt_at, before + timedelta(seconds=300))
+        # Leased rows are not due, so a second worker gets nothing
+        self.assertEqual(outbox._claim_batch(10), [])
+
+    def test_claim_respects_batch_size_and_order(self):
+        first, second, third = self.queue(3)
+        self.assertEqual([row.pk for row in outbox._claim_batch(2)], [first.pk, second.pk])
+        self.assertEqual([row.pk for row in outbox._claim_batch(2)], [third.pk])
+
+    def test_expired_lease_is_claimed_again(self):
+        self.queue(1)
+        self.assertEqual(len(outbox._claim_batch(10)), 1)
+        self.make_due()
+        self.assertEqual(len(outbox._claim_batch(10)), 1)
+
+    def test_rows_are_never_claimed_twice(self):
+        self.queue(2)
+        update = QuerySet.update
+        raced = []
+        other_worker = []
+
+        def racing_update(queryset, **kwargs):
+            # Another worker claims everything after this one read its candidates
+            if not raced:
+                raced.append(True)
+                other_worker.extend(outbox._claim_batch(10))
+            return update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', racing_update):
+            claimed = outbox._claim_batch(10)
+
+        self.assertEqual(claimed, [])
+        self.assertEqual(len(other_worker), 2)
+
+    def test_sent_and_failed_rows_are_not_claimed(self):
+        sent, failed = self.queue(2)
+        OutboundEmail.objects.filter(pk=sent.pk).update(status=OutboundEmail.STATUS_SENT)
+        OutboundEmail.objects.filter(pk=failed.pk).update(status=OutboundEmail.STATUS_FAILED)
+        self.assertEqual(outbox._claim_batch(10), [])
+
+    # ------------------------------
+    # Delivery
+    # ------------------------------
+
+    def test_send_pending_delivers_and_marks_sent(self):
+        self.queue(2)
+
+        self.assertEqual(outbox.send_pending(), (2, 0))
+
+        self.assertEqual(len(mail.outbox), 2)
+        for row in OutboundEmail.objects.all():
+            self.assertEqual(row.status, OutboundEmail.STATUS_SENT)
+            self.assertEqual(row.attempts, 1)
+            self.assertIsNotNone(row.sent_at)
+        self.assertEqual(outbox.send_pending(), (0, 0))
+
+    def test_retry_delay_doubles_up_to_the_cap(self):
+        self.assertEqual(outbox.retry_delay(1), timedelta(seconds=30))
+        self.assertEqual(outbox.retry_delay(2), timedelta(seconds=60))
+        self.assertEqual(outbox.retry_delay(3), timedelta(seconds=120))
+        self.assertEqual(outbox.retry_delay(20), timedelta(seconds=3600))
+
+    def test_failure_is_retried_with_backoff(self):
+        (row,) = self.queue(1)
+        before = timezone.now()
+
+        self.assertEqual(outbox.send_pending(connection=FailingBackend()), (0, 1))
+
+        row.refresh_from_db()
+        self.assertEqual(row.status, OutboundEmail.STATUS_PENDING)
+        self.assertEqual(row.attempts, 1)
+        self.assertIn("SMTP is down", row.last_error)
+        self.assertGreaterEqual(row.next_attempt_at, before + timedelta(seconds=30))
+        self.assertLess(row.next_attempt_at, before + timedelta(seconds=60))
+        # Not due until the backoff has passed
+        self.assertEqual(outbox.send_pending(connection=FailingBackend()), (0, 0))
+
+    def test_gives_up_after_max_attempts(self):
+        (row,) = self.queue(1)
+        for _attempt in range(3):
+            self.make_due()
+            outbox.send_pending(connection=FailingBackend())
+
+        row.refresh_from_db()
+        self.assertEqual(row.status, OutboundEmail.STATUS_FAILED)
+        self.assertEqual(row.attempts, 3)
+        self.make_due()
+        self.assertEqual(outbox.send_pending(connection=FailingBackend()), (0, 0))
+
+    def test_success_after_a_failure_clears_the_error(self):
+        (row,) = self.queue(1)
+        outbox.send_pending(connection=FailingBackend())
+        self.make_due()
+
+        self.assertEqual(outbox.send_pending(), (1, 0))
+
+        row.refresh_from_db()
+        self.assertEqual(row.status, OutboundEmail.STATUS_SENT)
+        self.assertEqual(row.attempts, 2)
+        self.assertEqual(row.last_error, '')
+
+    # ------------------------------
+    # Queueing
+    # ------------------------------
+
+    def test_enqueue_writes_in_the_callers_transaction(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.queue(1)
+                raise RuntimeError
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    def test_enqueue_skips_a_queued_dedupe_key(self):
+        self.assertIsNotNone(outbox.enqueue("S", "B", ["a@example.com"], dedupe_key='k'))
+        self.assertIsNone(outbox.enqueue("S", "B", ["a@example.com"], dedupe_key='k'))
+        self.assertEqual(OutboundEmail.objects.count(), 1)
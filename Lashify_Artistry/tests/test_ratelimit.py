@@ -0,0 +1,167 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from Lashify_Artistry.models import RateLimitBucket
+from Lashify_Artistry.ratelimit import (
+    CacheBackend, DatabaseBackend, LocalBackend, RateLimitMiddleware, client_ip,
+)
+
+NOW = 1_800_000_000.0
+PER_SECOND = 1 / 60  # one token a minute
+
+
+class BackendContract:
+    """Token bucket behaviour every backend must have."""
+
+    def make_backend(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.backend = self.make_backend()
+        clock = mock.patch('Lashify_Artistry.ratelimit.time')
+        self.clock = clock.start().time
+        self.clock.return_value = NOW
+        self.addCleanup(clock.stop)
+
+    def consume(self, key='k'):
+        return self.backend.consume(key, 3, PER_SECOND)
+
+    def test_burst_then_limited(self):
+        self.assertEqual([self.consume() for _ in range(3)], [(True, 0)] * 3)
+
+        allowed, retry_after = self.consume()
+
+        self.assertFalse(allowed)
+        self.assertEqual(retry_after, 60)
+
+    def test_tokens_refill_over_time(self):
+        for _ in range(3):
+            self.consume()
+        self.clock.return_value = NOW + 30
+        allowed, retry_after = self.consume()
+        self.assertFalse(allowed)
+        self.assertEqual(retry_after, 30)
+
+        self.clock.return_value = NOW + 60
+        self.assertEqual(self.consume(), (True, 0))
+        self.assertFalse(self.consume()[0])
+
+    def test_refill_stops_at_the_burst(self):
+        self.consume()
+        self.clock.return_value = NOW + 60 * 60
+        self.assertEqual([self.consume()[0] for _ in range(4)], [True, True, True, False])
+
+    def test_keys_are_independent(self):
+        for _ in range(3):
+            self.consume('a')
+        self.assertEqual(self.consume('b'), (True, 0))
+
+
+class LocalBackendTests(BackendContract, SimpleTestCase):
+    def make_backend(self):
+        return LocalBackend()
+
+    def test_oldest_buckets_are_evicted(self):
+        self.backend.max_entries = 2
+        for key in 'abc':
+            self.consume(key)
+        self.assertEqual(list(self.backend._buckets), ['b', 'c'])
+
+
+@override_settings(RATE_LIMIT_CACHE_ALIAS='default')
+class CacheBackendTests(BackendContract, SimpleTestCase):
+    def make_backend(self):
+        caches['default'].clear()
+        return CacheBackend()
+
+
+class DatabaseBackendTests(BackendContract, TestCase):
+    def make_backend(self):
+        return DatabaseBackend()
+
+    def test_one_row_per_key(self):
+        for _ in range(5):
+            self.consume()
+        self.assertEqual(RateLimitBucket.objects.filter(key='k').count(), 1)
+
+    def test_idle_buckets_are_pruned(self):
+        self.backend.prune_every = 1
+        self.consume('old')
+        self.clock.return_value = NOW + 2 * 24 * 60 * 60
+        self.consume('new')
+        self.assertEqual(list(RateLimitBucket.objects.values_list('key', flat=True)), ['new'])
+
+
+# ------------------------------
+# Middleware
+# ------------------------------
+
+@override_settings(
+    RATE_LIMITS={'create_booking': {'ip': (2, 60), 'email': (1, 60)}},
+    RATE_LIMIT_BACKEND='Lashify_Artistry.ratelimit.LocalBackend',
+    RATE_LIMIT_MAX_CONCURRENT=2,
+    RATE_LIMIT_PROXY_COUNT=0,
+)
+class RateLimitMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.middleware = RateLimitMiddleware(lambda request: HttpResponse("ok"))
+
+    def post(self, email='', ip='10.0.0.1', path='/create-booking/', **extra):
+        request = RequestFactory().post(path, {'email': email} if email else {}, REMOTE_ADDR=ip, **extra)
+        return self.middleware(request)
+
+    def test_ip_limit_answers_429_with_retry_after(self):
+        self.assertEqual([self.post().status_code for _ in range(2)], [200, 200])
+
+        response = self.post()
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '60')
+
+    def test_other_clients_are_not_limited(self):
+        self.post(), self.post(), self.post()
+        self.assertEqual(self.post(ip='10.0.0.2').status_code, 200)
+
+    def test_email_limit_applies_across_ips(self):
+        self.assertEqual(self.post(email='Ada@Example.com', ip='10.0.0.1').status_code, 200)
+
+        response = self.post(email='ada@example.com ', ip='10.0.0.2')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    def test_gets_and_other_paths_are_not_limited(self):
+        for _ in range(5):
+            self.assertEqual(self.middleware(RequestFactory().get('/create-booking/')).status_code, 200)
+            self.assertEqual(self.post(path='/my-bookings/').status_code, 200)
+
+    def test_no_free_slot_answers_503(self):
+        self.middleware.in_flight.acquire()
+        self.middleware.in_flight.acquire()
+        self.addCleanup(self.middleware.in_flight.release)
+        self.addCleanup(self.middleware.in_flight.release)
+
+        response = self.post()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+
+    @override_settings(RATE_LIMIT_PROXY_COUNT=1)
+    def test_clients_behind_one_proxy_have_their_own_buckets(self):
+        def post(client):
+            return self.post(ip='10.0.0.254', HTTP_X_FORWARDED_FOR=client).status_code
+
+        self.assertEqual([post('1.1.1.1') for _ in range(3)], [200, 200, 429])
+        self.assertEqual([post('2.2.2.2') for _ in range(2)], [200, 200])
+
+    @override_settings(RATE_LIMIT_PROXY_COUNT=1)
+    def test_client_ip_counts_proxies_from_the_right(self):
+        request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.9', HTTP_X_FORWARDED_FOR='6.6.6.6, 1.2.3.4')
+        self.assertEqual(client_ip(request), '1.2.3.4')
+
+    def test_forwarded_for_is_ignored_without_proxies(self):
+        request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.9', HTTP_X_FORWARDED_FOR='6.6.6.6')
+        self.assertEqual(client_ip(request), '10.0.0.9')
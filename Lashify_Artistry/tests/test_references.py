@@ -0,0 +1,92 @@
+from datetime import date
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from Lashify_Artistry import references
+from Lashify_Artistry.models import Booking
+from Lashify_Artistry.references import (
+    ALPHABET, LENGTH, allocate_references, is_valid_reference, new_reference, normalize_reference,
+)
+
+
+class ReferenceFormatTests(SimpleTestCase):
+    def setUp(self):
+        # Forget the last (ms, random) pair so mocked clocks start clean
+        references._reset_state()
+
+    def test_format(self):
+        reference = new_reference()
+
+        self.assertEqual(len(reference), LENGTH)
+        self.assertTrue(set(reference) <= set(ALPHABET))
+        self.assertFalse(set(reference) & set('ILOU'))
+        self.assertTrue(is_valid_reference(reference))
+
+    def test_time_prefix_encodes_milliseconds(self):
+        with mock.patch.object(references.time, 'time', return_value=1_800_000_000.123):
+            reference = new_reference()
+
+        ms = 0
+        for char in reference[:references.TIME_CHARS]:
+            ms = ms * 32 + ALPHABET.index(char)
+        self.assertEqual(ms, 1_800_000_000_123)
+
+    def test_references_increase_within_one_millisecond(self):
+        with mock.patch.object(references.time, 'time', return_value=1_800_000_000.0):
+            made = [new_reference() for _ in range(50)] + allocate_references(50)
+
+        self.assertEqual(made, sorted(made))
+        self.assertEqual(len(set(made)), 100)
+
+    def test_references_sort_by_time(self):
+        with mock.patch.object(references.time, 'time', return_value=1_800_000_000.0):
+            earlier = new_reference()
+        with mock.patch.object(references.time, 'time', return_value=1_800_000_000.001):
+            later = new_reference()
+        self.assertLess(earlier, later)
+
+    # ------------------------------
+    # Checksum
+    # ------------------------------
+
+    def test_every_single_character_typo_is_caught(self):
+        reference = new_reference()
+        for position in range(LENGTH):
+            for char in ALPHABET:
+                if char == reference[position]:
+                    continue
+                typo = reference[:position] + char + reference[position + 1:]
+                self.assertFalse(is_valid_reference(typo), typo)
+
+    def test_wrong_length_and_foreign_characters_are_invalid(self):
+        reference = new_reference()
+        self.assertFalse(is_valid_reference(reference[:-1]))
+        self.assertFalse(is_valid_reference(reference + '0'))
+        self.assertFalse(is_valid_reference('U' + reference[1:]))
+        self.assertFalse(is_valid_reference(''))
+
+    def test_normalize_forgives_case_hyphens_and_misreadings(self):
+        reference = new_reference()
+        typed = '-'.join([reference[:5], reference[5:10], reference[10:]]).lower()
+        typed = typed.replace('0', 'o').replace('1', 'l')
+
+        self.assertEqual(normalize_reference(typed), reference)
+        self.assertEqual(normalize_reference(None), '')
+
+
+class BookingReferenceTests(TestCase):
+    def test_new_bookings_get_valid_references(self):
+        booking = Booking(name="Ada", email="ada@example.com", service='C_lashes', date=date(2031, 5, 1))
+        booking.save()
+        self.assertTrue(is_valid_reference(booking.reference))
+
+    def test_lookup_accepts_a_mistyped_reference(self):
+        booking = Booking(name="Ada", email="ada@example.com", service='C_lashes', date=date(2031, 5, 1))
+        booking.save()
+
+        response = self.client.post('/my-bookings/', {
+            'email': 'ADA@example.com', 'reference': booking.reference.lower().replace('0', 'o'),
+        })
+
+        self.assertEqual(response.status_code, 302)
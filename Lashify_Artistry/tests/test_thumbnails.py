@@ -0,0 +1,125 @@
+from datetime import date
+from io import StringIO
+from unittest import mock
+import io
+import os
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from Lashify_Artistry import thumbnails
+from Lashify_Artistry.models import Booking
+from Lashify_Artistry.thumbnails import ensure_rendition, rendition_name, rendition_url
+
+SOURCE = 'proofs/proof.jpg'
+
+
+def jpeg(size=(800, 600), color='red'):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'JPEG')
+    return ContentFile(buffer.getvalue())
+
+
+class RenditionTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        settings = override_settings(MEDIA_ROOT=root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def booking(self, proof=SOURCE, slip=None, day=1):
+        booking = Booking(name="Ada", email="ada@example.com", service='C_lashes', date=date(2031, 5, day))
+        booking.save()
+        for field, name in (('payment_proof', proof), ('verification_slip', slip)):
+            if name and not default_storage.exists(name):
+                default_storage.save(name, jpeg())
+        # Straight to the database, so save() doesn't render them on commit
+        Booking.objects.filter(pk=booking.pk).update(payment_proof=proof, verification_slip=slip)
+        booking.refresh_from_db()
+        return booking
+
+    def test_rendition_fits_its_box(self):
+        name = ensure_rendition(self.booking().payment_proof, 'thumb')
+
+        self.assertRegex(name, r'^renditions/thumb/proof\.[0-9a-f]{10}\.jpg$')
+        with default_storage.open(name) as f, Image.open(f) as image:
+            self.assertEqual((image.format, image.size), ('JPEG', (100, 75)))
+
+    def test_existing_rendition_is_reused(self):
+        proof = self.booking().payment_proof
+        ensure_rendition(proof, 'preview')
+
+        with mock.patch.object(thumbnails, '_render') as render:
+            ensure_rendition(proof, 'preview')
+            render.assert_not_called()
+            render.return_value = b'new'
+            ensure_rendition(proof, 'preview', force=True)
+            render.assert_called_once()
+
+    def test_replacing_the_source_changes_the_name(self):
+        proof = self.booking().payment_proof
+        before = ensure_rendition(proof, 'thumb')
+
+        default_storage.delete(SOURCE)
+        default_storage.save(SOURCE, jpeg(color='blue'))
+        path = default_storage.path(SOURCE)
+        os.utime(path, (os.path.getatime(path), os.path.getmtime(path) + 10))
+        after = ensure_rendition(proof, 'thumb')
+
+        self.assertNotEqual(after, before)
+        self.assertTrue(default_storage.exists(after))
+
+    def test_sizes_get_their_own_names(self):
+        proof = self.booking().payment_proof
+        self.assertNotEqual(rendition_name(proof, 'thumb'), rendition_name(proof, 'preview'))
+
+    def test_unreadable_source_gives_none(self):
+        default_storage.save('proofs/broken.jpg', ContentFile(b'not an image'))
+        proof = self.booking(proof='proofs/broken.jpg').payment_proof
+
+        with self.assertLogs('Lashify_Artistry.thumbnails', 'WARNING'):
+            self.assertIsNone(ensure_rendition(proof, 'thumb'))
+            self.assertIsNone(rendition_url(proof, 'thumb'))
+
+    def test_url_is_signed(self):
+        url = rendition_url(self.booking().payment_proof, 'thumb')
+        self.assertRegex(url, r'^/media/renditions/thumb/.+\?expires=\d+&sig=')
+
+    # ------------------------------
+    # generate_thumbnails
+    # ------------------------------
+
+    def generate(self, *args):
+        out = StringIO()
+        call_command('generate_thumbnails', *args, stdout=out)
+        return out.getvalue()
+
+    def test_command_renders_every_image(self):
+        proof = self.booking(slip='verification_slips/slip.jpg').payment_proof
+        self.booking(proof=None, day=2)
+        default_storage.save('proofs/broken.jpg', ContentFile(b'not an image'))
+        self.booking(proof='proofs/broken.jpg', day=3)
+
+        with self.assertLogs('Lashify_Artistry.thumbnails', 'WARNING'):
+            output = self.generate()
+
+        self.assertIn("3 images checked, 4 renditions ready, 2 failed.", output)
+        for rendition in thumbnails.RENDITIONS:
+            self.assertTrue(default_storage.exists(rendition_name(proof, rendition)))
+
+    def test_command_force_rerenders(self):
+        self.booking()
+        self.generate()
+
+        with mock.patch.object(thumbnails, '_render', return_value=b'new') as render:
+            self.generate()
+            render.assert_not_called()
+            self.generate('--force')
+
+        self.assertEqual(render.call_count, len(thumbnails.RENDITIONS))
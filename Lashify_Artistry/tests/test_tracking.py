@@ -0,0 +1,86 @@
+from datetime import date
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from Lashify_Artistry.models import Booking, OutboundEmail
+from Lashify_Artistry.notifications import PAYMENT_VERIFIED
+
+
+def booking_queries(queries, verb):
+    return [q['sql'] for q in queries if q['sql'].startswith(verb) and 'Lashify_Artistry_booking"' in q['sql']]
+
+
+class TrackedFieldsTests(TestCase):
+    def setUp(self):
+        Booking(name="Ada", email="ada@example.com", service='C_lashes', date=date(2031, 5, 1)).save()
+        self.booking = Booking.objects.get()
+
+    def test_loaded_values_are_snapshotted(self):
+        self.assertEqual(self.booking.get_loaded_value('paid'), False)
+        self.assertEqual(self.booking.get_field_changes(), {})
+
+        self.booking.paid = True
+
+        self.assertEqual(self.booking.get_field_changes(), {'paid': (False, True)})
+
+    def test_save_does_not_reread_the_row(self):
+        self.booking.name = "Ada L."
+        with CaptureQueriesContext(connection) as ctx:
+            self.booking.save()
+
+        self.assertEqual(booking_queries(ctx.captured_queries, 'SELECT'), [])
+        self.assertEqual(len(booking_queries(ctx.captured_queries, 'UPDATE')), 1)
+
+    def test_update_fields_writes_and_snapshots_only_those_fields(self):
+        self.booking.paid = True
+        self.booking.payment_verified = True
+        with CaptureQueriesContext(connection) as ctx:
+            self.booking.save(update_fields=['paid'])
+
+        (update,) = booking_queries(ctx.captured_queries, 'UPDATE')
+        self.assertIn('"paid"', update)
+        self.assertNotIn('"payment_verified"', update)
+        self.assertNotIn('"name"', update)
+        # payment_verified was not written, so it still counts as changed
+        self.assertEqual(self.booking.get_field_changes(), {'payment_verified': (False, True)})
+        self.assertEqual(Booking.objects.values_list('paid', 'payment_verified').get(), (True, False))
+
+    def test_save_resets_the_snapshot(self):
+        self.booking.paid = True
+        self.booking.save()
+
+        self.assertEqual(self.booking.get_loaded_value('paid'), True)
+        self.assertEqual(self.booking.get_field_changes(), {})
+
+    def test_refresh_from_db_resets_the_snapshot(self):
+        Booking.objects.update(paid=True)
+        self.booking.refresh_from_db(fields=['paid'])
+
+        self.assertEqual(self.booking.get_loaded_value('paid'), True)
+        self.assertEqual(self.booking.get_field_changes(), {})
+
+    def test_hand_built_instance_reads_old_values_once(self):
+        copy = Booking(pk=self.booking.pk, paid=True)
+        copy._state.adding = False
+        with CaptureQueriesContext(connection) as ctx:
+            changes = copy.get_field_changes()
+
+        self.assertEqual(changes['paid'], (False, True))
+        self.assertEqual(len(booking_queries(ctx.captured_queries, 'SELECT')), 1)
+
+    def test_paid_transition_queues_the_email_once(self):
+        self.booking.verification_slip = 'verification_slips/slip.jpg'
+        self.booking.paid = True
+        self.booking.save()
+        self.booking.save()
+
+        self.assertEqual(OutboundEmail.objects.filter(event=PAYMENT_VERIFIED).count(), 1)
+
+    def test_unchanged_save_queues_nothing(self):
+        self.booking.verification_slip = 'verification_slips/slip.jpg'
+        self.booking.name = "Ada L."
+        self.booking.save()
+
+        self.assertFalse(OutboundEmail.objects.filter(event=PAYMENT_VERIFIED).exists())
@@ -0,0 +1,170 @@
+from datetime import date
+from unittest import mock
+import io
+import shutil
+import tempfile
+
+from django.contrib.admin.sites import site
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from PIL import Image
+
+from Lashify_Artistry import uploads
+from Lashify_Artistry.forms import BookingAdminForm
+from Lashify_Artistry.models import Booking
+from Lashify_Artistry.uploads import normalize_image
+
+GPS_IFD = 0x8825
+ORIENTATION = 0x0112
+
+
+def image_file(size=(300, 200), format='JPEG', mode='RGB', name='proof.jpg', orientation=None):
+    image = Image.new(mode, size, 'red')
+    exif = Image.Exif()
+    exif[0x010F] = 'PhoneMaker'  # camera make
+    exif[GPS_IFD] = {2: (6.0, 27.0, 0.0)}  # latitude
+    if orientation:
+        exif[ORIENTATION] = orientation
+    buffer = io.BytesIO()
+    image.save(buffer, format, **({'exif': exif} if format == 'JPEG' else {}))
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f'image/{format.lower()}')
+
+
+def opened(content_file):
+    return Image.open(io.BytesIO(content_file.read()))
+
+
+class TempMediaMixin:
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        settings = override_settings(MEDIA_ROOT=root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+
+@override_settings(UPLOAD_MAX_DIMENSION=1600, UPLOAD_MAX_BYTES=10 * 1024 * 1024)
+class NormalizeImageTests(SimpleTestCase):
+    def test_exif_is_dropped(self):
+        source = image_file()
+        self.assertIn(GPS_IFD, Image.open(source).getexif())
+
+        with opened(normalize_image(source)) as image:
+            self.assertEqual(dict(image.getexif()), {})
+
+    def test_large_images_are_downscaled(self):
+        with opened(normalize_image(image_file((3000, 2000)))) as image:
+            self.assertEqual(image.size, (1600, 1067))
+
+    def test_exif_orientation_is_applied_before_it_is_dropped(self):
+        # 6: the camera was turned, the pixels need a quarter turn
+        with opened(normalize_image(image_file((3000, 2000), orientation=6))) as image:
+            self.assertEqual(image.size, (1067, 1600))
+
+    def test_small_images_keep_their_size(self):
+        with opened(normalize_image(image_file((300, 200)))) as image:
+            self.assertEqual(image.size, (300, 200))
+
+    def test_other_formats_become_rgb_jpeg(self):
+        normalized = normalize_image(image_file(format='PNG', mode='RGBA', name='slip.png'))
+
+        self.assertEqual(normalized.name, 'slip.jpg')
+        with opened(normalized) as image:
+            self.assertEqual((image.format, image.mode), ('JPEG', 'RGB'))
+
+    def test_upload_can_be_read_again_afterwards(self):
+        source = image_file()
+        normalize_image(source)
+        self.assertEqual(source.tell(), 0)
+
+    def test_not_an_image(self):
+        with self.assertRaisesMessage(ValidationError, "not a valid image"):
+            normalize_image(SimpleUploadedFile('proof.jpg', b'%PDF-1.4 not really'))
+
+    def test_unsupported_format(self):
+        with self.assertRaisesMessage(ValidationError, "Please upload a JPEG"):
+            normalize_image(image_file(format='BMP', name='proof.bmp'))
+
+    @override_settings(UPLOAD_MAX_PIXELS=100 * 100)
+    def test_too_many_pixels(self):
+        with self.assertRaisesMessage(ValidationError, "dimensions are too large"):
+            normalize_image(image_file((200, 200)))
+
+    @override_settings(UPLOAD_MAX_BYTES=100)
+    def test_too_many_bytes(self):
+        with self.assertRaisesMessage(ValidationError, "too large"):
+            normalize_image(image_file())
+
+
+@override_settings(RATE_LIMITS={})
+class CreateBookingUploadTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        caches['idempotency'].clear()
+
+    def post(self, proof):
+        return self.client.post('/create-booking/', {
+            'name': 'Ada', 'email': 'ada@example.com', 'service': 'C_lashes',
+            'date': date(2031, 5, 1).isoformat(), 'payment_proof': proof,
+        })
+
+    def test_proof_is_stored_as_original_and_normalized_copy(self):
+        response = self.post(image_file((3000, 2000)))
+
+        self.assertEqual(response.status_code, 200)
+        booking = Booking.objects.get()
+        self.assertTrue(booking.payment_proof_original.name.startswith('proofs/originals/proof'))
+        with Image.open(booking.payment_proof) as image:
+            self.assertEqual((image.size, dict(image.getexif())), ((1600, 1067), {}))
+
+    @override_settings(UPLOAD_MAX_BYTES=2000)
+    def test_oversized_proof_is_dropped_while_streaming(self):
+        with mock.patch.object(uploads, 'normalize_image') as normalize:
+            response = self.post(SimpleUploadedFile('proof.jpg', b'\xff' * 50_000))
+
+        self.assertContains(response, "too large", status_code=400)
+        normalize.assert_not_called()
+        self.assertFalse(Booking.objects.exists())
+
+    def test_non_image_gets_the_400_page(self):
+        response = self.post(SimpleUploadedFile('proof.jpg', b'<?php echo 1; ?>'))
+
+        self.assertContains(response, "not a valid image", status_code=400)
+        self.assertFalse(Booking.objects.exists())
+
+
+class AdminSlipUploadTests(TempMediaMixin, TestCase):
+    def test_slip_is_normalized_once(self):
+        booking = Booking(name="Ada", email="ada@example.com", service='C_lashes', date=date(2031, 5, 1))
+        booking.save()
+        model_admin = site._registry[Booking]
+        request = RequestFactory().post('/')
+        form_class = model_admin.get_form(request, booking, change=True)
+        data = {
+            'name': booking.name, 'email': booking.email, 'service': booking.service,
+            'date': booking.date.isoformat(), 'fee': booking.fee, 'paid': 'on', 'payment_verified': 'on',
+        }
+
+        with mock.patch('Lashify_Artistry.forms.normalize_image', wraps=normalize_image) as in_form, \
+                mock.patch.object(uploads, 'normalize_image', wraps=normalize_image) as in_attach:
+            form = form_class(data, {'verification_slip': image_file(name='slip.jpg')}, instance=booking)
+            self.assertTrue(form.is_valid(), form.errors)
+            obj = form.save(commit=False)
+            model_admin.save_model(request, obj, form, change=True)
+
+        self.assertEqual(in_form.call_count + in_attach.call_count, 1)
+        booking.refresh_from_db()
+        self.assertTrue(booking.verification_slip_original.name.startswith('verification_slips/originals/'))
+        self.assertTrue(booking.verification_slip.name.endswith('.jpg'))
+
+    def test_admin_form_rejects_a_non_image_slip(self):
+        booking = Booking(name="Ada", email="ada@example.com", service='C_lashes', date=date(2031, 5, 1))
+        booking.save()
+        form = BookingAdminForm(
+            {'name': 'Ada', 'email': 'ada@example.com', 'service': 'C_lashes', 'date': '2031-05-01', 'fee': '1'},
+            {'verification_slip': SimpleUploadedFile('slip.jpg', b'nope')},
+            instance=booking,
+        )
+        self.assertIn('verification_slip', form.errors)
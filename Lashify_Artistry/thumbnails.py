@@ -0,0 +1,85 @@
+"""
+Fixed-size renditions (thumbnails/previews) of uploaded booking images.
+
+Renditions live next to the uploads under ``renditions/<size>/`` with a
+hash of the source name and modification time in the file name, so a
+replaced upload gets a new URL and browsers can cache renditions forever.
+They are generated after a booking with a new image is saved, on first
+request otherwise, or in bulk by ``manage.py generate_thumbnails``.
+"""
+from pathlib import PurePosixPath
+import hashlib
+import io
+import logging
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .media import signed_media_url
+
+logger = logging.getLogger(__name__)
+
+# name -> (max width, max height)
+RENDITIONS = {
+    'thumb': (100, 100),
+    'preview': (400, 400),
+}
+RENDITION_QUALITY = 78
+
+
+def rendition_name(fieldfile, rendition):
+    """Storage name of ``rendition`` for ``fieldfile``; changes when the source does."""
+    storage = fieldfile.storage
+    try:
+        modified = storage.get_modified_time(fieldfile.name).timestamp()
+    except (OSError, NotImplementedError):
+        modified = 0
+    width, height = RENDITIONS[rendition]
+    digest = hashlib.sha1(f"{fieldfile.name}:{modified}:{width}x{height}".encode()).hexdigest()[:10]
+    stem = PurePosixPath(fieldfile.name).stem[:60]
+    return f"renditions/{rendition}/{stem}.{digest}.jpg"
+
+
+def _render(fieldfile, size):
+    with fieldfile.storage.open(fieldfile.name, 'rb') as f:
+        with Image.open(f) as image:
+            image.draft('RGB', size)
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail(size, Image.LANCZOS)
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+            buffer = io.BytesIO()
+            image.save(buffer, 'JPEG', quality=RENDITION_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def ensure_rendition(fieldfile, rendition, force=False):
+    """
+    Return the storage name of the rendition, generating it if missing.
+    Returns ``None`` if the source image can't be read.
+    """
+    if not fieldfile:
+        return None
+    name = rendition_name(fieldfile, rendition)
+    storage = fieldfile.storage
+    if force or not storage.exists(name):
+        try:
+            data = _render(fieldfile, RENDITIONS[rendition])
+        except (OSError, Image.DecompressionBombError) as e:
+            logger.warning("Could not render %s for %s: %s", rendition, fieldfile.name, e)
+            return None
+        if storage.exists(name):
+            storage.delete(name)
+        storage.save(name, ContentFile(data))
+    return name
+
+
+def rendition_url(fieldfile, rendition):
+    """A signed URL for the rendition (media is private, see media.py)."""
+    name = ensure_rendition(fieldfile, rendition)
+    return signed_media_url(name) if name else None
+
+
+def generate_renditions(fieldfile, force=False):
+    """Create every rendition of ``fieldfile``; returns how many exist afterwards."""
+    return sum(1 for rendition in RENDITIONS if ensure_rendition(fieldfile, rendition, force=force))
@@ -0,0 +1,103 @@
+"""
+In-memory dirty-field tracking for models.
+
+``TrackedFieldsMixin`` snapshots the values of ``tracked_fields`` when an
+instance is loaded from the database, so ``save()`` can tell what changed
+without re-reading the row.
+"""
+from django.db.models.signals import class_prepared
+from django.dispatch import receiver
+
+_UNSET = object()
+
+
+class TrackedFieldsMixin:
+    """
+    Mixin for ``models.Model`` subclasses.
+
+    Set ``tracked_fields`` to the field names to watch, then call
+    ``get_field_changes()`` from ``save()`` before ``super().save()``.
+    """
+    tracked_fields = ()
+
+    # Resolved once per model class by ``_resolve_tracked_fields``.
+    _tracked_attnames = {}
+
+    # ---- Snapshots ----
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_fields()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._snapshot_fields(fields)
+
+    def _snapshot_fields(self, names=None):
+        """Record the current value of the tracked fields (or ``names`` only)."""
+        loaded = self.__dict__
+        snapshot = self.__dict__.setdefault('_loaded_values', {})
+        for name, attname in self._tracked_attnames.items():
+            if names is not None and name not in names and attname not in names:
+                continue
+            if attname in loaded:  # skip deferred fields
+                snapshot[name] = loaded[attname]
+
+    # ---- Queries ----
+    def get_loaded_value(self, name, default=None):
+        """The value ``name`` had when the instance was loaded or last saved."""
+        return self.__dict__.get('_loaded_values', {}).get(name, default)
+
+    def get_field_changes(self, update_fields=None):
+        """
+        Return ``{name: (old, new)}`` for tracked fields that differ from the
+        snapshot. New instances report no changes.
+
+        Instances built by hand with a primary key (not loaded through the ORM)
+        have no snapshot; their previous values are read once from the database
+        so callers still see correct transitions.
+        """
+        if self._state.adding:
+            return {}
+
+        names = [
+            name for name in self._tracked_attnames
+            if update_fields is None or name in update_fields
+        ]
+        snapshot = self.__dict__.get('_loaded_values', {})
+        missing = [name for name in names if name not in snapshot]
+        if missing and self.pk is not None:
+            row = (
+                type(self)._base_manager.using(self._state.db or 'default')
+                .filter(pk=self.pk)
+                .values(*[self._tracked_attnames[name] for name in missing])
+                .first()
+            ) or {}
+            for name in missing:
+                snapshot[name] = row.get(self._tracked_attnames[name], _UNSET)
+            self.__dict__['_loaded_values'] = snapshot
+
+        changes = {}
+        for name in names:
+            old = snapshot.get(name, _UNSET)
+            new = getattr(self, self._tracked_attnames[name])
+            if old is _UNSET:
+                continue
+            if old != new:
+                changes[name] = (old, new)
+        return changes
+
+    # ---- Saving ----
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._snapshot_fields(kwargs.get('update_fields'))
+
+
+@receiver(class_prepared)
+def _resolve_tracked_fields(sender, **kwargs):
+    """Map tracked field names to attribute names once per model class."""
+    if issubclass(sender, TrackedFieldsMixin) and not sender._meta.abstract:
+        sender._tracked_attnames = {
+            name: sender._meta.get_field(name).attname for name in sender.tracked_fields
+        }
@@ -0,0 +1,110 @@
+"""
+Upload processing for customer and admin images.
+
+Uploads are streamed to a temporary file (``SizeLimitUploadHandler`` drops
+anything over ``UPLOAD_MAX_BYTES`` while it is still arriving), checked with
+Pillow, and stored twice: the original as received, and a normalized copy
+that is EXIF-free, downscaled to ``UPLOAD_MAX_DIMENSION`` and re-encoded as
+JPEG. Emails, previews and thumbnails use the normalized copy.
+"""
+from pathlib import Path
+import io
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF', 'MPO'}
+
+
+# ------------------------------
+# Upload handler
+# ------------------------------
+
+class SizeLimitUploadHandler(FileUploadHandler):
+    """
+    Skip any file larger than ``UPLOAD_MAX_BYTES`` while it streams in, so
+    oversized uploads never reach memory or disk. Skipped fields are listed in
+    ``request.rejected_uploads``.
+    """
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > getattr(settings, 'UPLOAD_MAX_BYTES', 10 * 1024 * 1024):
+            rejected = getattr(self.request, 'rejected_uploads', set())
+            rejected.add(self.field_name)
+            self.request.rejected_uploads = rejected
+            raise SkipFile()
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+# ------------------------------
+# Normalization
+# ------------------------------
+
+def normalize_image(upload):
+    """
+    Validate ``upload`` and return a normalized JPEG as a ``ContentFile``.
+
+    Raises ``ValidationError`` for files that are too big, not images, or
+    too large in pixels to decode safely.
+    """
+    max_bytes = getattr(settings, 'UPLOAD_MAX_BYTES', 10 * 1024 * 1024)
+    max_pixels = getattr(settings, 'UPLOAD_MAX_PIXELS', 40_000_000)
+    max_dimension = getattr(settings, 'UPLOAD_MAX_DIMENSION', 1600)
+
+    if upload.size > max_bytes:
+        raise ValidationError(f"Image is too large (max {max_bytes // (1024 * 1024)} MB).")
+
+    try:
+        upload.seek(0)
+        with Image.open(upload) as probe:
+            if probe.format not in ALLOWED_FORMATS:
+                raise ValidationError("Please upload a JPEG, PNG, WebP or GIF image.")
+            if probe.width * probe.height > max_pixels:
+                raise ValidationError("Image dimensions are too large.")
+            probe.verify()
+
+        # verify() leaves the image unusable, so decode again
+        upload.seek(0)
+        with Image.open(upload) as image:
+            # JPEG: let the decoder downscale by 1/2, 1/4 or 1/8 for speed and memory
+            image.draft('RGB', (max_dimension, max_dimension))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+
+            buffer = io.BytesIO()
+            # No exif= argument: EXIF (GPS, device, etc.) is dropped
+            image.save(buffer, 'JPEG', quality=getattr(settings, 'UPLOAD_JPEG_QUALITY', 82),
+                       optimize=True, progressive=True)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError):
+        raise ValidationError("The uploaded file is not a valid image.")
+    finally:
+        upload.seek(0)
+
+    name = Path(upload.name or 'upload').stem[:80] or 'upload'
+    return ContentFile(buffer.getvalue(), name=f"{name}.jpg")
+
+
+def attach_image(instance, field_name, upload, normalized=None):
+    """
+    Store ``upload`` on ``<field_name>_original`` and its normalized copy on
+    ``field_name``. Pass ``normalized`` when a form has already made it. The
+    instance still needs to be saved.
+    """
+    if normalized is None:
+        normalized = normalize_image(upload)
+    setattr(instance, f"{field_name}_original", upload)
+    setattr(instance, field_name, normalized)
@@ -12,11 +12,15 @@ urlpatterns = [
     path('contact/', views.contact, name='contact'),
     path('services-detail/', views.servicesDetails, name='services-detail'),
     path('create-booking/', views.create_booking, name='create_booking'),
+    path('availability/', views.booking_availability, name='booking_availability'),
     path('booking-success/<str:reference>/', views.booking_success, name='booking_success'),
     path('my-bookings/', views.my_bookings, name='my_bookings'),
+    path('my-bookings/<str:token>/', views.customer_bookings, name='customer_bookings'),
     path("confirm/<uuid:token>/", views.send_customer_confirmation, name="send_customer_confirmation"),
+    path('metrics/', views.metrics_view, name='metrics'),
+    # Uploads are private in every environment
+    path(f"{settings.MEDIA_URL.strip('/')}/<path:path>", views.protected_media, name='protected_media'),
 ]
 
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -1,194 +1,285 @@
-from decimal import Decimal
-from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponse
+from datetime import date as date_type
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, aget_object_or_404
+from django.http import HttpResponse, Http404, JsonResponse
+from django.db.models import Q
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
-from django.core.mail import EmailMessage
-from django.conf import settings
-from email.mime.image import MIMEImage
+from django.db import transaction
+from django.core.exceptions import PermissionDenied, ValidationError
+import hmac
 import uuid
 import logging
 
+from django.conf import settings
+
 from .models import Booking
+from . import catalogue, media, metrics
+from .links import my_bookings_url, read_my_bookings_token
+from .page_cache import cached_page
+from .idempotency import idempotent
+from .uploads import attach_image
+from .notifications import adispatch, CUSTOMER_CONFIRMED
+from .capacity import SlotUnavailable, availability, month_bounds
+from .references import is_valid_reference, normalize_reference
 
 logger = logging.getLogger(__name__)
 
 # ================= BASIC PAGES =================
+# Context-free pages are served from the page cache (see page_cache.py)
+@cached_page
 def index(request): 
     return render(request, 'index.html')
 
+@cached_page
 def about(request): 
     return render(request, 'about.html')
 
+@cached_page
 def services(request): 
     return render(request, 'services.html')
 
+@cached_page
 def coming_soon(request): 
     return render(request, 'coming-soon.html')
 
 def page_404(request): 
     return render(request, '404.html')
 
+@cached_page
 def contact(request): 
     return render(request, 'contact.html')
 
+@cached_page
 def servicesDetails(request): 
-    return render(request, 'services-detail.html')
+    services = [service for service in catalogue.services().values() if service.is_active]
+    return render(request, 'services-detail.html', {
+        'services': services,
+        'fees': {service.code: float(service.price) for service in services},
+    })
 
 
 # ================= BOOKINGS =================
+# create_booking and send_customer_confirmation are async: under ASGI
+# (SERVER_MODE=asgi, see gunicorn.conf.py) a slow upload or a busy database
+# doesn't hold a worker. Form parsing and image processing run in worker
+# threads, transactional saves in the request's thread-sensitive thread.
+def _read_form(request):
+    """Parse the body (uploads are spooled to disk) and return POST, FILES."""
+    return request.POST, request.FILES
+
+
+def _save_booking(booking):
+    # Booking + its notification emails are saved together; Booking.save()
+    # queues the booking_created messages in the outbox.
+    with transaction.atomic():
+        booking.save()
+
+
 @csrf_exempt
-def create_booking(request):
+@idempotent
+async def create_booking(request):
     if request.method == 'POST':
-        name = request.POST.get('name')
-        email = request.POST.get('email')
-        service = request.POST.get('service')
-        date = request.POST.get('date')
-        fee = request.POST.get('fee', '0').replace("₦", "").strip()
-        payment_method = request.POST.get('payment_method')
-        image_proof = request.FILES.get("payment_proof")
-
-        # Create booking object
-        booking = Booking.objects.create(
+        post, files = await sync_to_async(_read_form, thread_sensitive=False)(request)
+        name = post.get('name')
+        email = post.get('email')
+        service = await sync_to_async(catalogue.get_service)(post.get('service'), active_only=True, fresh=True)
+        try:
+            date = Booking._meta.get_field('date').to_python(post.get('date'))
+        except ValidationError:
+            date = None
+        payment_method = post.get('payment_method')
+        image_proof = files.get("payment_proof")
+
+        if service is None:
+            return _booking_failed(request, "Please choose one of our services.")
+        if date is None:
+            return _booking_failed(request, "Please choose a valid date.")
+
+        # The price always comes from the catalogue, never from the form
+        booking = Booking(
             name=name,
             email=email,
-            service=service,
+            service=service.code,
             date=date,
-            fee=Decimal(fee or "0"),
+            fee=service.price,
             payment_method=payment_method,
             created_at=timezone.now(),
-            payment_proof=image_proof,
             confirmation_token=uuid.uuid4()
         )
 
-        # Confirmation URL
-        confirmation_url = request.build_absolute_uri(
-            f"/confirm/{booking.confirmation_token}/"
-        )
+        # Validate + normalize the proof before opening a transaction
+        if "payment_proof" in getattr(request, "rejected_uploads", ()):
+            return _booking_failed(request, "Your payment proof is too large. Please upload a smaller image.")
+        if image_proof:
+            try:
+                await sync_to_async(attach_image, thread_sensitive=False)(booking, "payment_proof", image_proof)
+            except ValidationError as e:
+                return _booking_failed(request, e.messages[0])
+
+        try:
+            await sync_to_async(_save_booking)(booking)
+        except SlotUnavailable:
+            return _booking_failed(
+                request, "Sorry, that day is fully booked. Please choose another date.", status=409
+            )
+
+        request.booking_reference = booking.reference
+        # The page shows the service name, which may need the catalogue
+        return await sync_to_async(render)(request, 'booking_success.html', {'booking': booking})
+
+    return redirect('services-detail')
+
+
+def _booking_failed(request, error, status=400):
+    return render(request, 'payment_failed.html', {'error': error}, status=status)
+
+
+def booking_availability(request):
+    """
+    ``GET /availability/?service=C_lashes&month=2026-11`` -> free slots per day
+    for the service's category, in one query.
+    """
+    service = request.GET.get('service', '')
+    if catalogue.get_service(service) is None:
+        return JsonResponse({'error': 'Unknown service.'}, status=400)
+    try:
+        year, month = map(int, request.GET.get('month', '').split('-'))
+        start, end = month_bounds(year, month)
+    except ValueError:
+        today = timezone.localdate()
+        start, end = month_bounds(today.year, today.month)
+
+    days = availability(service, start, end)
+    response = JsonResponse({
+        'service': service,
+        'month': start.strftime('%Y-%m'),
+        'days': [
+            {'date': day['date'].isoformat(), 'available': day['available']}
+            for day in days
+        ],
+    })
+    response['Cache-Control'] = 'no-cache'
+    return response
 
-        # Clean service name
-        service_display = (
-            booking.get_service_display()
-            if hasattr(booking, "get_service_display")
-            else str(booking.service).replace("_", " ").title()
-        )
 
-        # Clean payment method
-        payment_display = (
-            booking.get_payment_method_display()
-            if hasattr(booking, "get_payment_method_display")
-            else str(booking.payment_method).replace("_", " ").title()
-        )
+def booking_success(request, reference):
+    return render(request, 'booking-success.html', {'reference': reference})
 
-        # ---------- Admin Email ----------
-        admin_subject = f"New Booking - {service_display}"
-        admin_message = f"""
-<html>
-<body>
-<h2>📥 New Booking Received!</h2>
-<p><strong>👤 Name:</strong> {booking.name}<br>
-<strong>💅 Service:</strong> {service_display}<br>
-<strong>📧 Email:</strong> {booking.email}<br>
-<strong>📅 Date:</strong> {booking.date}<br>
-<strong>💳 Payment Method:</strong> {payment_display}<br>
-<strong>💰 Fee:</strong> ₦{booking.fee}</p>
-
-<p>Click below to verify and send confirmation to the customer:<br>
-<a href="{confirmation_url}">{confirmation_url}</a></p>
-"""
-
-        # Inline proof image if uploaded
-        email_admin = EmailMessage(
-            subject=admin_subject,
-            body=admin_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=getattr(settings, "ADMIN_EMAILS", [settings.DEFAULT_FROM_EMAIL]),
-        )
-        email_admin.content_subtype = "html"  # Enable HTML
 
-        if booking.payment_proof:
-            try:
-                with booking.payment_proof.open("rb") as f:
-                    img = MIMEImage(f.read())
-                    img.add_header("Content-ID", "<proof>")
-                    email_admin.attach(img)
-
-                # Add image inside email body
-                email_admin.body += (
-                    '<p><b>Payment Proof:</b><br>'
-                    '<img src="cid:proof" style="max-width:400px;"></p>'
-                )
-            except Exception as e:
-                logger.error(f"Could not embed payment proof: {e}")
-
-        email_admin.send(fail_silently=False)
-
-        # ---------- Customer Email ----------
-        customer_subject = "Your Booking Confirmation - Lashify Artistry"
-        customer_message = f"""
-Hi {booking.name},<br><br>
-
-Thank you for booking with Lashify Artistry! 💖<br><br>
-
-💅 <b>Service:</b> {service_display}<br>
-📅 <b>Date:</b> {booking.date}<br>
-💰 <b>Booking Fee:</b> ₦{booking.fee}<br>
-💳 <b>Payment Method:</b> {payment_display}<br><br>
-
-Please confirm your booking by clicking below:<br>
-<a href="{confirmation_url}">{confirmation_url}</a><br><br>
-
-With love,<br>
-Lashify Artistry
-"""
-        email_customer = EmailMessage(
-            subject=customer_subject,
-            body=customer_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[booking.email],
+def my_bookings(request):
+    """Look up bookings by email + reference, then redirect to the signed link."""
+    error = None
+    if request.method == 'POST':
+        email = request.POST.get('email', '').strip()
+        reference = request.POST.get('reference', '').strip().upper()
+        # Forgive O/0, I/1 and hyphens in new-style references
+        normalized = normalize_reference(reference)
+        if is_valid_reference(normalized):
+            reference = normalized
+        booking = (
+            Booking.objects.filter(email__iexact=email, reference=reference)
+            .only('email').first()
         )
-        email_customer.content_subtype = "html"  # Send as HTML
-        email_customer.send(fail_silently=False)
+        if booking:
+            return redirect(my_bookings_url(booking.email))
+        error = "We couldn't find a booking with that email and reference."
 
-        return render(request, 'booking_success.html', {'booking': booking})
+    return render(request, 'my_bookings.html', {'lookup': True, 'error': error})
 
-    return redirect('home')
 
+# ---- Keyset pagination on (date, id), newest first ----
+MY_BOOKINGS_PAGE_SIZE = 20
+MY_BOOKINGS_COLUMNS = ('id', 'reference', 'service', 'date', 'paid', 'payment_verified')
 
-def booking_success(request, reference):
-    return render(request, 'booking-success.html', {'reference': reference})
 
+def _encode_cursor(booking):
+    return f"{booking.date.isoformat()}.{booking.id}"
 
-def my_bookings(request):
-    bookings = Booking.objects.all().order_by('-date')
-    return render(request, 'my-bookings.html', {'bookings': bookings})
 
+def _decode_cursor(cursor):
+    try:
+        day, pk = cursor.split('.')
+        return date_type.fromisoformat(day), int(pk)
+    except (AttributeError, ValueError):
+        return None
 
-def send_customer_confirmation(request, token):
-    """Customer clicks confirmation link -> mark booking + send final email."""
-    booking = get_object_or_404(Booking, confirmation_token=token)
 
-    service_display = (
-        booking.get_service_display()
-        if hasattr(booking, "get_service_display")
-        else str(booking.service).replace("_", " ").title()
+def customer_bookings(request, token):
+    """One customer's bookings, reached through a signed link. ``?format=json`` for JSON."""
+    email = read_my_bookings_token(token)
+    if email is None:
+        raise Http404("This link is invalid or has expired.")
+
+    bookings = (
+        Booking.objects.filter(email=email)
+        .only(*MY_BOOKINGS_COLUMNS)
+        .order_by('-date', '-id')
     )
+    cursor = _decode_cursor(request.GET.get('after'))
+    if cursor:
+        day, pk = cursor
+        bookings = bookings.filter(Q(date__lt=day) | Q(date=day, id__lt=pk))
+
+    # Fetch one extra row to know whether there is a next page
+    page = list(bookings[:MY_BOOKINGS_PAGE_SIZE + 1])
+    has_next = len(page) > MY_BOOKINGS_PAGE_SIZE
+    page = page[:MY_BOOKINGS_PAGE_SIZE]
+    next_url = f"{request.path}?after={_encode_cursor(page[-1])}" if has_next else None
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'bookings': [
+                {
+                    'reference': b.reference,
+                    'service': b.service,
+                    'service_display': b.get_service_display(),
+                    'date': b.date.isoformat(),
+                    'paid': b.paid,
+                    'payment_verified': b.payment_verified,
+                }
+                for b in page
+            ],
+            'next': next_url and f"{next_url}&format=json",
+        })
+
+    return render(request, 'my_bookings.html', {
+        'bookings': page,
+        'next_url': next_url,
+        'is_first_page': cursor is None,
+    })
+
+
+async def send_customer_confirmation(request, token):
+    """Customer clicks confirmation link -> mark booking + send final email."""
+    booking = await aget_object_or_404(Booking, confirmation_token=token)
+    request.booking_reference = booking.reference
 
-    confirmation_message = f"""
-Hi {booking.name},<br><br>
+    # Queued once per booking, however many times the link is clicked
+    await adispatch(CUSTOMER_CONFIRMED, booking, request=request)
 
-Your booking for <b>{service_display}</b> on {booking.date} has been confirmed ✅.<br><br>
+    return HttpResponse("Booking confirmed and email sent.")
 
-Thank you,<br>
-Lashify Artistry
-"""
-    email = EmailMessage(
-        subject="Booking Confirmed - Lashify Artistry",
-        body=confirmation_message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        to=[booking.email],
-    )
-    email.content_subtype = "html"
-    email.send(fail_silently=False)
 
-    return HttpResponse("Booking confirmed and email sent.")
+# ================= MEDIA =================
+def protected_media(request, path):
+    """Uploaded proofs and slips, for staff or a signed URL (see media.py)."""
+    if not media.can_view(request, path):
+        raise PermissionDenied
+    return media.serve(request, path)
+
+
+# ================= MONITORING =================
+def metrics_view(request):
+    """Prometheus metrics for this process; staff or ``METRICS_TOKEN`` only."""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    supplied = request.META.get('HTTP_AUTHORIZATION', '').removeprefix('Bearer ').strip()
+    allowed = (
+        (token and hmac.compare_digest(supplied.encode(), token.encode()))
+        or (request.user.is_authenticated and request.user.is_staff)
+    )
+    if not allowed:
+        return HttpResponse("Forbidden", status=403, content_type='text/plain')
+    response = HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+    response['Cache-Control'] = 'no-store'
+    return response
@@ -0,0 +1,45 @@
+"""
+Gunicorn settings: ``gunicorn -c gunicorn.conf.py``.
+
+SERVER_MODE=wsgi (default) runs lizze_website.wsgi on threaded workers.
+SERVER_MODE=asgi runs lizze_website.asgi on uvicorn workers, where the async
+booking views wait on uploads and the database without holding a thread, so
+a couple of processes can carry many slow requests.
+"""
+import os
+
+# Every top-level name here is read as a gunicorn setting, and ``config``
+# is one of them, so decouple is imported under its module name.
+import decouple
+
+mode = decouple.config('SERVER_MODE', default='wsgi')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = decouple.config('WEB_CONCURRENCY', default=2, cast=int)
+timeout = decouple.config('GUNICORN_TIMEOUT', default=60, cast=int)
+graceful_timeout = 30
+keepalive = 5
+# Restart workers now and then to cap memory growth
+max_requests = 2000
+max_requests_jitter = 200
+accesslog = None  # the app writes its own JSON access log (access_log.py)
+
+
+def pre_fork(server, worker):
+    # The lowest slot no live worker holds, so a recycled worker takes over
+    # its predecessor's access log file instead of starting a new one
+    taken = {getattr(w, 'slot', None) for w in server.WORKERS.values()}
+    worker.slot = next(slot for slot in range(len(taken) + 1) if slot not in taken)
+
+
+def post_fork(server, worker):
+    os.environ['GUNICORN_WORKER_SLOT'] = str(worker.slot)
+
+
+if mode == 'asgi':
+    wsgi_app = 'lizze_website.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'lizze_website.wsgi:application'
+    worker_class = 'gthread'
+    threads = decouple.config('GUNICORN_THREADS', default=4, cast=int)
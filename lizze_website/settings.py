@@ -4,7 +4,8 @@ Django settings for lizze_website project.
 
 from pathlib import Path
 import os
-from decouple import config
+import sys
+from decouple import Csv, config
 import dj_database_url
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -15,8 +16,31 @@ SECRET_KEY = config('SECRET_KEY', default='unsafe-secret-key')
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = config('DEBUG', default=True, cast=bool)
 
+TESTING = sys.argv[1:2] == ['test']
+
 ALLOWED_HOSTS = ['localhost', '127.0.0.1', '.onrender.com']
 
+# Public base URL, used for links in emails sent outside a request
+SITE_URL = config('SITE_URL', default='https://lashify-artistry.onrender.com')
+
+# "wsgi" (threaded gunicorn workers) or "asgi" (uvicorn workers); read by
+# gunicorn.conf.py too
+SERVER_MODE = config('SERVER_MODE', default='wsgi')
+
+# Signed "my bookings" links stay valid for 30 days
+MY_BOOKINGS_LINK_MAX_AGE = 60 * 60 * 24 * 30
+
+# Bookings per day for each service category (the part of the service key
+# after the last "_", e.g. C_lashes -> lashes). Per-day overrides are edited
+# in the admin under "Daily capacity".
+BOOKING_DAILY_CAPACITY = {
+    'lashes': 4,
+    'nails': 6,
+    'pedicure': 4,
+    'tattoo': 2,
+}
+BOOKING_DEFAULT_DAILY_CAPACITY = 4
+
 # Application definition
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -24,18 +48,25 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
-    'django.contrib.staticfiles',
-     'django.contrib.sites',  # REMOVE to avoid duplicate 'sites' error
 
-    # Your app
+    # Your app (listed before staticfiles so its collectstatic command,
+    # which also builds responsive images, takes precedence)
     'Lashify_Artistry',
+
+    'django.contrib.staticfiles',
+     'django.contrib.sites',  # REMOVE to avoid duplicate 'sites' error
 ]
 SITE_ID = 1
 MIDDLEWARE = [
+    'Lashify_Artistry.access_log.AccessLogMiddleware',
+    'Lashify_Artistry.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # for static files on Render
+    'Lashify_Artistry.static_files.StaticFilesMiddleware',  # WhiteNoise, also async
+    'Lashify_Artistry.compression.CompressionMiddleware',  # minify + gzip/br everything else
+    'Lashify_Artistry.db_router.ReplicaPinMiddleware',  # primary for writes + read-your-writes
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'Lashify_Artistry.ratelimit.RateLimitMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -44,17 +75,28 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'lizze_website.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates with render timing for /metrics/
+        'BACKEND': 'Lashify_Artistry.metrics.InstrumentedDjangoTemplates',
         'DIRS': [BASE_DIR / 'Lashify_Artistry' / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'Lashify_Artistry.context_processors.fragment_cache',
+            ],
+            # Parse each template once per worker in production; re-read
+            # from disk on every render while developing
+            'loaders': TEMPLATE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
             ],
         },
     },
@@ -72,13 +114,148 @@ if config('DATABASE_URL', default=None):
         )
     }
 else:
+    # Single-node SQLite, tuned for several gunicorn workers: WAL lets reads
+    # run while one connection writes, and IMMEDIATE takes the write lock
+    # when a transaction starts, so a second writer waits out the timeout
+    # (busy_timeout) instead of failing with "database is locked". WAL is
+    # stored in the file and set once by migration 0020; these pragmas are
+    # per connection and leave the file alone.
+    SQLITE_PRAGMAS = {
+        'synchronous': 'NORMAL',     # durable at checkpoints; safe with WAL
+        'mmap_size': 128 * 1024 * 1024,
+        'cache_size': -20000,        # KiB, per connection
+        'temp_store': 'MEMORY',
+    }
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': config('SQLITE_BUSY_TIMEOUT', default=20, cast=int),
+            },
         }
     }
 
+# Read replicas: comma-separated URLs (postgres://... or sqlite:////path).
+# Reads go to a healthy replica; writes, and reads by requests that write,
+# go to "default". See Lashify_Artistry/db_router.py.
+DATABASE_REPLICAS = []
+for index, url in enumerate(config('DATABASE_REPLICA_URLS', default='', cast=Csv()), start=1):
+    is_postgres = url.startswith('postgres')
+    replica = dj_database_url.parse(url, conn_max_age=600, ssl_require=is_postgres)
+    if is_postgres:
+        replica['OPTIONS']['connect_timeout'] = 3  # a dead replica fails its check fast
+    replica['TEST'] = {'MIRROR': 'default'}
+    DATABASES[f'replica{index}'] = replica
+    DATABASE_REPLICAS.append(f'replica{index}')
+
+DATABASE_ROUTERS = ['Lashify_Artistry.db_router.ReplicaRouter']
+REPLICA_PIN_SECONDS = 5              # read-your-writes window after a request that wrote
+REPLICA_HEALTH_CHECK_SECONDS = 10
+REPLICA_MAX_LAG_SECONDS = 30         # Postgres replicas further behind are skipped
+
+# Each worker re-reads the service catalogue's version row at most this
+# often; booking creation always re-reads it (see catalogue.py)
+CATALOGUE_CHECK_SECONDS = 5
+
+# Caches
+# Rendered marketing pages go to the "pages" cache: in-process by default, or
+# a shared directory when PAGE_CACHE_DIR is set (survives restarts, shared by
+# all gunicorn workers).
+PAGE_CACHE_DIR = config('PAGE_CACHE_DIR', default='')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lashify-default',
+    },
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': PAGE_CACHE_DIR,
+        'OPTIONS': {'MAX_ENTRIES': 500},
+    } if PAGE_CACHE_DIR else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lashify-pages',
+        'OPTIONS': {'MAX_ENTRIES': 100},
+    },
+    # Recent POST responses for replaying duplicate submissions. In the
+    # database so every worker sees them: a retry can land on another worker.
+    # The table is created by migration 0021.
+    'idempotency': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'lashify_idempotency_cache',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    # {% cache %} fragments (navbar, footer, service lists); used by the cache
+    # tag automatically. Off in DEBUG so template edits show up at once.
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    } if DEBUG else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lashify-fragments',
+        'OPTIONS': {'MAX_ENTRIES': 200},
+    },
+}
+
+# Changes on every deploy (Render sets RENDER_GIT_COMMIT); part of cache keys
+DEPLOY_VERSION = config('DEPLOY_VERSION', default=config('RENDER_GIT_COMMIT', default='dev'))[:12]
+
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# HTML minification and gzip/Brotli for view responses (see compression.py)
+COMPRESSION_MIN_SIZE = 500          # bytes; smaller responses are sent as is
+COMPRESSION_MINIFY_HTML = True
+COMPRESSION_BROTLI_QUALITY = 5      # per request: fast, ~20% smaller than gzip
+
+PAGE_CACHE_ALIAS = 'pages'
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+PAGE_CACHE_MAX_AGE = 300            # browsers
+PAGE_CACHE_SHARED_MAX_AGE = 3600    # CDNs / shared caches
+
+# Duplicate booking submissions (see idempotency.py)
+IDEMPOTENCY_CACHE_ALIAS = 'idempotency'
+IDEMPOTENCY_TTL = 60 * 60 * 24
+IDEMPOTENCY_LOCK_SECONDS = 60       # longest a booking request is expected to take
+IDEMPOTENCY_WAIT_SECONDS = 15       # how long a duplicate waits for the first response
+
+# Rate limits for expensive POSTs (see ratelimit.py):
+# url name -> {"ip" | "email": (burst, tokens refilled per hour)}
+RATE_LIMITS = {
+    'create_booking': {'ip': (5, 20), 'email': (3, 6)},
+}
+# LocalBackend is per worker; use CacheBackend with a shared cache or
+# DatabaseBackend when running several workers.
+RATE_LIMIT_BACKEND = config('RATE_LIMIT_BACKEND', default='Lashify_Artistry.ratelimit.LocalBackend')
+RATE_LIMIT_CACHE_ALIAS = 'default'
+# Rate-limited requests in flight per process. An ASGI worker waits on I/O
+# without holding a thread, so it can take many more.
+RATE_LIMIT_MAX_CONCURRENT = config(
+    'RATE_LIMIT_MAX_CONCURRENT', default=32 if SERVER_MODE == 'asgi' else 4, cast=int
+)
+# Reverse proxies in front of the app; X-Forwarded-For is ignored when 0.
+# Render (which sets RENDER) has one load balancer, and REMOTE_ADDR is its
+# address, so counting it as the client would put everyone in one bucket.
+RATE_LIMIT_PROXY_COUNT = config(
+    'RATE_LIMIT_PROXY_COUNT', default=1 if config('RENDER', default=False, cast=bool) else 0, cast=int
+)
+
+# JSON-lines access log, written off the request path (see access_log.py).
+# Rotates at ACCESS_LOG_MAX_BYTES, or on ACCESS_LOG_ROTATE_WHEN (e.g. "midnight")
+# if set; rolled files are gzipped. An empty path turns it off (as under
+# "manage.py test"). {worker} is replaced by the gunicorn worker slot, so each
+# worker rotates its own file; keep it in any path you set.
+ACCESS_LOG_PATH = config('ACCESS_LOG_PATH', default=str(BASE_DIR / 'logs' / 'access-{worker}.jsonl'))
+if TESTING:
+    ACCESS_LOG_PATH = ''
+ACCESS_LOG_MAX_BYTES = 20 * 1024 * 1024
+ACCESS_LOG_ROTATE_WHEN = config('ACCESS_LOG_ROTATE_WHEN', default='')
+ACCESS_LOG_BACKUP_COUNT = 14
+
+# /metrics/ is open to staff users and to requests with
+# "Authorization: Bearer <METRICS_TOKEN>" (Prometheus scrapes); empty disables the token
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -95,21 +272,67 @@ USE_TZ = True
 
 # Static files (CSS, JavaScript, Images)
 STATIC_URL = '/static/'
-STATICFILES_DIRS = [BASE_DIR / 'Lashify_Artistry' / 'static']
+# Resized gallery variants, built by `collectstatic` / `build_responsive_images`
+RESPONSIVE_IMAGES_ROOT = BASE_DIR / 'responsive_images'
+RESPONSIVE_IMAGE_WIDTHS = (160, 320, 480, 640, 960, 1280)
+
+STATICFILES_DIRS = [
+    BASE_DIR / 'Lashify_Artistry' / 'static',
+    RESPONSIVE_IMAGES_ROOT / 'static',
+]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Uploads are private: Lashify_Artistry.media serves them to staff or signed
+# URLs. "django" streams them itself; behind nginx use "x-accel" with an
+# internal location at MEDIA_ACCEL_PREFIX aliasing MEDIA_ROOT, or
+# "x-sendfile" for Apache/lighttpd.
+MEDIA_SERVE_MODE = config('MEDIA_SERVE_MODE', default='django')
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+MEDIA_URL_MAX_AGE = 60 * 60     # signed URLs last one to two of these
+
+# Uploads: anything over 512 KB streams to a temp file instead of memory;
+# images over UPLOAD_MAX_BYTES are dropped while still arriving.
+FILE_UPLOAD_HANDLERS = [
+    'Lashify_Artistry.uploads.SizeLimitUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+FILE_UPLOAD_MAX_MEMORY_SIZE = 512 * 1024
+UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+UPLOAD_MAX_PIXELS = 40_000_000
+UPLOAD_MAX_DIMENSION = 1600     # longest side of the normalized copy
+UPLOAD_JPEG_QUALITY = 82
 
 # Email settings
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Sends are timed and counted for /metrics/, then handed to METRICS_EMAIL_BACKEND:
+# Brevo's HTTP API when a key is configured (SMTP as its fallback), else SMTP.
+EMAIL_BACKEND = 'Lashify_Artistry.metrics.InstrumentedEmailBackend'
+EMAIL_API_KEY = config('BREVO_API_KEY', default='')
+EMAIL_API_URL = 'https://api.brevo.com/v3/smtp/email'
+EMAIL_API_BATCH_SIZE = 50                # messages per API call (messageVersions)
+EMAIL_API_FALLBACK_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+METRICS_EMAIL_BACKEND = (
+    'Lashify_Artistry.email_backends.BrevoEmailBackend' if EMAIL_API_KEY
+    else 'django.core.mail.backends.smtp.EmailBackend'
+)
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_TIMEOUT = 30
+
+# Email outbox (drained by `python manage.py send_queued_mail`)
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_MAX_ATTEMPTS = 6
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = 30     # 30s, 1m, 2m, 4m ... capped below
+EMAIL_OUTBOX_RETRY_MAX_SECONDS = 3600
+EMAIL_OUTBOX_LEASE_SECONDS = 300         # claimed rows become due again after this
+EMAIL_BULK_CHUNK_SIZE = 200              # bookings per query/insert in bulk admin actions
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Admin email for booking notifications
@@ -17,13 +17,8 @@ Including another URLconf
 
 from django.contrib import admin
 from django.urls import path, include
-from django.conf import settings
-from django.conf.urls.static import static  # 👈 import this
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('Lashify_Artistry.urls')), 
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)